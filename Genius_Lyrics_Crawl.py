@@ -1,13 +1,39 @@
 import os
 import re
+import math
 import time
 import json
 import threading
+from concurrent.futures import ThreadPoolExecutor
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 import requests
 from lyricsgenius import Genius
 
+from api_config import APIConfig
+from artist_resolver import get_resolution_cache, pick_artist_from_hits, MATCH_EXACT_ARTIST, MATCH_FIRST_HIT
+from crawl_history import get_crawl_history
+from song_outcome_cache import (get_outcome_cache, OUTCOME_LABELS, OUTCOME_NO_LYRICS, OUTCOME_NOT_FOUND,
+                                OUTCOME_PARSE_ERROR, MalformedResponseError)
+from dead_letter_queue import get_dead_letter_queue
+from lyrics_writer import get_lyrics_writer, atomic_write_text, cleanup_temp_files
+from corpus_store import (get_corpus_store, flush_corpus_stores, build_record, export_to_folders,
+                          import_from_folders, lyrics_filename, CORPUS_DIR_NAME)
+from lyrics_search_index import get_search_index, flush_search_indexes, FTS5_AVAILABLE
+from lyrics_blob_store import get_blob_store, save_blob_stats
+from song_registry import get_song_registry, link_or_copy, STORAGE_FOLDER, STORAGE_CORPUS
+from song_filters import SongFilter, RULE_LABELS, REQUESTS_PER_SONG
+from chunk_progress import ChunkProgress
+from proxy_pool import get_proxy_pool
+from latency_tracker import get_latency_tracker
+from raw_store import get_raw_store
+from lyrics_parser import clean_lyrics, fetch_lyrics
+from http_archive import get_http_archive, MODE_OFF, MODE_RECORD, MODE_REPLAY, MODE_LABELS
+from parse_pool import get_parse_pool, PendingLyrics
+from lyrics_stream import fetch_page_streamed, get_stream_stats
+from lyrics_sources import get_lyrics_sources, SOURCE_LABELS
+from single_flight import get_single_flight
+
 try:
     from rate_limiter import get_rate_limiter, make_api_request
     from global_api_manager import get_api_manager, add_api_key_to_pool
@@ -46,6 +72,9 @@ class LyricsDownloaderGUI:
         self.max_consecutive_errors = 5
         self.error_wait_time = 120
 
+        # 下载选项
+        self.init_download_options(tk.BooleanVar, tk.StringVar, tk.IntVar)
+
         # 添加恢复点记录
         self.resume_points = {}  # 记录每个艺人的断点位置
 
@@ -66,12 +95,95 @@ class LyricsDownloaderGUI:
             except:
                 pass
 
+    def init_download_options(self, bool_var, str_var, int_var):
+        """创建下载选项变量（无界面引擎传入不依赖Tk的变量类型）"""
+        self.incremental_update = bool_var(value=False)  # 增量更新：只获取新增歌曲
+        self.deferred_retry = bool_var(value=True)  # 队列结束后重试失败歌曲
+        self.output_format = str_var(value='folder')  # folder：每首歌一个.txt；corpus：合并语料库
+        self.dedup_lyrics = bool_var(value=True)  # 相同歌词只保存一份
+        self.primary_artist_only = bool_var(value=False)  # 跳过艺人只是客串的歌曲
+        self.song_filter_enabled = bool_var(value=False)  # 下载前过滤翻译、现场版、混音等歌曲（默认关闭，需手动开启）
+        self.song_filter = SongFilter(enabled=False)
+        self.top_n_mode = bool_var(value=False)  # 热门模式
+        self.top_n_count = int_var(value=APIConfig.TOP_N_SONGS)
+        self.request_budget = int_var(value=APIConfig.TOP_N_REQUEST_BUDGET)
+        self.http_archive_mode = str_var(value=MODE_OFF)  # 请求录制/回放
+        self.keep_raw_pages = bool_var(value=False)  # 保留歌词页面原始HTML，供 reprocess.py 离线重新处理
+
+    def create_genius_client(self):
+        """创建lyricsgenius客户端"""
+        options = dict(remove_section_headers=False, skip_non_songs=True, timeout=30, retries=3)
+        try:
+            genius = Genius(self.access_token.get(), verbose=False, **options)
+        except TypeError:
+            # 新版 lyricsgenius 去掉了 verbose 参数（改用 logging 输出）
+            genius = Genius(self.access_token.get(), **options)
+        genius.API_ROOT = f"{APIConfig.API_BASE_URL}/"
+        genius.WEB_ROOT = f"{APIConfig.WEB_BASE_URL}/"
+        genius.PUBLIC_API_ROOT = f"{APIConfig.WEB_BASE_URL}/api/"
+
+        # 对冲请求使用单独的连接池
+        backup_session = requests.Session()
+        backup_session.headers = dict(genius._session.headers)
+
+        # 配置了代理时歌词页面请求经过代理池，按出口分别限速
+        proxy_pool = get_proxy_pool()
+        if proxy_pool.is_enabled():
+            proxy_pool.attach_session(genius._session)
+            proxy_pool.attach_session(backup_session)
+        get_latency_tracker().attach_session(genius._session, backup_session)
+        # 最后挂载，回放的请求不经过代理池和对冲
+        get_http_archive().attach_session(genius._session)
+
+        # 记录每个线程最近获取的歌词页面HTML，保留原始页面时使用
+        self.page_capture = threading.local()
+        original_make_request = genius._make_request
+
+        def capture_make_request(path, *args, web=False, **kwargs):
+            result = original_make_request(path, *args, web=web, **kwargs)
+            if web:
+                self.page_capture.page = (path, result.get('html'))
+            return result
+
+        genius._make_request = capture_make_request
+
+        def stream_page(path):
+            if self.keep_raw_pages.get():
+                # 保留原始页面时需要完整的HTML，不提前关闭连接（capture_make_request 记录页面）
+                return genius._make_request(path, web=True)["html"]
+            page = fetch_page_streamed(genius, path)
+            self.page_capture.page = (path, page)
+            return page
+
+        # 歌词页面用自带的解析器提取（APIConfig.LYRICS_PARSER），search_song 也通过 lyrics 方法获取歌词；
+        # 开启解析进程池时只提交页面，解析和清理在工作进程中完成；开启流式下载时读完歌词区域就关闭连接（保留原始页面时仍读取完整页面）
+        parse_pool = get_parse_pool()
+        parse_func = parse_pool.parse_later if parse_pool.is_enabled() else None
+        fetch_page = stream_page if APIConfig.LYRICS_STREAMING else None
+        genius.lyrics = lambda song_id=None, song_url=None, remove_section_headers=False: fetch_lyrics(
+            genius, song_id, song_url, remove_section_headers, parse_func, fetch_page)
+        return genius
+
+    def apply_archive_mode(self):
+        """开始下载时按选项设置请求录制/回放模式，回放时去掉 lyricsgenius 的请求间隔"""
+        mode = self.http_archive_mode.get()
+        get_http_archive().set_mode(mode)
+        if self.genius is not None:
+            self.genius.sleep_time = 0 if mode == MODE_REPLAY else 0.2
+        if mode != MODE_OFF:
+            self.log_message(f"📼 请求{MODE_LABELS[mode]}模式: {get_http_archive().archive_file}")
+
+    def request_delay(self, seconds):
+        """请求之间的等待，回放模式下跳过"""
+        if seconds > 0 and not get_http_archive().is_replaying():
+            time.sleep(seconds)
+
     # 在 LyricsDownloaderGUI 类中添加方法
     def check_api_rate_limit(self):
         """检查API调用限制"""
         try:
             # 简单的API状态检查
-            search_url = "https://api.genius.com/search"
+            search_url = f"{APIConfig.API_BASE_URL}/search"
             headers = {"Authorization": f"Bearer {self.access_token.get()}"}
             params = {"q": "test"}
 
@@ -295,11 +407,63 @@ class LyricsDownloaderGUI:
                                      state=tk.DISABLED, width=12)
         self.resume_btn.pack(side=tk.LEFT, padx=5)
 
+        # 新增：只重试失败歌曲按钮
+        self.retry_failed_btn = ttk.Button(control_btn_frame, text="🔁 重试失败歌曲", command=self.retry_failed_songs,
+                                           width=14)
+        self.retry_failed_btn.pack(side=tk.LEFT, padx=5)
+
         config_btn_frame = ttk.Frame(control_frame)
         config_btn_frame.grid(row=1, column=0, sticky=(tk.W, tk.E), pady=(0, 10))
 
         ttk.Button(config_btn_frame, text="⚙ 保存配置", command=self.save_settings).pack(side=tk.LEFT, padx=5)
         ttk.Button(config_btn_frame, text="🔄 重新加载", command=self.load_settings).pack(side=tk.LEFT, padx=5)
+        ttk.Button(config_btn_frame, text="📦 语料库导出为文件夹", command=self.export_corpus).pack(side=tk.LEFT, padx=5)
+        ttk.Button(config_btn_frame, text="📥 文件夹导入语料库", command=self.import_corpus).pack(side=tk.LEFT, padx=5)
+
+        # 下载选项
+        self.options_frame = ttk.Frame(control_frame)
+        self.options_frame.grid(row=4, column=0, sticky=(tk.W, tk.E), pady=(10, 0))
+
+        ttk.Checkbutton(self.options_frame,
+                        text=f"增量更新（只获取新增歌曲，跳过{APIConfig.INCREMENTAL_REFRESH_DAYS}天内已更新的艺人）",
+                        variable=self.incremental_update).pack(anchor=tk.W)
+        ttk.Checkbutton(self.options_frame, text="队列结束后自动重试失败歌曲",
+                        variable=self.deferred_retry).pack(anchor=tk.W)
+        ttk.Checkbutton(self.options_frame, text="只下载艺人为主唱的歌曲（跳过客串）",
+                        variable=self.primary_artist_only).pack(anchor=tk.W)
+        ttk.Checkbutton(self.options_frame, text="跳过翻译、现场版、混音、片段、短剧、未发布和纯音乐",
+                        variable=self.song_filter_enabled).pack(anchor=tk.W)
+
+        ttk.Checkbutton(self.options_frame, text="相同歌词只保存一份（按内容哈希去重）",
+                        variable=self.dedup_lyrics).pack(anchor=tk.W)
+        ttk.Checkbutton(self.options_frame, text="保留歌词页面原始HTML（改进清理规则后可用 reprocess.py 离线重新处理）",
+                        variable=self.keep_raw_pages).pack(anchor=tk.W)
+
+        top_n_frame = ttk.Frame(self.options_frame)
+        top_n_frame.pack(anchor=tk.W)
+        ttk.Checkbutton(top_n_frame, text="热门模式：每个艺人只下载最热门的",
+                        variable=self.top_n_mode).pack(side=tk.LEFT)
+        ttk.Spinbox(top_n_frame, from_=1, to=1000, width=5, textvariable=self.top_n_count).pack(side=tk.LEFT)
+        ttk.Label(top_n_frame, text="首，请求预算").pack(side=tk.LEFT)
+        ttk.Spinbox(top_n_frame, from_=0, to=1000000, increment=100, width=8,
+                    textvariable=self.request_budget).pack(side=tk.LEFT)
+        ttk.Label(top_n_frame, text="（0为不限）").pack(side=tk.LEFT)
+
+        format_frame = ttk.Frame(self.options_frame)
+        format_frame.pack(anchor=tk.W)
+        ttk.Label(format_frame, text="输出格式:").pack(side=tk.LEFT)
+        ttk.Radiobutton(format_frame, text="每首歌一个.txt", value='folder',
+                        variable=self.output_format).pack(side=tk.LEFT, padx=(5, 0))
+        ttk.Radiobutton(format_frame, text="合并语料库（JSONL段文件）", value='corpus',
+                        variable=self.output_format).pack(side=tk.LEFT, padx=(5, 0))
+
+        archive_frame = ttk.Frame(self.options_frame)
+        archive_frame.pack(anchor=tk.W)
+        ttk.Label(archive_frame, text="请求存档:").pack(side=tk.LEFT)
+        for mode, text in ((MODE_OFF, "关闭"), (MODE_RECORD, "录制（保存API响应和歌词页面）"),
+                           (MODE_REPLAY, "回放（不访问网络）")):
+            ttk.Radiobutton(archive_frame, text=text, value=mode,
+                            variable=self.http_archive_mode).pack(side=tk.LEFT, padx=(5, 0))
 
         # 进度显示
         progress_frame = ttk.Frame(control_frame)
@@ -389,8 +553,7 @@ class LyricsDownloaderGUI:
 
         metadata_path = os.path.join(artist_path, 'metadata.json')
         try:
-            with open(metadata_path, 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, ensure_ascii=False, indent=2)
+            atomic_write_text(metadata_path, json.dumps(metadata, ensure_ascii=False, indent=2))
             return True
         except Exception as e:
             self.log_message(f"保存歌曲列表失败: {str(e)}", error=True)
@@ -435,6 +598,8 @@ class LyricsDownloaderGUI:
                     lyrics_files = [f for f in os.listdir(artist_folder)
                                     if f.endswith('.txt') and f != 'metadata.json']
                     saved_songs = len(lyrics_files)
+                    if self.output_format.get() == 'corpus':
+                        saved_songs += get_corpus_store(save_path).count_artist(os.path.basename(artist_folder))
 
                     artist_data['status'] = '已完成'
                     artist_data['songs_found'] = total_songs  # 实际的歌曲总数
@@ -818,10 +983,12 @@ class LyricsDownloaderGUI:
         """检查API连接"""
         if not self.access_token.get():
             return False, "API密钥为空"
+        if self.http_archive_mode.get() == MODE_REPLAY:
+            return True, "回放模式（不访问网络）"
 
         try:
             response = requests.get(
-                "https://api.genius.com/search",
+                f"{APIConfig.API_BASE_URL}/search",
                 headers={"Authorization": f"Bearer {self.access_token.get()}"},
                 params={"q": "test"},
                 timeout=10
@@ -897,6 +1064,12 @@ class LyricsDownloaderGUI:
 
     def safe_api_request(self, request_func, *args, **kwargs):
         """安全的API请求包装器"""
+        # 回放模式直接从存档返回，不经过速率限制；录制模式保存响应
+        archive = get_http_archive()
+        if archive.is_replaying():
+            return archive.replay(request_func, *args, **kwargs)
+        request_func = archive.wrap(request_func)
+
         if RATE_LIMITER_AVAILABLE:
             try:
                 # 使用全局速率限制器
@@ -961,14 +1134,26 @@ class LyricsDownloaderGUI:
 
         self._start_download_impl(start_from=start_from)
 
-    def _start_download_impl(self, start_from=0):
+    def retry_failed_songs(self):
+        """只重试失败队列中的歌曲，不处理艺人队列"""
+        entries = get_dead_letter_queue().due_entries(self.save_directory.get(), force=True)
+        if not entries:
+            messagebox.showinfo("重试失败歌曲", "当前保存路径下没有失败的歌曲")
+            return
+
+        if not messagebox.askyesno("确认", f"确定要重试 {len(entries)} 首失败的歌曲吗？"):
+            return
+
+        self._start_download_impl(retry_only=True)
+
+    def _start_download_impl(self, start_from=0, retry_only=False):
         """下载实现的通用方法"""
         if not self.access_token.get():
             messagebox.showwarning("配置错误", "请输入Genius API密钥")
             self.token_entry.focus_set()
             return
 
-        if not self.artists_queue:
+        if not self.artists_queue and not retry_only:
             messagebox.showwarning("队列为空", "请先添加艺人到队列")
             return
 
@@ -989,14 +1174,7 @@ class LyricsDownloaderGUI:
         self.log_message("✅ API连接正常")
 
         try:
-            self.genius = Genius(
-                self.access_token.get(),
-                remove_section_headers=False,
-                skip_non_songs=True,
-                timeout=30,
-                retries=3,
-                verbose=False
-            )
+            self.genius = self.create_genius_client()
         except Exception as e:
             messagebox.showerror("初始化错误", f"初始化Genius对象失败: {str(e)}")
             return
@@ -1007,6 +1185,7 @@ class LyricsDownloaderGUI:
 
         self.start_btn.config(state=tk.DISABLED)
         self.start_selected_btn.config(state=tk.DISABLED)
+        self.retry_failed_btn.config(state=tk.DISABLED)
         self.pause_btn.config(state=tk.NORMAL)
         self.stop_btn.config(state=tk.NORMAL)
         self.resume_btn.config(state=tk.DISABLED)
@@ -1017,7 +1196,12 @@ class LyricsDownloaderGUI:
         self.update_api_status("连接正常")
 
         # 启动下载线程，传入起始索引
-        download_thread = threading.Thread(target=self.process_download_queue, args=(start_from,), daemon=True)
+        if retry_only:
+            download_thread = threading.Thread(target=self.process_failed_songs, daemon=True)
+        elif self.top_n_mode.get():
+            download_thread = threading.Thread(target=self.process_top_songs_queue, args=(start_from,), daemon=True)
+        else:
+            download_thread = threading.Thread(target=self.process_download_queue, args=(start_from,), daemon=True)
         download_thread.start()
 
     def resume_download(self):
@@ -1063,6 +1247,15 @@ class LyricsDownloaderGUI:
             self.update_progress(initial_progress)
 
         self.log_message(f"🎬 开始处理 {total_artists} 个艺人，从第 {start_index + 1} 个开始")
+        self.song_filter = SongFilter(enabled=self.song_filter_enabled.get(),
+                                      primary_artist_only=self.primary_artist_only.get())
+        self.apply_archive_mode()
+
+        # 预解析艺人ID，后续处理直接命中缓存
+        try:
+            self.pre_resolve_artists(start_index)
+        except Exception as e:
+            self.log_message(f"艺人ID预解析失败，将在处理时逐个解析: {str(e)}", warning=True)
 
         for i in range(start_index, total_artists):
             if self.stop_requested:
@@ -1071,8 +1264,8 @@ class LyricsDownloaderGUI:
                 self.log_message(f"🛑 下载停止，记录断点: 艺人 {i + 1} ({self.artists_queue[i]['name']})")
                 break
 
-            # 跳过已完成的艺人
-            if self.artists_queue[i].get('status') == '已完成':
+            # 跳过已完成的艺人（增量更新模式下，已过期的艺人需要刷新）
+            if self.artists_queue[i].get('status') == '已完成' and not self.needs_refresh(self.artists_queue[i]['name']):
                 self.log_message(f"⏭️ 跳过已完成的艺人: {self.artists_queue[i]['name']}")
                 processed_artists += 1
                 total_songs_found += self.artists_queue[i].get('songs_found', 0)
@@ -1133,6 +1326,14 @@ class LyricsDownloaderGUI:
 
             self.update_stats(processed_artists, total_songs_found, total_songs_saved, total_songs_failed)
 
+            # 定期执行失败歌曲的延迟重试
+            retry_every = APIConfig.DEAD_LETTER_RETRY_EVERY_ARTISTS
+            if (self.deferred_retry.get() and retry_every > 0 and (i + 1) % retry_every == 0
+                    and i < total_artists - 1 and not self.stop_requested):
+                retried_saved, _ = self.retry_dead_letters()
+                total_songs_saved += retried_saved
+                total_songs_failed -= retried_saved
+
             if i < total_artists - 1 and not self.stop_requested:
                 delay = 10
                 self.log_message(f"\n⏱ 等待{delay}秒后处理下一个艺人...")
@@ -1141,6 +1342,14 @@ class LyricsDownloaderGUI:
                         break
                     time.sleep(1)
 
+        # 队列结束后的延迟重试
+        if self.deferred_retry.get() and not self.stop_requested:
+            retried_saved, _ = self.retry_dead_letters()
+            total_songs_saved += retried_saved
+            total_songs_failed -= retried_saved
+
+        self.log_filter_stats()
+        self.flush_writes()
         self.currently_processing = False
 
         if self.stop_requested:
@@ -1158,6 +1367,153 @@ class LyricsDownloaderGUI:
                             processed_artists, total_artists,
                             total_songs_saved, total_songs_found, total_songs_failed)
 
+    def process_top_songs_queue(self, start_index=0):
+        """
+        热门模式：先按热度列出每个艺人的前N首歌，再按名次轮流下载（广度优先）
+        所有艺人的第1名下载完才开始第2名，请求预算用完时停止，使有限的预算覆盖尽可能多的艺人
+        """
+        total_artists = len(self.artists_queue)
+        top_n = max(1, self.get_int_option(self.top_n_count, APIConfig.TOP_N_SONGS))
+        budget = max(0, self.get_int_option(self.request_budget, APIConfig.TOP_N_REQUEST_BUDGET))
+
+        budget_text = f"，请求预算 {budget}" if budget else ""
+        self.log_message(f"🎬 热门模式: {total_artists - start_index} 个艺人，每个艺人前 {top_n} 首{budget_text}")
+        self.song_filter = SongFilter(enabled=self.song_filter_enabled.get(),
+                                      primary_artist_only=self.primary_artist_only.get())
+        self.apply_archive_mode()
+
+        try:
+            self.pre_resolve_artists(start_index)
+        except Exception as e:
+            self.log_message(f"艺人ID预解析失败，将在处理时逐个解析: {str(e)}", warning=True)
+
+        save_base_path = self.save_directory.get()
+        corpus_store = get_corpus_store(save_base_path) if self.output_format.get() == 'corpus' else None
+        requests_spent = 0
+        plans = []
+
+        # 第一轮：获取每个艺人按热度排序的前N首
+        self.log_message("📋 获取各艺人的热门歌曲列表...")
+        for i in range(start_index, total_artists):
+            while not self.currently_processing and not self.stop_requested:
+                time.sleep(0.5)
+            if self.stop_requested:
+                break
+            if budget and requests_spent >= budget:
+                self.log_message(f"💰 请求预算已用完，剩余艺人不再获取列表", warning=True)
+                break
+
+            artist_name = self.artists_queue[i]['name']
+            self.update_artist_status(i, '获取列表')
+            artist_id = self.get_artist_id(artist_name)
+            if not artist_id:
+                self.log_message(f"❌ 未找到艺术家: {artist_name}", error=True)
+                self.update_artist_status(i, '失败')
+                continue
+
+            self.log_message(f"🎤 {artist_name}: 获取前 {top_n} 首热门歌曲")
+            songs = self.get_all_artist_songs(artist_id, artist_name, sort='popularity', limit=top_n)
+            requests_spent += max(1, math.ceil(len(songs) / min(50, top_n)))
+            if not songs:
+                self.update_artist_status(i, '无歌曲')
+                continue
+
+            # 热门列表与完整列表的文件编号不同，单独存放
+            artist_safe_name = re.sub(r'[<>:"/\\|?*]', '', artist_name).replace(' ', '_')
+            artist_path = os.path.join(save_base_path, f"{artist_safe_name}_热门歌曲")
+            os.makedirs(artist_path, exist_ok=True)
+            self.save_artist_metadata(artist_name, artist_id, songs, artist_path)
+            cleanup_temp_files(artist_path)
+            existing_files = {f for f in os.listdir(artist_path)
+                              if f.endswith('.txt') and os.path.getsize(os.path.join(artist_path, f)) > 0}
+
+            plans.append({
+                'queue_index': i,
+                'songs': songs,
+                'saved': 0,
+                'failed': 0,
+                'context': {
+                    'artist_name': artist_name,
+                    'artist_id': artist_id,
+                    'artist_path': artist_path,
+                    'artist_index': None,
+                    'existing_files': existing_files,
+                    'corpus_store': corpus_store
+                }
+            })
+
+        # 之后按名次轮流下载
+        budget_exhausted = False
+        for rank in range(1, top_n + 1):
+            if self.stop_requested or budget_exhausted:
+                break
+            ranked = [plan for plan in plans if rank <= len(plan['songs'])]
+            if not ranked:
+                break
+            self.log_message(f"\n🏅 第 {rank} 名 ({len(ranked)} 个艺人)")
+
+            for plan in ranked:
+                while not self.currently_processing and not self.stop_requested:
+                    time.sleep(0.5)
+                if self.stop_requested:
+                    break
+                if budget and requests_spent + REQUESTS_PER_SONG > budget:
+                    budget_exhausted = True
+                    self.log_message(f"💰 请求预算已用完 (约 {requests_spent}/{budget})，停止下载", warning=True)
+                    break
+
+                song_info = plan['songs'][rank - 1]
+                status = self.process_song(song_info, rank, len(plan['songs']), plan['context'])
+                if status in ('existing', 'reused', 'saved'):
+                    plan['saved'] += 1
+                elif status in ('cached', 'failed'):
+                    plan['failed'] += 1
+                if status in ('saved', 'failed'):
+                    requests_spent += REQUESTS_PER_SONG
+                    self.request_delay(APIConfig.SONG_DELAY)
+
+            self.update_progress(rank / top_n * 100)
+
+        # 汇总
+        total_songs_found = 0
+        total_songs_saved = 0
+        total_songs_failed = 0
+        for plan in plans:
+            artist_data = self.artists_queue[plan['queue_index']]
+            songs_found = len(plan['songs'])
+            artist_data.update({
+                'status': f"热门 ({plan['saved']}/{songs_found})",
+                'songs_found': songs_found,
+                'songs_saved': plan['saved'],
+                'songs_failed': plan['failed']
+            })
+            self.update_artist_status(plan['queue_index'], artist_data['status'])
+            total_songs_found += songs_found
+            total_songs_saved += plan['saved']
+            total_songs_failed += plan['failed']
+
+        if self.deferred_retry.get() and not self.stop_requested and not budget_exhausted:
+            retried_saved, _ = self.retry_dead_letters()
+            total_songs_saved += retried_saved
+            total_songs_failed -= retried_saved
+
+        get_outcome_cache().flush()
+        self.log_message(f"\n📊 热门模式: {len(plans)} 个艺人，保存 {total_songs_saved}/{total_songs_found} 首，"
+                         f"约使用 {requests_spent} 次请求")
+        self.update_stats(len(plans), total_songs_found, total_songs_saved, total_songs_failed)
+        self.log_filter_stats()
+        self.flush_writes()
+        self.currently_processing = False
+
+        if self.stop_requested:
+            self.root.after(0, lambda: self.on_download_stopped(len(plans), total_artists,
+                                                                total_songs_saved, total_songs_found,
+                                                                total_songs_failed))
+        else:
+            self.root.after(0, self.on_download_complete,
+                            len(plans), total_artists,
+                            total_songs_saved, total_songs_found, total_songs_failed)
+
     # 修改 process_artist 方法中的保存逻辑
     def process_artist(self, artist_name, artist_index):
         """处理单个艺人（支持断点续传和保存歌曲列表）"""
@@ -1182,6 +1538,20 @@ class LyricsDownloaderGUI:
                 songs = metadata['songs']
                 artist_id = metadata.get('artist_id')
                 self.log_message(f"✅ 从缓存加载歌曲列表，共 {len(songs)} 首歌曲")
+
+                # 增量更新：只获取缓存之后新增的歌曲，追加到列表末尾以保持已有文件编号不变
+                if artist_id and self.needs_refresh(artist_name):
+                    self.log_message("🔄 增量更新: 正在检查新增歌曲...")
+                    full_scan = get_crawl_history().needs_full_scan(artist_name, APIConfig.INCREMENTAL_FULL_SCAN_DAYS)
+                    new_songs = self.get_new_artist_songs(artist_id, songs, artist_name if full_scan else None)
+                    if new_songs:
+                        songs = songs + new_songs
+                        self.save_artist_metadata(artist_name, artist_id, songs, artist_path)
+                        self.log_message(f"✅ 发现 {len(new_songs)} 首新歌曲，歌曲列表已更新")
+                    else:
+                        self.log_message("✅ 没有新增歌曲")
+                    get_crawl_history().record(artist_name, artist_id, len(songs), len(new_songs), mode='incremental',
+                                               full_scan=full_scan)
             else:
                 # 需要从API获取
                 self.log_message(f"🔍 正在搜索艺术家: {artist_name}")
@@ -1207,11 +1577,15 @@ class LyricsDownloaderGUI:
                 # 保存歌曲列表到metadata.json
                 self.save_artist_metadata(artist_name, artist_id, songs, artist_path)
                 self.log_message(f"📄 歌曲列表已保存到 metadata.json")
+                get_crawl_history().record(artist_name, artist_id, len(songs), len(songs))
 
             # 检查是否已存在文件夹
             existing_files = []
             if os.path.exists(artist_path):
-                existing_files = [f for f in os.listdir(artist_path) if f.endswith('.txt')]
+                # 清理上次中断遗留的临时文件，空文件不视为已下载
+                cleanup_temp_files(artist_path)
+                existing_files = [f for f in os.listdir(artist_path)
+                                  if f.endswith('.txt') and os.path.getsize(os.path.join(artist_path, f)) > 0]
                 if existing_files:
                     self.log_message(f"📁 发现已有文件夹，包含 {len(existing_files)} 个歌词文件")
 
@@ -1219,67 +1593,212 @@ class LyricsDownloaderGUI:
                 os.makedirs(artist_path, exist_ok=True)
                 self.log_message(f"📁 创建文件夹: {artist_path}")
 
-            saved_count = 0
-            failed_count = 0
             total_songs = len(songs)
-
-            for i, song_info in enumerate(songs, 1):
-                if self.stop_requested:
+            outcome_cache = get_outcome_cache()
+            artist_context = {
+                'artist_name': artist_name,
+                'artist_id': artist_id,
+                'artist_path': artist_path,
+                'artist_index': artist_index,
+                'existing_files': set(existing_files),
+                'corpus_store': get_corpus_store(save_base_path) if self.output_format.get() == 'corpus' else None
+            }
+
+            if total_songs > APIConfig.CHUNK_SPLIT_THRESHOLD:
+                saved_count, failed_count = self.process_artist_chunks(songs, artist_context)
+            else:
+                saved_count, failed_count, next_index = self.process_song_range(songs, 1, total_songs + 1,
+                                                                                 artist_context)
+                if next_index <= total_songs:
                     # 记录断点
                     self.resume_points[artist_name] = {
                         'artist_index': artist_index,
-                        'song_index': i - 1,  # 当前歌曲的索引
+                        'song_index': next_index - 1,  # 当前歌曲的索引
                         'saved_count': saved_count,
                         'failed_count': failed_count
                     }
-                    self.log_message(f"🛑 下载停止，记录断点: 艺人 {artist_name}，歌曲 {i}/{total_songs}")
-                    break
+                    self.log_message(f"🛑 下载停止，记录断点: 艺人 {artist_name}，歌曲 {next_index}/{total_songs}")
 
-                # 断点续传：检查是否已下载过此歌曲
-                song_safe_filename = re.sub(r'[<>:"/\\|?*]', '', song_info['title'])
-                song_safe_filename = song_safe_filename.replace(' ', '_')
-                if len(song_safe_filename) > 100:
-                    song_safe_filename = song_safe_filename[:100]
+            outcome_cache.flush()
+            self.log_message(f"\n📊 统计: {saved_count}/{total_songs} 首歌曲保存成功")
+            return True, total_songs, saved_count, failed_count
 
-                expected_filename = f"{i:04d}_{song_safe_filename}.txt"
-                if expected_filename in existing_files:
-                    self.log_message(f"[{i:04d}/{total_songs:04d}] ⏭️ {song_info['title']} (已存在，跳过)")
-                    saved_count += 1
-                    continue
+        except Exception as e:
+            self.handle_api_error("处理艺人失败", str(e))
+            self.log_message(f"❌ 处理艺人 '{artist_name}' 时出错: {str(e)}", error=True)
+            return False, 0, 0, 0
 
-                song_progress = (i / total_songs) * 100
-                artist_progress = (artist_index + (i / total_songs)) / len(self.artists_queue) * 100
-                self.update_progress(artist_progress)
-                self.update_status(f"处理歌曲: {song_info['title']} ({i}/{total_songs})")
+    def process_song_range(self, songs, start, end, artist_context, on_progress=None, first_index=1,
+                           total_songs=None):
+        """
+        处理歌曲列表中序号在 [start, end) 内的歌曲
 
-                self.log_message(f"[{i:04d}/{total_songs:04d}] 🎵 {song_info['title']}")
+        Args:
+            on_progress: 每处理完一首后的回调，参数为 (下一首的序号, 已保存数, 失败数)
+            first_index: songs[0] 在完整歌曲列表中的序号（songs 只是列表的一段时使用）
+            total_songs: 完整歌曲列表的长度，默认为 len(songs)
 
-                song = self.get_song_lyrics(song_info['id'], song_info['title'], song_info['artist'])
+        Returns:
+            (已保存数, 失败数, 下一首待处理的序号)，全部处理完时下一首序号等于end
+        """
+        saved_count = 0
+        failed_count = 0
+        if total_songs is None:
+            total_songs = len(songs) + first_index - 1
 
-                if song and song.lyrics:
-                    if self.save_song_lyrics(song, artist_path, i, total_songs):
-                        saved_count += 1
-                        self.log_message(f"    ✅ 保存成功")
-                    else:
-                        failed_count += 1
-                        self.log_message(f"    ❌ 保存失败")
-                else:
-                    failed_count += 1
-                    self.log_message(f"    ⚠️ 无法获取歌词")
+        for i in range(start, end):
+            if self.stop_requested:
+                return saved_count, failed_count, i
 
-                # 添加智能延迟，避免API限制
-                if i < total_songs and not self.stop_requested:
-                    # 每处理5首歌曲增加一点延迟
-                    delay = 2 if i % 5 != 0 else 5
-                    time.sleep(delay)
+            status = self.process_song(songs[i - first_index], i, total_songs, artist_context)
+            if status in ('existing', 'reused', 'saved'):
+                saved_count += 1
+            elif status in ('cached', 'failed'):
+                failed_count += 1
+            if on_progress:
+                on_progress(i + 1, saved_count, failed_count)
 
-            self.log_message(f"\n📊 统计: {saved_count}/{total_songs} 首歌曲保存成功")
-            return True, total_songs, saved_count, failed_count
+            # 添加智能延迟，避免API限制
+            if status in ('saved', 'failed') and i < total_songs and not self.stop_requested:
+                # 每处理5首歌曲增加一点延迟
+                delay = APIConfig.SONG_DELAY if i % 5 != 0 else APIConfig.SONG_BATCH_DELAY
+                self.request_delay(delay)
+
+        return saved_count, failed_count, end
+
+    def process_artist_chunks(self, songs, artist_context):
+        """
+        歌曲很多的艺人：切分为固定大小的块，由多个工作线程分别领取处理，
+        每块在 chunks.json 中单独记录断点，停止后再次运行从各块的断点继续
+
+        Returns:
+            (已保存数, 失败数)，为所有块合并后的结果
+        """
+        progress = ChunkProgress(artist_context['artist_path'], len(songs), APIConfig.CHUNK_SIZE)
+        _, _, done_chunks, total_chunks = progress.totals()
+
+        # 没有全局速率限制器时无法约束并发请求频率，退化为串行；
+        # 歌词页面请求不经过速率限制器，多个块并行时对 genius.com 的请求频率也会成倍增加（见 CHUNK_WORKERS）
+        workers = min(APIConfig.CHUNK_WORKERS if RATE_LIMITER_AVAILABLE else 1, total_chunks - done_chunks) or 1
+        self.log_message(f"🧩 歌曲较多，分为 {total_chunks} 块（每块 {APIConfig.CHUNK_SIZE} 首），"
+                         f"已完成 {done_chunks} 块，{workers} 个线程并行处理")
+
+        def work(worker_name):
+            while not self.stop_requested:
+                chunk = progress.claim(worker_name)
+                if not chunk:
+                    return
+                chunk_id = chunk['chunk_id']
+                base_saved, base_failed = chunk['saved'], chunk['failed']
+                self.log_message(f"🧩 [{worker_name}] 第 {chunk_id + 1}/{total_chunks} 块: "
+                                 f"歌曲 {chunk['next_index']}-{chunk['end'] - 1}")
 
+                def on_progress(next_index, saved, failed):
+                    progress.update(chunk_id, next_index, base_saved + saved, base_failed + failed)
+
+                try:
+                    _, _, next_index = self.process_song_range(songs, chunk['next_index'], chunk['end'],
+                                                               artist_context, on_progress)
+                except Exception:
+                    progress.finish(chunk_id, completed=False)
+                    raise
+                progress.finish(chunk_id, completed=next_index >= chunk['end'])
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(work, f"W{k + 1}") for k in range(workers)]
+            for future in futures:
+                future.result()
+
+        saved_count, failed_count, done_chunks, total_chunks = progress.totals()
+        if done_chunks < total_chunks:
+            self.log_message(f"🛑 分块进度已保存: {done_chunks}/{total_chunks} 块完成，再次运行从各块断点继续")
+        else:
+            self.log_message(f"🧩 全部 {total_chunks} 块已完成")
+        return saved_count, failed_count
+
+    def process_song(self, song_info, i, total_songs, artist_context):
+        """
+        处理艺人歌曲列表中的一首歌
+
+        Args:
+            song_info: 歌曲列表中的条目
+            i: 歌曲在列表中的序号（从1开始，决定文件编号）
+            total_songs: 列表中的歌曲总数
+            artist_context: 艺人级别的信息（artist_name、artist_id、artist_path、artist_index、
+                            existing_files、corpus_store）
+
+        Returns:
+            existing（已存在）、filtered（已过滤）、reused（从其他艺人复用）、cached（负缓存跳过）、
+            saved（下载并保存）或 failed（下载失败）
+        """
+        artist_name = artist_context['artist_name']
+        artist_path = artist_context['artist_path']
+        corpus_store = artist_context['corpus_store']
+
+        # 断点续传：检查是否已下载过此歌曲
+        expected_filename = lyrics_filename(i, song_info['title'])
+        if (expected_filename in artist_context['existing_files']
+                or (corpus_store and corpus_store.has(song_info['id']))):
+            self.log_message(f"[{i:04d}/{total_songs:04d}] ⏭️ {song_info['title']} (已存在，跳过)")
+            return 'existing'
+
+        # 下载前过滤：翻译、客串、未发布、纯音乐、现场版等
+        filter_rule = self.song_filter.check(song_info, artist_context['artist_id'])
+        if filter_rule:
+            self.log_message(f"[{i:04d}/{total_songs:04d}] ⏭️ {song_info['title']} "
+                             f"({RULE_LABELS[filter_rule]}，已过滤)")
+            return 'filtered'
+
+        # 全局登记表：其他艺人、任务或之前的运行已下载过这首歌时直接复用，不请求API
+        registered = get_song_registry().lookup(song_info['id'])
+        if registered:
+            if (registered['storage'] == STORAGE_FOLDER
+                    and os.path.dirname(registered['path']) == os.path.abspath(artist_path)):
+                self.log_message(f"[{i:04d}/{total_songs:04d}] ⏭️ {song_info['title']} (已存在，跳过)")
+                return 'existing'
+            if self.reuse_registered_song(registered, song_info, artist_path, i, artist_name):
+                self.log_message(f"[{i:04d}/{total_songs:04d}] 🔗 {song_info['title']} "
+                                 f"(已在 {registered['artist_folder']} 下载过，直接复用)")
+                return 'reused'
+
+        # 负缓存：复查期限内已确认无歌词、未找到或解析失败的歌曲直接跳过
+        outcome_cache = get_outcome_cache()
+        skip_entry = outcome_cache.get_skip_entry(song_info['id'], APIConfig.NEGATIVE_CACHE_TTL_DAYS)
+        if skip_entry:
+            label = OUTCOME_LABELS.get(skip_entry['outcome'], skip_entry['outcome'])
+            self.log_message(f"[{i:04d}/{total_songs:04d}] ⏭️ {song_info['title']} ({label}，跳过)")
+            return 'cached'
+
+        if artist_context.get('artist_index') is not None:
+            artist_progress = (artist_context['artist_index'] + (i / total_songs)) / len(self.artists_queue) * 100
+            self.update_progress(artist_progress)
+        self.update_status(f"处理歌曲: {song_info['title']} ({i}/{total_songs})")
+
+        self.log_message(f"[{i:04d}/{total_songs:04d}] 🎵 {song_info['title']}")
+
+        try:
+            song = self.get_song_lyrics(song_info['id'], song_info['title'], song_info['artist'],
+                                        max_retries=APIConfig.INLINE_SONG_RETRIES, song_url=song_info.get('url'),
+                                        song_info=song_info)
         except Exception as e:
-            self.handle_api_error("处理艺人失败", str(e))
-            self.log_message(f"❌ 处理艺人 '{artist_name}' 时出错: {str(e)}", error=True)
-            return False, 0, 0, 0
+            # 不在艺人循环内等待重试，交给失败队列稍后处理
+            get_dead_letter_queue().push(song_info, artist_name, artist_path, i, total_songs, e)
+            self.log_message(f"    ❌ 获取失败，已加入失败队列: {str(e)}")
+            return 'failed'
+
+        if song and song.lyrics:
+            # 写入成功后才清除负缓存（解析进程池和后台写入都在稍后完成）
+            if self.save_song_lyrics(song, artist_path, i, total_songs, song_info, artist_name,
+                                     on_done=lambda: outcome_cache.clear(song_info['id'])):
+                self.log_message(f"    ✅ 保存成功")
+                return 'saved'
+            self.log_message(f"    ❌ 保存失败")
+        else:
+            if song is not None:
+                # 找到了歌曲但歌词为空（没有找到时各来源已记录原因）
+                outcome_cache.record(song_info['id'], OUTCOME_NO_LYRICS, "歌词为空", song_info['title'], artist_name)
+            self.log_message(f"    ⚠️ 无法获取歌词")
+        return 'failed'
 
     def get_artist_id(self, artist_name_or_id):
         """获取艺术家ID - 优化逻辑：先获取ID，再用ID查询"""
@@ -1290,78 +1809,110 @@ class LyricsDownloaderGUI:
                 self.log_message(f"  直接使用提供的艺人ID: {artist_id}")
                 return artist_id
 
-            # 2️⃣ 否则搜索艺人名，找到ID
-            search_url = "https://api.genius.com/search"
-            headers = {"Authorization": f"Bearer {self.access_token.get()}"}
-            params = {"q": artist_name_or_id}
-
-            response = self.safe_api_request(
-                requests.get, search_url, headers=headers, params=params, timeout=15
-            )
+            # 2️⃣ 查询解析缓存（预解析阶段或之前的运行中已解析过）
+            cache = get_resolution_cache()
+            entry = cache.get(artist_name_or_id)
+            if entry:
+                self.log_message(f"  使用缓存的艺人ID: {entry['matched_name']} (ID: {entry['artist_id']}, "
+                                 f"匹配方式: {entry['match_path']}, 置信度: {entry['confidence']:.1f})")
+                return entry['artist_id']
+
+            # 3️⃣ 否则搜索艺人名，找到ID
+            resolved = self.search_artist_id(artist_name_or_id)
+            if not resolved:
+                self.log_message(f"  未找到艺人 '{artist_name_or_id}'")
+                return None
 
-            data = response.json()
-            hits = data['response']['hits']
-            self.log_message(f"  搜索 '{artist_name_or_id}' 获得 {len(hits)} 个结果")
-
-            # 遍历搜索结果，优先获取最准确的ID
-            for hit in hits:
-                result_type = hit.get('type', '')
-                result = hit.get('result', {})
-
-                # 直接艺人匹配
-                if result_type == 'artist':
-                    found_name = result.get('name', '')
-                    found_id = result.get('id')
-                    if found_name.lower() == artist_name_or_id.lower():
-                        self.log_message(f"  找到精确匹配艺人: {found_name} (ID: {found_id})")
-                        return found_id
-
-                # 通过歌曲匹配艺人
-                elif result_type == 'song':
-                    primary_artist = result.get('primary_artist', {})
-                    if primary_artist:
-                        found_name = primary_artist.get('name', '')
-                        found_id = primary_artist.get('id')
-                        if found_name.lower() == artist_name_or_id.lower():
-                            self.log_message(
-                                f"  通过歌曲 '{result.get('title', '')}' 找到艺人: {found_name} (ID: {found_id})")
-                            return found_id
-
-            # 如果没有完全匹配，则使用第一条搜索结果的艺人ID（近似匹配）
-            if hits:
-                first_hit = hits[0].get('result', {})
-                if 'primary_artist' in first_hit:
-                    artist_id = first_hit['primary_artist']['id']
-                    self.log_message(f"  使用第一条搜索结果的艺人ID: {artist_id}")
-                    return artist_id
-                elif first_hit.get('type') == 'artist':
-                    artist_id = first_hit.get('id')
-                    self.log_message(f"  使用第一条搜索结果的艺人ID: {artist_id}")
-                    return artist_id
-
-            self.log_message(f"  未找到艺人 '{artist_name_or_id}'")
-            return None
+            artist_id, matched_name, match_path, _ = resolved
+            cache.put(artist_name_or_id, artist_id, matched_name, match_path)
+            return artist_id
 
         except Exception as e:
             self.handle_api_error("获取艺术家ID", str(e))
             return None
 
-    def get_all_artist_songs(self, artist_id, artist_name):
-        """获取艺术家的所有歌曲"""
+    def search_artist_id(self, artist_name):
+        """
+        通过 /search 搜索艺人
+
+        Returns:
+            (artist_id, matched_name, match_path, hit_title) 或 None
+        """
+        search_url = f"{APIConfig.API_BASE_URL}/search"
+        headers = {"Authorization": f"Bearer {self.access_token.get()}"}
+        params = {"q": artist_name}
+
+        response = self.safe_api_request(
+            requests.get, search_url, headers=headers, params=params, timeout=15
+        )
+
+        data = response.json()
+        hits = data['response']['hits']
+        self.log_message(f"  搜索 '{artist_name}' 获得 {len(hits)} 个结果")
+
+        resolved = pick_artist_from_hits(artist_name, hits)
+        if resolved:
+            artist_id, matched_name, match_path, hit_title = resolved
+            if hit_title and match_path != MATCH_FIRST_HIT:
+                self.log_message(f"  通过歌曲 '{hit_title}' 找到艺人: {matched_name} (ID: {artist_id})")
+            elif match_path == MATCH_EXACT_ARTIST:
+                self.log_message(f"  找到精确匹配艺人: {matched_name} (ID: {artist_id})")
+            else:
+                self.log_message(f"  使用第一条搜索结果的艺人ID: {artist_id}")
+        return resolved
+
+    def pre_resolve_artists(self, start_index=0):
+        """
+        预解析队列中待处理艺人的ID
+        已有 metadata.json 或使用 id= 前缀的艺人无需搜索，其余在速率限制内并发解析并写入缓存
+        """
+        save_base_path = self.save_directory.get()
+        names = []
+        for artist_data in self.artists_queue[start_index:]:
+            artist_name = artist_data['name']
+            if artist_data.get('status') == '已完成' or artist_name.startswith("id="):
+                continue
+            artist_safe_name = re.sub(r'[<>:"/\\|?*]', '', artist_name)
+            artist_safe_name = artist_safe_name.replace(' ', '_')
+            artist_path = os.path.join(save_base_path, f"{artist_safe_name}_所有歌曲")
+            if os.path.exists(os.path.join(artist_path, 'metadata.json')):
+                continue
+            names.append(artist_name)
+
+        if not names:
+            return
+
+        # 没有全局速率限制器时无法约束并发请求频率，退化为串行
+        max_workers = APIConfig.RESOLVE_WORKERS if RATE_LIMITER_AVAILABLE else 1
+
+        cache = get_resolution_cache()
+        results = cache.resolve_many(names, self.search_artist_id, max_workers=max_workers,
+                                     log_func=self.log_message)
+        resolved = sum(1 for entry in results.values() if entry)
+        self.log_message(f"✅ 艺人ID预解析完成: {resolved}/{len(names)} 个已解析")
+
+    def get_all_artist_songs(self, artist_id, artist_name, sort='title', limit=None):
+        """
+        获取艺术家的所有歌曲
+
+        Args:
+            sort: title（按标题）或 popularity（按热度）
+            limit: 获取到这么多首后停止翻页，None为全部
+        """
         try:
             all_songs = []
             page = 1
-            per_page = 50
+            per_page = min(50, limit) if limit else 50
             duplicates = set()
             max_pages = 50
 
             while page <= max_pages:
-                songs_url = f"https://api.genius.com/artists/{artist_id}/songs"
+                songs_url = f"{APIConfig.API_BASE_URL}/artists/{artist_id}/songs"
                 headers = {"Authorization": f"Bearer {self.access_token.get()}"}
                 params = {
                     "per_page": per_page,
                     "page": page,
-                    "sort": "title"
+                    "sort": sort
                 }
 
                 try:
@@ -1376,12 +1927,12 @@ class LyricsDownloaderGUI:
                         raise e
 
                 remaining = int(response.headers.get('X-RateLimit-Remaining', 999))
-                limit = int(response.headers.get('X-RateLimit-Limit', 1000))
+                rate_limit = int(response.headers.get('X-RateLimit-Limit', 1000))
 
                 # 更保守的API限制处理
                 if remaining < 100:
                     extra_wait = 10  # 增加到10秒
-                    self.log_message(f"⚠️ API限制警告: {remaining}/{limit}，添加{extra_wait}秒额外延迟", warning=True)
+                    self.log_message(f"⚠️ API限制警告: {remaining}/{rate_limit}，添加{extra_wait}秒额外延迟", warning=True)
                     time.sleep(extra_wait)
 
                 data = response.json()
@@ -1396,27 +1947,24 @@ class LyricsDownloaderGUI:
                     if song_title in duplicates:
                         continue
 
-                    song_info = {
-                        'id': song['id'],
-                        'title': song_title,
-                        'url': song['url'],
-                        'artist': song['primary_artist']['name'],
-                        'album': song.get('album', {}).get('name', '单曲') if song.get('album') else '单曲'
-                    }
+                    song_info = self.build_song_info(song)
                     all_songs.append(song_info)
                     duplicates.add(song_title)
                     new_songs += 1
 
                 self.log_message(f"   第{page}页: 获取了 {new_songs} 首歌曲，总计 {len(all_songs)} 首")
 
+                if limit and len(all_songs) >= limit:
+                    return all_songs[:limit]
+
                 next_page = data['response'].get('next_page')
                 if not next_page:
                     break
 
                 page += 1
 
-                # 每页之间的延迟增加到3秒
-                time.sleep(3)
+                # 每页之间的延迟
+                self.request_delay(APIConfig.PAGE_DELAY)
 
             return all_songs
 
@@ -1424,9 +1972,174 @@ class LyricsDownloaderGUI:
             self.handle_api_error("获取歌曲列表", str(e))
             return []
 
-    def get_song_lyrics(self, song_id, song_title, artist_name):
-        """获取单首歌曲的歌词"""
-        max_retries = 3
+    def build_song_info(self, song):
+        """从歌曲列表接口的条目中提取需要保存的字段"""
+        return {
+            'id': song['id'],
+            'title': song['title'],
+            'url': song['url'],
+            'artist': song['primary_artist']['name'],
+            'primary_artist_id': song['primary_artist']['id'],
+            'lyrics_state': song.get('lyrics_state'),
+            'instrumental': song.get('instrumental', False),
+            'album': song.get('album', {}).get('name', '单曲') if song.get('album') else '单曲'
+        }
+
+    def needs_refresh(self, artist_name):
+        """增量更新模式下，判断艺人是否超过刷新周期"""
+        if not self.incremental_update.get():
+            return False
+        return get_crawl_history().is_stale(artist_name, APIConfig.INCREMENTAL_REFRESH_DAYS)
+
+    def get_new_artist_songs(self, artist_id, known_songs, full_scan_name=None):
+        """
+        获取艺人在已知歌曲列表之后新增的歌曲（只按歌曲ID判断是否已知）
+        按发行日期从新到旧分页，某一页的歌曲全部已知后停止翻页。
+        这依赖新歌的发行日期较新：没有发行日期或补录了较早日期的歌曲排在后面，翻页时找不到，
+        因此每隔 APIConfig.INCREMENTAL_FULL_SCAN_DAYS 天改为获取完整列表（传入 full_scan_name）
+
+        Args:
+            full_scan_name: 艺人名称，不为None时获取完整歌曲列表后按ID比对
+        """
+        known_ids = {song['id'] for song in known_songs}
+        if full_scan_name is not None:
+            self.log_message("   距离上次完整获取歌曲列表已较久，本次获取完整列表")
+            return [song for song in self.get_all_artist_songs(artist_id, full_scan_name)
+                    if song['id'] not in known_ids]
+
+        new_songs = []
+        page = 1
+        per_page = 50
+
+        while page <= APIConfig.INCREMENTAL_MAX_PAGES:
+            songs_url = f"{APIConfig.API_BASE_URL}/artists/{artist_id}/songs"
+            headers = {"Authorization": f"Bearer {self.access_token.get()}"}
+            params = {
+                "per_page": per_page,
+                "page": page,
+                "sort": APIConfig.INCREMENTAL_SORT
+            }
+
+            try:
+                response = self.safe_api_request(
+                    requests.get, songs_url, headers=headers, params=params, timeout=15
+                )
+            except Exception as e:
+                self.log_message(f"⚠️ 增量检查第{page}页失败: {str(e)}", warning=True)
+                break
+
+            data = response.json()
+            page_songs = data['response']['songs']
+            if not page_songs:
+                break
+
+            all_known = True
+            for song in page_songs:
+                if song['id'] in known_ids:
+                    continue
+                all_known = False
+                new_songs.append(self.build_song_info(song))
+                known_ids.add(song['id'])
+
+            self.log_message(f"   增量检查第{page}页: 累计新增 {len(new_songs)} 首")
+
+            if all_known or not data['response'].get('next_page'):
+                break
+
+            page += 1
+            self.request_delay(APIConfig.PAGE_DELAY)
+
+        return new_songs
+
+    def retry_dead_letters(self, force=False):
+        """
+        重试失败队列中属于当前保存路径的歌曲
+
+        Args:
+            force: 忽略退避时间和最大重试次数（"重试失败歌曲"入口）
+
+        Returns:
+            (成功保存数, 尝试数)
+        """
+        dead_letters = get_dead_letter_queue()
+        entries = dead_letters.due_entries(self.save_directory.get(), force=force)
+        if not entries:
+            return 0, 0
+
+        self.log_message(f"\n{'=' * 70}")
+        self.log_message(f"🔁 重试失败歌曲: {len(entries)} 首")
+        self.log_message(f"{'=' * 70}")
+
+        saved = 0
+        attempted = 0
+        for n, entry in enumerate(entries, 1):
+            while not self.currently_processing and not self.stop_requested:
+                time.sleep(0.5)
+            if self.stop_requested:
+                break
+
+            attempted += 1
+            self.update_status(f"重试失败歌曲: {entry['title']} ({n}/{len(entries)})")
+            self.log_message(f"[{n:04d}/{len(entries):04d}] 🔁 {entry['artist_name']} - {entry['title']} "
+                             f"(第{entry['attempts'] + 1}次, 上次错误: {entry.get('error_class', '')})")
+
+            try:
+                song = self.get_song_lyrics(entry['song_id'], entry['title'], entry['artist'],
+                                            max_retries=APIConfig.INLINE_SONG_RETRIES)
+            except Exception as e:
+                dead_letters.mark_failed(entry['song_id'], e)
+                self.log_message(f"    ❌ 重试失败: {str(e)}")
+                continue
+
+            if song and song.lyrics:
+                os.makedirs(entry['artist_path'], exist_ok=True)
+                song_info = {'id': entry['song_id'], 'title': entry['title'], 'artist': entry['artist']}
+                # 写入成功后才移出失败队列，解析或写入失败时计入重试次数
+                on_done = lambda song_id=entry['song_id']: (dead_letters.remove(song_id),
+                                                            get_outcome_cache().clear(song_id))
+                on_error = lambda error, song_id=entry['song_id']: dead_letters.mark_failed(song_id, error)
+                if self.save_song_lyrics(song, entry['artist_path'], entry['index'], entry['total'],
+                                         song_info, entry['artist_name'], on_done=on_done, on_error=on_error):
+                    saved += 1
+                    self.log_message(f"    ✅ 保存成功")
+                    self.root.after(0, self._count_retried_song, entry['artist_name'])
+                else:
+                    # 计入重试次数，达到上限后不再自动重试
+                    dead_letters.mark_failed(entry['song_id'], OSError("保存歌词失败"))
+                    self.log_message(f"    ❌ 保存失败")
+            else:
+                # 没有找到歌词或歌词为空，原因记录在负缓存中，不再留在失败队列中
+                if song is not None:
+                    get_outcome_cache().record(entry['song_id'], OUTCOME_NO_LYRICS, "歌词为空", entry['title'],
+                                               entry['artist_name'])
+                dead_letters.remove(entry['song_id'])
+                self.log_message(f"    ⚠️ 无法获取歌词，移出失败队列")
+
+            if n < len(entries) and not self.stop_requested:
+                self.request_delay(APIConfig.SONG_DELAY)
+
+        get_outcome_cache().flush()
+        self.log_message(f"🔁 失败歌曲重试完成: {saved}/{attempted} 首保存成功")
+        return saved, attempted
+
+    def _count_retried_song(self, artist_name):
+        """在UI线程中把重试成功的歌曲计入艺人统计"""
+        for artist_data in self.artists_queue:
+            if artist_data['name'] == artist_name:
+                artist_data['songs_saved'] = artist_data.get('songs_saved', 0) + 1
+                artist_data['songs_failed'] = max(0, artist_data.get('songs_failed', 0) - 1)
+                self.update_queue_display()
+                break
+
+    def process_failed_songs(self):
+        """只处理失败队列（"重试失败歌曲"入口）"""
+        saved, attempted = self.retry_dead_letters(force=True)
+        self.flush_writes()
+        self.currently_processing = False
+        self.root.after(0, self.on_retry_complete, saved, attempted)
+
+    def get_song_lyrics(self, song_id, song_title, artist_name, max_retries=3, song_url=None, song_info=None):
+        """获取单首歌曲的歌词（按 APIConfig.LYRICS_SOURCES 依次尝试各个来源，见 lyrics_sources.py）"""
 
         for attempt in range(max_retries):
             try:
@@ -1442,29 +2155,12 @@ class LyricsDownloaderGUI:
                         del self.resume_points['api_wait_until']
                         del self.resume_points['api_wait_time']
 
-                song = self.genius.search_song(song_title, artist_name)
-
-                if song and song.lyrics:
-                    return song
-                elif song and not song.lyrics:
-                    pass
-
-                song_url = f"https://api.genius.com/songs/{song_id}"
-                headers = {"Authorization": f"Bearer {self.access_token.get()}"}
-
-                response = self.safe_api_request(
-                    requests.get, song_url, headers=headers, timeout=15
-                )
-
-                data = response.json()
-                song_data = data['response']['song']
-                full_title = song_data.get('full_title', '')
-
-                if full_title and full_title != song_title:
-                    song = self.genius.search_song(full_title)
-                    if song:
-                        return song
+                return get_lyrics_sources().fetch(self, song_id, song_title, artist_name, song_url, song_info)
 
+            except MalformedResponseError as e:
+                # 响应结构异常，重试也无法解决
+                get_outcome_cache().record(song_id, OUTCOME_PARSE_ERROR, str(e), song_title, artist_name)
+                self.log_message(f"   解析响应失败: {str(e)}", warning=True)
                 return None
 
             except Exception as e:
@@ -1472,7 +2168,7 @@ class LyricsDownloaderGUI:
                 # 检查是否为429错误
                 if "429" in error_str:
                     self.handle_api_error("获取歌曲歌词", error_str)
-                    return None  # 429错误不重试
+                    raise  # 429错误不重试，交给失败队列
 
                 if attempt < max_retries - 1:
                     wait_time = (attempt + 1) * 5  # 增加到5秒
@@ -1483,41 +2179,369 @@ class LyricsDownloaderGUI:
 
         return None
 
+    def search_song_lyrics(self, song_id, song_title, artist_name):
+        """按标题和艺人搜索歌词，找不到时按完整标题再搜索一次（歌词来源 search）"""
+        song = self.genius.search_song(song_title, artist_name)
+
+        if song and song.lyrics:
+            return song
+
+        song_url = f"{APIConfig.API_BASE_URL}/songs/{song_id}"
+        headers = {"Authorization": f"Bearer {self.access_token.get()}"}
+
+        response = self.safe_api_request(
+            requests.get, song_url, headers=headers, timeout=15
+        )
+
+        try:
+            song_data = response.json()['response']['song']
+            instrumental = song_data.get('instrumental')
+            lyrics_state = song_data.get('lyrics_state')
+            full_title = song_data.get('full_title', '')
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            raise MalformedResponseError(f"/songs/{song_id} {type(e).__name__}: {str(e)}") from e
+
+        # 纯音乐或歌词未发布，记录到负缓存，不再继续搜索（incomplete 的歌曲仍有部分歌词）
+        if instrumental or lyrics_state == 'unreleased':
+            reason = "instrumental" if instrumental else f"lyrics_state={lyrics_state}"
+            get_outcome_cache().record(song_id, OUTCOME_NO_LYRICS, reason, song_title, artist_name)
+            return None
+
+        if full_title and full_title != song_title:
+            song = self.genius.search_song(full_title)
+            if song and song.lyrics:
+                return song
+            if song:
+                get_outcome_cache().record(song_id, OUTCOME_NO_LYRICS, "按完整标题找到的歌曲歌词为空",
+                                           song_title, artist_name)
+                return None
+
+        get_outcome_cache().record(song_id, OUTCOME_NOT_FOUND, "按标题和完整标题均未搜索到歌词",
+                                   song_title, artist_name)
+        return None
+
+    def last_page_size(self):
+        """本线程最近获取的歌词页面大小（字节）"""
+        page = getattr(getattr(self, 'page_capture', None), 'page', None)
+        return len(page[1].encode('utf-8')) if page and page[1] else 0
+
     def clean_lyrics(self, lyrics):
-        """清理歌词"""
-        if not lyrics:
-            return ""
+        """清理歌词（规则见 lyrics_parser.clean_lyrics，离线重新处理时使用同一函数）"""
+        return clean_lyrics(lyrics)
 
-        read_more_pattern = re.compile(r'read more', re.IGNORECASE)
-        match = read_more_pattern.search(lyrics)
+    def save_raw_page(self, song, song_info, save_path, index, total, artist_name):
+        """保存本线程最近获取的歌词页面HTML（确认是这首歌的页面）"""
+        page = getattr(getattr(self, 'page_capture', None), 'page', None)
+        if not page or not page[1] or not (song.url or '').endswith(page[0]):
+            return
+        get_raw_store(self.save_directory.get()).put(song_info, page[1], os.path.basename(save_path), index, total,
+                                                     artist_name, on_error=self._on_write_error)
 
-        if match:
-            return lyrics[match.end():].strip()
-        else:
-            return lyrics
+    def save_song_lyrics(self, song, save_path, index, total, song_info=None, artist_name='', on_done=None,
+                         on_error=None):
+        """
+        保存歌词到文件（合并语料库模式下追加到段文件）；歌词还在解析进程池中时，解析完成后再保存
 
-    def save_song_lyrics(self, song, save_path, index, total):
-        """保存歌词到文件"""
+        Args:
+            on_done: 歌词实际写入后的回调（无参数）
+            on_error: 提交后解析或写入失败的回调，参数为异常（返回False时不调用）
+
+        Returns:
+            是否已提交保存（写入本身在后台完成）
+        """
         try:
-            safe_filename = re.sub(r'[<>:"/\\|?*]', '', song.title)
-            safe_filename = safe_filename.replace(' ', '_')
+            if song_info and self.keep_raw_pages.get():
+                self.save_raw_page(song, song_info, save_path, index, total, artist_name)
 
-            if len(safe_filename) > 100:
-                safe_filename = safe_filename[:100]
+            if isinstance(song.lyrics, PendingLyrics):
+                get_parse_pool().then(song.lyrics.future, lambda future: self._on_lyrics_parsed(
+                    future, song, save_path, index, song_info, artist_name, on_done, on_error))
+                return True
 
-            file_path = os.path.join(save_path, f"{index:04d}_{safe_filename}.txt")
+            return self.store_song_lyrics(song, self.clean_lyrics(song.lyrics), save_path, index, song_info,
+                                          artist_name, on_done, on_error)
 
-            clean_text = self.clean_lyrics(song.lyrics)
+        except Exception as e:
+            self.log_message(f"保存文件时出错: {str(e)}", error=True)
+            return False
 
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(clean_text)
+    def _on_lyrics_parsed(self, future, song, save_path, index, song_info, artist_name, on_done=None,
+                          on_error=None):
+        """解析进程池返回结果后保存歌词（在进程池的管理线程中执行）"""
+        try:
+            clean_text = future.result()
+        except Exception as e:
+            if song_info:
+                get_outcome_cache().record(song_info['id'], OUTCOME_PARSE_ERROR, f"{type(e).__name__}: {str(e)}",
+                                           song.title, artist_name)
+            self.log_message(f"   解析歌词页面失败 ({song.title}): {str(e)}", warning=True)
+            if on_error:
+                on_error(e)
+            return
 
-            return True
+        if not clean_text:
+            if song_info:
+                get_outcome_cache().record(song_info['id'], OUTCOME_NO_LYRICS, "页面中没有歌词", song.title,
+                                           artist_name)
+            self.log_message(f"   ⚠️ {song.title}: 页面中没有歌词，未保存", warning=True)
+            if on_error:
+                on_error(ValueError("页面中没有歌词"))
+            return
 
+        try:
+            self.store_song_lyrics(song, clean_text, save_path, index, song_info, artist_name, on_done, on_error)
         except Exception as e:
             self.log_message(f"保存文件时出错: {str(e)}", error=True)
+            if on_error:
+                on_error(e)
+
+    def store_song_lyrics(self, song, clean_text, save_path, index, song_info=None, artist_name='', on_done=None,
+                          on_error=None):
+        """写入清理后的歌词（on_done / on_error 见 save_song_lyrics）"""
+        if self.output_format.get() == 'corpus' and song_info:
+            record = build_record(song_info, clean_text, os.path.basename(save_path), index, artist_name)
+            get_corpus_store(self.save_directory.get()).append(record, dedup=self.dedup_lyrics.get())
+            self.index_song_lyrics(song_info, record['lyrics'], record['artist_folder'])
+            get_song_registry().register(song_info['id'], STORAGE_CORPUS, self.save_directory.get(),
+                                         record['artist_folder'], song_info.get('title', ''))
+            if on_done:
+                on_done()
+            return True
+
+        safe_filename = re.sub(r'[<>:"/\\|?*]', '', song.title)
+        safe_filename = safe_filename.replace(' ', '_')
+
+        if len(safe_filename) > 100:
+            safe_filename = safe_filename[:100]
+
+        file_path = os.path.join(save_path, f"{index:04d}_{safe_filename}.txt")
+
+        # 交给后台写入线程，写入临时文件后原子重命名；写入成功后再加入搜索索引和全局登记表
+        def written(path):
+            if song_info:
+                self._on_song_written(song_info, clean_text, os.path.basename(save_path), path)
+            if on_done:
+                on_done()
+
+        def failed(path, error):
+            self._on_write_error(path, error)
+            if on_error:
+                on_error(error)
+
+        # 去重时歌词正文存为blob，歌词文件硬链接到blob
+        write_func = get_blob_store(self.save_directory.get()).write_linked if self.dedup_lyrics.get() else None
+        get_lyrics_writer().submit(file_path, clean_text, on_error=failed, on_done=written, write_func=write_func)
+
+        return True
+
+    def _on_song_written(self, song_info, lyrics, artist_folder, path):
+        """歌词文件写入成功后的回调（在后台写入线程中执行）"""
+        self.index_song_lyrics(song_info, lyrics, artist_folder, path)
+        get_song_registry().register(song_info['id'], STORAGE_FOLDER, path, artist_folder, song_info.get('title', ''))
+
+    def reuse_registered_song(self, entry, song_info, artist_path, index, artist_name):
+        """从全局登记表中已保存的副本复用歌词，不发起网络请求"""
+        registry = get_song_registry()
+        try:
+            if self.output_format.get() == 'corpus':
+                lyrics = registry.read_lyrics(entry)
+                if not lyrics:
+                    return False
+                record = build_record(song_info, lyrics, os.path.basename(artist_path), index, artist_name)
+                get_corpus_store(self.save_directory.get()).append(record, dedup=self.dedup_lyrics.get())
+                registry.count_reuse(linked=False)
+                return True
+
+            file_path = os.path.join(artist_path, lyrics_filename(index, song_info['title']))
+            if entry['storage'] == STORAGE_FOLDER:
+                linked = link_or_copy(entry['path'], file_path)
+            else:
+                lyrics = registry.read_lyrics(entry)
+                if not lyrics:
+                    return False
+                atomic_write_text(file_path, lyrics)
+                linked = False
+            registry.count_reuse(linked)
+            return True
+
+        except Exception as e:
+            self.log_message(f"    ⚠️ 复用已保存的歌词失败，将重新下载: {str(e)}", warning=True)
             return False
 
+    def index_song_lyrics(self, song_info, lyrics, artist_folder, path=''):
+        """把一首歌加入保存目录的全文索引，失败不影响下载"""
+        if not (APIConfig.SEARCH_INDEX_ENABLED and FTS5_AVAILABLE):
+            return
+        try:
+            get_search_index(self.save_directory.get()).add(
+                song_info['id'], song_info.get('title'), song_info.get('artist'), song_info.get('album'),
+                lyrics, artist_folder, path)
+        except Exception as e:
+            self.log_message(f"写入搜索索引失败: {str(e)}", warning=True)
+
+    def _on_write_error(self, file_path, error):
+        """后台写入失败的回调"""
+        self.log_message(f"保存文件时出错: {os.path.basename(file_path)}: {str(error)}", error=True)
+
+    def flush_writes(self):
+        """等待后台写入队列清空"""
+        # 先等解析进程池返回结果，解析完成的歌词才会进入写入队列
+        parse_pool = get_parse_pool()
+        parse_pending = parse_pool.get_status()['pending']
+        if parse_pending:
+            self.log_message(f"🧮 等待 {parse_pending} 个歌词页面解析完成...")
+        parse_pool.drain()
+
+        pending = get_lyrics_writer().get_status()['pending']
+        if pending:
+            self.log_message(f"💾 等待 {pending} 个歌词文件写入磁盘...")
+        get_lyrics_writer().flush()
+        flush_corpus_stores()
+        flush_search_indexes()
+        save_blob_stats()
+        self.log_dedup_stats()
+
+        registry_status = get_song_registry().get_status()
+        if registry_status['reused']:
+            self.log_message(f"🔗 跨艺人复用: {registry_status['reused']} 首已下载过的歌曲未再请求API "
+                             f"(硬链接 {registry_status['linked']}，复制 {registry_status['copied']})")
+        self.log_proxy_stats()
+        self.log_latency_stats()
+        self.log_coalesce_stats()
+        self.log_parse_stats()
+        self.log_stream_stats()
+        self.log_source_stats()
+
+        archive = get_http_archive()
+        archive.flush()
+        archive_status = archive.get_status()
+        if archive_status['recorded']:
+            self.log_message(f"📼 已录制 {archive_status['recorded']} 个响应 "
+                             f"({archive_status['bytes_raw'] / 1024 / 1024:.1f} MB → "
+                             f"{archive_status['bytes_stored'] / 1024 / 1024:.1f} MB)")
+        if archive_status['replayed'] or archive_status['missed']:
+            self.log_message(f"📼 从存档回放 {archive_status['replayed']} 个响应，"
+                             f"存档中缺少 {archive_status['missed']} 个")
+
+    def log_proxy_stats(self):
+        """输出各代理出口的请求数和剔除情况"""
+        status = get_proxy_pool().get_status()
+        if not status['enabled']:
+            return
+        for proxy in status['proxies']:
+            state = "可用" if proxy['available'] else f"已剔除（{proxy['ejected_for']} 秒后恢复）"
+            self.log_message(f"🌐 出口 {proxy['proxy']}: 成功 {proxy['successes']}，失败 {proxy['failures']}，"
+                             f"剔除 {proxy['ejections']} 次，{state}")
+
+    def log_parse_stats(self):
+        """输出解析进程池的统计"""
+        status = get_parse_pool().get_status()
+        if not status['submitted']:
+            return
+        self.log_message(f"🧮 解析进程池 ({status['workers']} 个进程): 解析 {status['parsed']} 个页面，"
+                         f"无歌词 {status['no_lyrics']}，失败 {status['errors']}，"
+                         f"传入 {status['bytes_in'] / 1024 / 1024:.1f} MB，返回 {status['bytes_out'] / 1024 / 1024:.1f} MB")
+
+    def log_source_stats(self):
+        """输出各歌词来源的成功率、平均大小和耗时"""
+        for name, stats in get_lyrics_sources().get_status().items():
+            if not stats['attempts']:
+                continue
+            self.log_message(f"📚 歌词来源 {SOURCE_LABELS.get(name, name)}: 成功 {stats['successes']}/{stats['attempts']} "
+                             f"({stats['success_rate'] * 100:.0f}%)，不完整 {stats['incomplete']}，出错 {stats['errors']}，"
+                             f"平均 {stats['avg_bytes'] / 1024:.1f} KB，{stats['avg_ms']:.0f} ms")
+
+    def log_stream_stats(self):
+        """输出流式下载节省的流量"""
+        status = get_stream_stats().get_status()
+        if not status['pages']:
+            return
+        self.log_message(f"📉 流式下载: {status['pages']} 个页面，{status['stopped_early']} 个读完歌词后提前关闭连接，"
+                         f"少下载 {status['bytes_saved'] / 1024 / 1024:.1f} MB"
+                         f"（平均每页 {status['saved_per_page'] / 1024:.0f} KB）")
+
+    def log_latency_stats(self):
+        """输出各端点的延迟分位数和对冲请求统计"""
+        status = get_latency_tracker().get_status()
+        for endpoint, stats in status['endpoints'].items():
+            if stats['p50'] is None:
+                continue
+            self.log_message(f"⏱️ {endpoint}: {stats['requests']} 次，p50 {stats['p50']:.2f}s，"
+                             f"p95 {stats['p95']:.2f}s，p99 {stats['p99']:.2f}s，超时 {stats['timeouts']} 次")
+        if status['hedges']:
+            self.log_message(f"⏱️ 对冲请求: {status['hedges']} 次，其中 {status['hedge_wins']} 次先于原请求返回"
+                             f"（预算不足未发出 {status['hedge_denied']} 次）")
+
+    def log_coalesce_stats(self):
+        """输出合并的相同请求数"""
+        status = get_single_flight().get_status()
+        if status['coalesced']:
+            self.log_message(f"🔀 请求合并: {status['coalesced']} 个相同的API请求共用了正在进行的请求"
+                             f"（实际发出 {status['requests']} 个）")
+
+    def log_filter_stats(self):
+        """输出本次运行各过滤规则跳过的歌曲数和节省的请求数"""
+        summary = self.song_filter.get_summary()
+        if not summary:
+            return
+        total_songs = sum(item[2] for item in summary)
+        total_requests = sum(item[3] for item in summary)
+        self.log_message(f"🧹 下载前过滤: 跳过 {total_songs} 首，约节省 {total_requests} 次请求")
+        for _, label, count, requests_saved in summary:
+            self.log_message(f"   {label}: {count} 首 (约 {requests_saved} 次请求)")
+
+    def log_dedup_stats(self):
+        """输出去重节省的空间"""
+        if not self.dedup_lyrics.get():
+            return
+        save_path = self.save_directory.get()
+        if self.output_format.get() == 'corpus':
+            refs, saved = get_corpus_store(save_path).dedup_stats()
+        else:
+            stats = get_blob_store(save_path).get_status()
+            refs, saved = stats['references'] - stats['blobs'], stats['bytes_saved']
+        if refs > 0:
+            self.log_message(f"🧬 歌词去重: {refs} 首与已有歌词相同，累计节省 {saved / 1024 / 1024:.2f} MB")
+
+    def export_corpus(self):
+        """把当前保存路径下的语料库导出为艺人文件夹结构"""
+        save_path = self.save_directory.get()
+        if not os.path.exists(os.path.join(save_path, CORPUS_DIR_NAME)):
+            messagebox.showwarning("导出", "当前保存路径下没有语料库")
+            return
+
+        output_dir = filedialog.askdirectory(title="选择导出目录", initialdir=save_path)
+        if not output_dir:
+            return
+
+        def run():
+            try:
+                count = export_to_folders(get_corpus_store(save_path), output_dir, log_func=self.log_message)
+                self.log_message(f"✅ 语料库导出完成: {count} 个歌词文件 → {output_dir}")
+            except Exception as e:
+                self.log_message(f"语料库导出失败: {str(e)}", error=True)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def import_corpus(self):
+        """把艺人文件夹结构导入当前保存路径下的语料库"""
+        folder_root = filedialog.askdirectory(title="选择包含艺人文件夹的目录",
+                                              initialdir=self.save_directory.get())
+        if not folder_root:
+            return
+
+        save_path = self.save_directory.get()
+
+        def run():
+            try:
+                imported, skipped = import_from_folders(folder_root, get_corpus_store(save_path),
+                                                        log_func=self.log_message)
+                self.log_message(f"✅ 导入语料库完成: {imported} 首，跳过 {skipped} 个无法匹配歌曲ID的文件")
+            except Exception as e:
+                self.log_message(f"导入语料库失败: {str(e)}", error=True)
+
+        threading.Thread(target=run, daemon=True).start()
+
     def save_resume_points(self):
         """保存断点信息"""
         try:
@@ -1606,6 +2630,7 @@ class LyricsDownloaderGUI:
         """下载完成后的处理"""
         self.start_btn.config(state=tk.NORMAL)
         self.start_selected_btn.config(state=tk.NORMAL)
+        self.retry_failed_btn.config(state=tk.NORMAL)
         self.pause_btn.config(state=tk.DISABLED)
         self.stop_btn.config(state=tk.DISABLED)
         self.resume_btn.config(state=tk.DISABLED)
@@ -1634,10 +2659,23 @@ class LyricsDownloaderGUI:
                 f"保存路径: {self.save_directory.get()}"
             ))
 
+    def on_retry_complete(self, saved, attempted):
+        """失败歌曲重试完成后的处理"""
+        self.start_btn.config(state=tk.NORMAL)
+        self.start_selected_btn.config(state=tk.NORMAL)
+        self.retry_failed_btn.config(state=tk.NORMAL)
+        self.pause_btn.config(state=tk.DISABLED)
+        self.stop_btn.config(state=tk.DISABLED)
+
+        self.status_label.config(text="重试完成" if not self.stop_requested else "重试已停止")
+        remaining = len(get_dead_letter_queue().due_entries(self.save_directory.get(), force=True))
+        self.log_message(f"失败队列剩余: {remaining} 首")
+
     def on_download_stopped(self, processed_artists, total_artists, songs_saved, songs_found, songs_failed):
         """下载停止后的处理"""
         self.start_btn.config(state=tk.NORMAL)
         self.start_selected_btn.config(state=tk.NORMAL)
+        self.retry_failed_btn.config(state=tk.NORMAL)
         self.pause_btn.config(state=tk.DISABLED)
         self.stop_btn.config(state=tk.DISABLED)
         self.resume_btn.config(state=tk.NORMAL)
@@ -1664,6 +2702,44 @@ class LyricsDownloaderGUI:
                 f"点击'断点续传'按钮可以继续下载"
             ))
 
+    def get_option_settings(self):
+        """收集下载选项，随设置一起保存"""
+        return {
+            'incremental_update': self.incremental_update.get(),
+            'deferred_retry': self.deferred_retry.get(),
+            'output_format': self.output_format.get(),
+            'dedup_lyrics': self.dedup_lyrics.get(),
+            'primary_artist_only': self.primary_artist_only.get(),
+            'song_filter_enabled': self.song_filter_enabled.get(),
+            'top_n_mode': self.top_n_mode.get(),
+            'top_n_count': self.get_int_option(self.top_n_count, APIConfig.TOP_N_SONGS),
+            'request_budget': self.get_int_option(self.request_budget, APIConfig.TOP_N_REQUEST_BUDGET),
+            'http_archive_mode': self.http_archive_mode.get(),
+            'keep_raw_pages': self.keep_raw_pages.get()
+        }
+
+    @staticmethod
+    def get_int_option(var, default):
+        """读取数字输入框，内容无效时返回默认值"""
+        try:
+            return int(var.get())
+        except (tk.TclError, ValueError):
+            return default
+
+    def apply_option_settings(self, settings):
+        """从设置中恢复下载选项"""
+        self.incremental_update.set(settings.get('incremental_update', False))
+        self.deferred_retry.set(settings.get('deferred_retry', True))
+        self.output_format.set(settings.get('output_format', 'folder'))
+        self.dedup_lyrics.set(settings.get('dedup_lyrics', True))
+        self.primary_artist_only.set(settings.get('primary_artist_only', False))
+        self.song_filter_enabled.set(settings.get('song_filter_enabled', False))
+        self.top_n_mode.set(settings.get('top_n_mode', False))
+        self.top_n_count.set(settings.get('top_n_count', APIConfig.TOP_N_SONGS))
+        self.request_budget.set(settings.get('request_budget', APIConfig.TOP_N_REQUEST_BUDGET))
+        self.http_archive_mode.set(settings.get('http_archive_mode', MODE_OFF))
+        self.keep_raw_pages.set(settings.get('keep_raw_pages', False))
+
     def save_settings(self):
         """保存设置到当前目录"""
         settings = {
@@ -1671,6 +2747,7 @@ class LyricsDownloaderGUI:
             'save_directory': self.save_directory.get(),
             'artists_queue': self.artists_queue
         }
+        settings.update(self.get_option_settings())
 
         try:
             # 修改为当前目录
@@ -1693,6 +2770,7 @@ class LyricsDownloaderGUI:
 
                 self.access_token.set(settings.get('access_token', ''))
                 self.save_directory.set(settings.get('save_directory', os.path.expanduser("~/Desktop/Genius歌词")))
+                self.apply_option_settings(settings)
 
                 # 加载完整的艺人队列数据
                 queue_data = settings.get('artists_queue', [])
@@ -1739,6 +2817,13 @@ def main():
                 app.currently_processing = False
                 time.sleep(1)
                 app.save_settings()
+                get_parse_pool().drain(timeout=10)
+                get_lyrics_writer().flush(timeout=10)
+                flush_corpus_stores()
+                flush_search_indexes()
+                save_blob_stats()
+                get_http_archive().flush()
+                get_parse_pool().shutdown()
                 root.destroy()
         else:
             app.save_settings()
@@ -326,6 +326,7 @@ class MultiTaskManager:
                 'save_directory': instance.save_directory.get(),
                 'artists_queue': instance.artists_queue
             }
+            settings.update(instance.get_option_settings())
 
             try:
                 settings_path = os.path.join(os.getcwd(),
@@ -349,6 +350,7 @@ class MultiTaskManager:
                     instance.access_token.set(settings.get('access_token', ''))
                     instance.save_directory.set(settings.get('save_directory',
                                                              os.path.expanduser("~/Desktop/Genius歌词")))
+                    instance.apply_option_settings(settings)
 
                     queue_data = settings.get('artists_queue', [])
                     if queue_data and isinstance(queue_data, list):
@@ -652,6 +654,15 @@ class MultiTaskManager:
         # 保存多任务配置
         self.save_tasks()
 
+        # 等待尚未解析完和尚未写入磁盘的歌词
+        Genius_Lyrics_Crawl.get_parse_pool().drain(timeout=10)
+        Genius_Lyrics_Crawl.get_lyrics_writer().flush(timeout=10)
+        Genius_Lyrics_Crawl.flush_corpus_stores()
+        Genius_Lyrics_Crawl.flush_search_indexes()
+        Genius_Lyrics_Crawl.save_blob_stats()
+        Genius_Lyrics_Crawl.get_http_archive().flush()
+        Genius_Lyrics_Crawl.get_parse_pool().shutdown()
+
         self.root.destroy()
 
 
@@ -4,10 +4,15 @@ API配置和限制管理
 
 
 class APIConfig:
+    # API地址（基准测试时指向本地模拟服务器，见 benchmarks/mock_genius_server.py）
+    API_BASE_URL = "https://api.genius.com"
+    WEB_BASE_URL = "https://genius.com"
+
     # API调用配置
     BASE_DELAY = 2  # 基础延迟（秒）
     PAGE_DELAY = 3  # 分页请求延迟
     SONG_DELAY = 2  # 歌曲详情请求延迟
+    SONG_BATCH_DELAY = 5  # 每处理5首歌曲使用的较长延迟
 
     # API限制阈值
     REMAINING_THRESHOLD = 100  # 当剩余调用次数小于此值时增加延迟
@@ -16,8 +21,105 @@ class APIConfig:
     MAX_RETRIES = 3
     RETRY_DELAY_MULTIPLIER = 5  # 重试延迟乘数
 
+    # 增量更新配置
+    INCREMENTAL_REFRESH_DAYS = 30  # 超过此天数未刷新的艺人才会重新检查
+    INCREMENTAL_SORT = 'release_date'  # 增量检查的排序方式（新歌在前）
+    INCREMENTAL_MAX_PAGES = 10  # 增量检查最多翻页数
+    # 按发行日期翻页找不到没有发行日期或后来补录了较早日期的歌曲，超过此天数未完整获取过歌曲列表的艺人改为完整获取后按ID比对
+    INCREMENTAL_FULL_SCAN_DAYS = 180
+
+    # 负缓存复查期限（天），期限内不再重复请求这些歌曲
+    NEGATIVE_CACHE_TTL_DAYS = {
+        'no_lyrics': 30,
+        'not_found': 14,
+        'parse_error': 3,
+    }
+
+    # 失败歌曲队列配置
+    INLINE_SONG_RETRIES = 1  # 艺人循环内获取单首歌曲的尝试次数，失败后交给失败队列
+    DEAD_LETTER_RETRY_BACKOFF = 600  # 第n次失败后至少等待 (n-1) * 此秒数再重试
+    DEAD_LETTER_MAX_ATTEMPTS = 5  # 超过此次数后只在手动"重试失败歌曲"时处理
+    DEAD_LETTER_RETRY_EVERY_ARTISTS = 0  # 每处理多少个艺人执行一次延迟重试，0表示只在队列结束后执行
+
+    # 歌词写入配置
+    WRITE_DURABILITY = 'batch'  # none / batch / full，见 lyrics_writer.py
+    WRITER_QUEUE_SIZE = 256  # 后台写入队列容量，写满时抓取线程等待
+    WRITER_FSYNC_BATCH = 50  # batch 模式下每写入多少个文件同步一次目录
+    TEMP_FILE_MAX_AGE = 600  # 超过此秒数未修改的临时文件视为崩溃遗留，开始处理艺人时删除
+
+    # 合并语料库配置（输出格式选择"合并语料库"时使用）
+    CORPUS_SHARDING = 'artist'  # artist：每个艺人一组段文件；hash：按艺人ID哈希到固定数量的分片
+    CORPUS_SHARD_COUNT = 64  # hash 分片数量
+    CORPUS_SEGMENT_MAX_BYTES = 64 * 1024 * 1024  # 单个段文件大小上限
+    CORPUS_COMPRESSION = 'zstd'  # zstd（需安装 zstandard，否则自动退回不压缩）或 none
+    CORPUS_ZSTD_LEVEL = 9
+
+    # 下载前歌曲过滤（只使用歌曲列表中已有的字段，不额外请求）
+    SONG_FILTER_RULES = ['translation', 'unreleased', 'instrumental', 'live', 'remix', 'snippet', 'skit']
+    SONG_FILTER_TITLE_PATTERNS = {  # 按标题匹配的规则（不区分大小写）
+        'translation': r'(translation|traducci[oó]n|tradu[çc][aã]o|traduction|traduzione|übersetzung|romaniz|перевод)',
+        # 只匹配标题末尾括号中或 " - " 之后的标注，不匹配 "I Live in a Dream" 这样的普通标题
+        'live': r'[(\[]\s*(live|en vivo|ao vivo)\b[^)\]]*[)\]]|\s-\s*(live|en vivo|ao vivo)\b',
+        'remix': r'\b(remix|rmx|remixed)\b',
+        'snippet': r'\bsnippet\b',
+        'skit': r'\bskit\b',
+    }
+    SONG_FILTER_SKIP_LYRICS_STATES = ['unreleased']  # Genius 的 lyrics_state 为这些值时跳过
+
+    # 热门模式（每个艺人只下载按热度排序的前N首，按名次轮流处理所有艺人）
+    TOP_N_SONGS = 20  # 每个艺人的歌曲数
+    TOP_N_REQUEST_BUDGET = 0  # 本次运行的请求预算（估算值），0为不限
+
+    # 大艺人分块（歌曲数超过阈值时切分为多个块并行处理，进度保存在 <艺人文件夹>/chunks.json）
+    CHUNK_SPLIT_THRESHOLD = 500
+    CHUNK_SIZE = 200
+    # 同一艺人并行处理的块数。速率限制器只约束 API 请求（歌曲列表、/songs/:id），搜索、歌词页面和 embed.js
+    # 经 lyricsgenius 的连接直接请求 genius.com，不受限制，调大后这部分请求频率会成倍增加
+    CHUNK_WORKERS = 1
+    CHUNK_SAVE_EVERY = 20  # 每处理多少首歌保存一次 chunks.json（中断后最多重走这么多首，已存在的文件会直接跳过）
+    CHUNK_SAVE_INTERVAL = 30  # 距离上次保存超过此秒数时也保存
+
+    # 代理池配置（代理列表见 proxy_pool_config.json，未配置代理时直连）
+    PROXY_REQUESTS_PER_MINUTE = 20  # 每个出口的请求速率预算
+    PROXY_EJECT_FAILURES = 3  # 连续失败多少次后暂时剔除该出口
+    PROXY_EJECT_SECONDS = 120  # 首次剔除的冷却时间，之后每次加倍
+    PROXY_EJECT_MAX_SECONDS = 1800
+
+    # 自适应超时与对冲请求（按端点统计最近的响应时间，见 latency_tracker.py）
+    LATENCY_WINDOW = 200  # 每个端点保留的样本数
+    LATENCY_MIN_SAMPLES = 20  # 样本少于此数时使用固定超时、不做对冲
+    ADAPTIVE_TIMEOUT_ENABLED = True
+    ADAPTIVE_TIMEOUT_MULTIPLIER = 3  # 超时 = p99 × 此倍数（不超过原来的固定超时）
+    ADAPTIVE_TIMEOUT_MIN = 5  # 超时下限（秒）
+    HEDGE_ENABLED = True
+    HEDGE_PERCENTILE = 95  # 首个请求超过该分位数仍未返回时发出对冲请求
+    HEDGE_BUDGET_RATIO = 0.05  # 对冲请求最多占总请求数的比例
+    HEDGE_BUDGET_BURST = 5  # 额外的初始对冲额度
+    HEDGE_WORKERS = 8
+    REQUEST_COALESCING = True  # 相同的API GET请求正在进行时共用其结果（见 single_flight.py）
+    BULK_WORKERS = 4  # GlobalAPIManager 批量方法（get_songs_bulk 等）同时进行的请求数
+
+    # 歌词页面解析（fast：只扫描歌词容器的快速提取器；bs4：与 lyricsgenius 相同的 BeautifulSoup 解析）
+    LYRICS_PARSER = 'fast'
+    PARSE_WORKERS = 0  # 解析和清理歌词的进程数（见 parse_pool.py），0 在抓取线程中直接解析，-1 使用全部CPU核
+    PARSE_MAX_PENDING = 64  # 等待解析的页面数上限，达到时抓取线程等待
+    LYRICS_STREAMING = False  # 流式下载歌词页面，读完最后一个歌词容器就关闭连接（见 lyrics_stream.py）
+    LYRICS_STREAM_CHUNK = 16 * 1024  # 流式下载每次读取的字节数
+
+    # 歌词来源（按顺序尝试，结果为空或不完整时换下一个，search 总是作为最后的兜底，见 lyrics_sources.py）
+    LYRICS_SOURCES = ['embed', 'page', 'search']
+    LYRICS_SOURCE_MIN_CHARS = 20  # 少于此字数视为不完整
+    LYRICS_INCOMPLETE_MARKERS = ['lyrics for this song have yet to be released', 'this song is an instrumental']
+
+    # 全文搜索索引配置
+    SEARCH_INDEX_ENABLED = True  # 保存歌词时同步写入 <保存路径>/lyrics_index.sqlite
+    SEARCH_INDEX_COMMIT_BATCH = 50  # 每写入多少首提交一次事务
+    SEARCH_REINDEX_WORKERS = 4  # 重建索引时读取文件的进程数
+
     # 并发控制
     MAX_CONCURRENT_REQUESTS = 1  # 最大并发请求数
+    RESOLVE_WORKERS = 4  # 艺人ID预解析并发数（仍受全局速率限制器约束）
+    RESOLVE_CACHE_MIN_CONFIDENCE = 0.5  # 低于此置信度的解析结果（取第一条搜索结果的猜测）不写入缓存文件
 
     @staticmethod
     def get_delay_based_on_remaining(remaining):
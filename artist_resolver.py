@@ -0,0 +1,264 @@
+"""
+艺人名称解析缓存
+将艺人名称 → Genius艺人ID 的解析结果持久化，单任务版与多任务版共享，
+重复运行或任务间重叠的艺人不再发起 /search 请求
+"""
+
+import os
+import re
+import json
+import time
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from api_config import APIConfig
+
+
+# 匹配路径
+MATCH_EXACT_ARTIST = 'exact_artist'  # 搜索结果中的艺人条目名称完全匹配
+MATCH_VIA_SONG = 'via_song'  # 通过歌曲条目的主艺人名称匹配
+MATCH_FIRST_HIT = 'first_hit'  # 无完全匹配，取第一条搜索结果
+
+# 各匹配路径对应的置信度
+MATCH_CONFIDENCE = {
+    MATCH_EXACT_ARTIST: 1.0,
+    MATCH_VIA_SONG: 0.9,
+    MATCH_FIRST_HIT: 0.3,
+}
+
+
+def normalize_artist_name(name):
+    """
+    规范化艺人名称，作为缓存键
+    统一全角/半角（NFKC）、大小写，并折叠多余空白
+    """
+    name = unicodedata.normalize('NFKC', str(name))
+    name = re.sub(r'\s+', ' ', name).strip()
+    return name.casefold()
+
+
+def pick_artist_from_hits(artist_name, hits):
+    """
+    从 /search 返回的结果中挑选艺人
+
+    Returns:
+        (artist_id, matched_name, match_path, hit_title) 或 None
+    """
+    target = normalize_artist_name(artist_name)
+
+    for hit in hits:
+        result_type = hit.get('type', '')
+        result = hit.get('result', {})
+
+        # 直接艺人匹配
+        if result_type == 'artist':
+            found_name = result.get('name', '')
+            if normalize_artist_name(found_name) == target:
+                return result.get('id'), found_name, MATCH_EXACT_ARTIST, None
+
+        # 通过歌曲匹配艺人
+        elif result_type == 'song':
+            primary_artist = result.get('primary_artist', {})
+            if primary_artist:
+                found_name = primary_artist.get('name', '')
+                if normalize_artist_name(found_name) == target:
+                    return primary_artist.get('id'), found_name, MATCH_VIA_SONG, result.get('title', '')
+
+    # 如果没有完全匹配，则使用第一条搜索结果的艺人ID（近似匹配）
+    if hits:
+        first_hit = hits[0].get('result', {})
+        if 'primary_artist' in first_hit:
+            primary_artist = first_hit['primary_artist']
+            return primary_artist['id'], primary_artist.get('name', ''), MATCH_FIRST_HIT, first_hit.get('title', '')
+        elif hits[0].get('type') == 'artist':
+            return first_hit.get('id'), first_hit.get('name', ''), MATCH_FIRST_HIT, None
+
+    return None
+
+
+class ArtistResolutionCache:
+    """
+    艺人ID解析缓存（单例模式）
+    以规范化名称为键，记录艺人ID、匹配路径和置信度
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        """单例模式实现"""
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+                cls._instance._init_cache()
+            return cls._instance
+
+    def _init_cache(self):
+        """初始化缓存"""
+        self.entries = {}
+        # 置信度低于 APIConfig.RESOLVE_CACHE_MIN_CONFIDENCE 的结果（如 first_hit 猜测）只在本次运行中复用，不写入文件
+        self.session_entries = {}
+        self.lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+        self.cache_file = "artist_resolution_cache.json"
+        self.load()
+
+    def load(self):
+        """加载缓存文件"""
+        try:
+            if os.path.exists(self.cache_file):
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                with self.lock:
+                    # 旧版本会保存低置信度的猜测，加载时丢弃，重新搜索
+                    self.entries = {key: entry for key, entry in data.get('entries', {}).items()
+                                    if entry.get('confidence', 0) >= APIConfig.RESOLVE_CACHE_MIN_CONFIDENCE}
+                print(f"[ArtistCache] 从缓存文件加载了 {len(self.entries)} 条艺人解析记录")
+        except Exception as e:
+            print(f"[ArtistCache] 加载缓存失败: {e}")
+
+    def save(self):
+        """保存缓存文件"""
+        try:
+            with self.lock:
+                data = {
+                    'entries': self.entries,
+                    'last_updated': time.strftime("%Y-%m-%d %H:%M:%S")
+                }
+                tmp_path = self.cache_file + '.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_path, self.cache_file)
+        except Exception as e:
+            print(f"[ArtistCache] 保存缓存失败: {e}")
+
+    def get(self, artist_name, min_confidence=0.0):
+        """查询缓存，未命中或置信度不足时返回None"""
+        key = normalize_artist_name(artist_name)
+        with self.lock:
+            entry = self.entries.get(key) or self.session_entries.get(key)
+            if entry and entry.get('confidence', 0) >= min_confidence:
+                self.hits += 1
+                return entry
+            self.misses += 1
+            return None
+
+    def put(self, artist_name, artist_id, matched_name='', match_path=MATCH_FIRST_HIT, persist=True):
+        """写入一条解析结果"""
+        if artist_id is None:
+            return None
+
+        entry = {
+            'artist_id': artist_id,
+            'query': artist_name,
+            'matched_name': matched_name,
+            'match_path': match_path,
+            'confidence': MATCH_CONFIDENCE.get(match_path, 0.0),
+            'resolved_at': time.strftime("%Y-%m-%d %H:%M:%S")
+        }
+
+        key = normalize_artist_name(artist_name)
+        if entry['confidence'] < APIConfig.RESOLVE_CACHE_MIN_CONFIDENCE:
+            with self.lock:
+                self.session_entries[key] = entry
+            return entry
+
+        with self.lock:
+            self.entries[key] = entry
+            self.session_entries.pop(key, None)
+
+        if persist:
+            self.save()
+        return entry
+
+    def invalidate(self, artist_name):
+        """删除一条解析结果（例如发现匹配错误时）"""
+        key = normalize_artist_name(artist_name)
+        with self.lock:
+            removed = self.entries.pop(key, None)
+            guessed = self.session_entries.pop(key, None)
+        if removed:
+            self.save()
+        return removed is not None or guessed is not None
+
+    def resolve_many(self, artist_names, resolve_func, max_workers=4, log_func=None):
+        """
+        并发预解析一批艺人名称，已缓存的名称直接跳过
+
+        Args:
+            artist_names: 艺人名称列表
+            resolve_func: 解析函数，接收名称，返回 pick_artist_from_hits 格式的结果或None
+            max_workers: 并发数，实际请求频率仍由全局速率限制器控制
+            log_func: 可选的日志函数
+
+        Returns:
+            dict: {艺人名称: 缓存条目或None}
+        """
+        results = {}
+        pending = []
+        seen_keys = set()
+
+        for name in artist_names:
+            key = normalize_artist_name(name)
+            entry = self.get(name)
+            if entry:
+                results[name] = entry
+            elif key not in seen_keys:
+                seen_keys.add(key)
+                pending.append(name)
+
+        if not pending:
+            return results
+
+        if log_func:
+            log_func(f"🔍 预解析 {len(pending)} 个艺人ID（缓存命中 {len(results)} 个）")
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            future_to_name = {executor.submit(resolve_func, name): name for name in pending}
+            for future in as_completed(future_to_name):
+                name = future_to_name[future]
+                try:
+                    resolved = future.result()
+                except Exception as e:
+                    if log_func:
+                        log_func(f"  预解析 '{name}' 失败: {e}")
+                    results[name] = None
+                    continue
+
+                if resolved:
+                    artist_id, matched_name, match_path, _ = resolved
+                    results[name] = self.put(name, artist_id, matched_name, match_path, persist=False)
+                else:
+                    results[name] = None
+
+        self.save()
+
+        # 规范化后重复的名称共享同一解析结果
+        for name in artist_names:
+            if name not in results:
+                results[name] = self.get(name)
+        return results
+
+    def get_status(self):
+        """获取缓存状态"""
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+# 全局实例
+_global_resolution_cache = None
+
+
+def get_resolution_cache():
+    """获取全局艺人解析缓存实例"""
+    global _global_resolution_cache
+    if _global_resolution_cache is None:
+        _global_resolution_cache = ArtistResolutionCache()
+    return _global_resolution_cache
@@ -0,0 +1,120 @@
+"""
+语料库读取基准测试
+生成一份模拟语料库，同时导出为"艺人文件夹 + 每首歌一个.txt"结构，
+比较按歌曲ID查找和整库遍历时 CorpusReader 与遍历文件夹的耗时
+
+用法: python benchmarks/corpus_reader_benchmark.py [--artists 200] [--songs 100] [--lookups 1000]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus_store import CorpusStore, build_record, export_to_folders, artist_folder_name  # noqa: E402
+from corpus_reader import CorpusReader  # noqa: E402
+
+
+def build_corpus(root_dir, artists, songs_per_artist, compression):
+    """生成模拟语料库并导出为文件夹结构"""
+    store = CorpusStore(os.path.join(root_dir, 'store'), compression=compression)
+    song_id = 1000
+    for a in range(artists):
+        artist_name = f"Artist {a}"
+        folder = artist_folder_name(artist_name)
+        for i in range(1, songs_per_artist + 1):
+            song_id += random.randint(1, 50)
+            song_info = {'id': song_id, 'title': f"Song {a}-{i}", 'artist': artist_name, 'album': '', 'url': ''}
+            lyrics = '\n'.join(f"line {n} of song {song_id} " * 3 for n in range(40))
+            store.append(build_record(song_info, lyrics, folder, i, artist_name, a))
+    store.close()
+
+    folders_dir = os.path.join(root_dir, 'folders')
+    export_to_folders(store, folders_dir, log_func=lambda msg: None)
+    return os.path.join(root_dir, 'store'), folders_dir
+
+
+def folder_walk_lookup(folders_dir, wanted_ids):
+    """现有下游做法：遍历每个艺人文件夹，读取 metadata.json 找到歌曲对应的文件再打开"""
+    wanted = set(wanted_ids)
+    found = {}
+    for artist_folder in os.listdir(folders_dir):
+        artist_path = os.path.join(folders_dir, artist_folder)
+        with open(os.path.join(artist_path, 'metadata.json'), 'r', encoding='utf-8') as f:
+            songs = json.load(f)['songs']
+        files = {name[:4]: name for name in os.listdir(artist_path) if name.endswith('.txt')}
+        for i, song in enumerate(songs, 1):
+            if song['id'] in wanted and f"{i:04d}" in files:
+                with open(os.path.join(artist_path, files[f"{i:04d}"]), 'r', encoding='utf-8') as f:
+                    found[song['id']] = f.read()
+    return found
+
+
+def folder_walk_all(folders_dir):
+    """遍历文件夹读取全部歌词"""
+    total = 0
+    for artist_folder in os.listdir(folders_dir):
+        artist_path = os.path.join(folders_dir, artist_folder)
+        for name in os.listdir(artist_path):
+            if name.endswith('.txt'):
+                with open(os.path.join(artist_path, name), 'r', encoding='utf-8') as f:
+                    total += len(f.read())
+    return total
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CorpusReader 与遍历文件夹的读取耗时对比")
+    parser.add_argument('--artists', type=int, default=200)
+    parser.add_argument('--songs', type=int, default=100, help="每个艺人的歌曲数")
+    parser.add_argument('--lookups', type=int, default=1000, help="按ID查找的歌曲数")
+    parser.add_argument('--compression', choices=['none', 'zstd'], default='none')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='corpus_bench_')
+    try:
+        print(f"生成语料库: {args.artists} 个艺人 × {args.songs} 首 ...")
+        store_dir, folders_dir = build_corpus(work_dir, args.artists, args.songs, args.compression)
+
+        load_time, reader = timed(CorpusReader, store_dir)
+        wanted = random.sample(list(reader.ids), min(args.lookups, len(reader)))
+
+        walk_time, walk_found = timed(folder_walk_lookup, folders_dir, wanted)
+        lookup_time, _ = timed(lambda: [reader.get(song_id)['lyrics'] for song_id in wanted])
+        assert len(walk_found) == len(wanted)
+
+        walk_all_time, _ = timed(folder_walk_all, folders_dir)
+        raw_all_time, raw_count = timed(lambda: sum(len(view) for _, _, view in reader.iter_raw()))
+        decode_all_time, _ = timed(lambda: sum(len(r['lyrics']) for r in reader.iter_records()))
+
+        artist = reader.artists()[len(reader.artists()) // 2]
+        artist_time, _ = timed(reader.get_artist, artist)
+
+        print(f"\n{'场景':<28}{'耗时(秒)':>12}")
+        print(f"{'加载索引':<28}{load_time:>12.4f}")
+        print(f"{'遍历文件夹查找 %d 首' % len(wanted):<28}{walk_time:>12.4f}")
+        print(f"{'CorpusReader 查找 %d 首' % len(wanted):<28}{lookup_time:>12.4f}")
+        print(f"{'遍历文件夹读取全部':<28}{walk_all_time:>12.4f}")
+        print(f"{'iter_raw 遍历全部(不解码)':<28}{raw_all_time:>12.4f}")
+        print(f"{'iter_records 遍历全部':<28}{decode_all_time:>12.4f}")
+        print(f"{'读取单个艺人 (%d 首)' % reader.count_artist(artist):<28}{artist_time:>12.4f}")
+        print(f"\n查找加速比: {walk_time / max(lookup_time, 1e-9):.1f}x，共 {len(reader)} 首 / {raw_count} 字节")
+
+        reader.close()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
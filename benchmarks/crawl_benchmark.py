@@ -0,0 +1,228 @@
+"""
+端到端下载基准测试
+启动本地模拟 Genius 服务器（mock_genius_server.py），把API地址指向它，用无界面引擎完整下载
+所有模拟艺人，统计 歌曲/秒、每首歌的请求数、p50/p99 延迟和峰值内存，
+结果追加到 benchmarks/results/crawl_benchmark.jsonl，并与同一场景的上一次结果对比
+
+用法:
+    python benchmarks/crawl_benchmark.py                       # 默认场景（不等待延迟，测量代码本身的开销）
+    python benchmarks/crawl_benchmark.py --artists 3 --songs 50 --error-429-rate 0.02 --label 429
+    python benchmarks/crawl_benchmark.py --keep-delays --rpm 30  # 使用真实的请求间隔和速率限制
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCHMARK_DIR)
+
+from mock_genius_server import MockConfig, MockGeniusServer, artist_name  # noqa: E402
+
+RESULTS_FILE = os.path.join(BENCHMARK_DIR, 'results', 'crawl_benchmark.jsonl')
+
+
+def peak_rss_mb():
+    """进程峰值内存（MB），不支持的平台返回None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为KB，macOS 为字节
+    return round(peak / 1024 / (1024 if sys.platform == 'darwin' else 1), 1)
+
+
+def git_revision():
+    """当前代码版本，用于区分不同版本的结果"""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))]
+
+
+def run_crawl(server, args, work_dir):
+    """在临时工作目录中运行下载（缓存和配置文件都写在工作目录，不影响真实数据）"""
+    os.chdir(work_dir)
+
+    from api_config import APIConfig
+    APIConfig.API_BASE_URL = server.url
+    APIConfig.WEB_BASE_URL = server.url
+    APIConfig.LATENCY_WINDOW = 1000000  # 保留全部延迟样本
+    APIConfig.PARSE_WORKERS = args.parse_workers
+    APIConfig.LYRICS_STREAMING = args.stream
+    APIConfig.LYRICS_SOURCES = args.sources.split(',')
+    if not args.keep_delays:
+        APIConfig.BASE_DELAY = APIConfig.PAGE_DELAY = APIConfig.SONG_DELAY = APIConfig.SONG_BATCH_DELAY = 0
+
+    from headless_engine import HeadlessLyricsEngine
+    from Genius_Lyrics_Crawl import RATE_LIMITER_AVAILABLE
+    from latency_tracker import get_latency_tracker
+    from lyrics_stream import get_stream_stats
+    from lyrics_sources import get_lyrics_sources
+    if RATE_LIMITER_AVAILABLE:
+        from rate_limiter import get_rate_limiter
+        limiter = get_rate_limiter()
+        limiter.max_requests_per_minute = args.rpm
+        limiter.min_interval = 60.0 / args.rpm
+
+    log_func = print if args.verbose else (lambda message: None)
+    engine = HeadlessLyricsEngine('benchmark-token', os.path.join(work_dir, 'lyrics'),
+                                  options={'output_format': args.output_format}, log_func=log_func)
+    engine.genius = engine.create_genius_client()
+    if not args.keep_delays:
+        engine.genius.sleep_time = 0
+
+    names = [artist_name(a) for a in range(1, args.artists + 1)]
+    engine.artists_queue = [{'name': name, 'status': '等待中'} for name in names]
+
+    start = time.perf_counter()
+    saved = failed = 0
+    for index, name in enumerate(names):
+        _, _, songs_saved, songs_failed = engine.process_artist(name, index)
+        saved += songs_saved
+        failed += songs_failed
+    engine.flush_writes()
+    elapsed = time.perf_counter() - start
+
+    latencies = []
+    endpoints = {}
+    tracker = get_latency_tracker()
+    for endpoint, stats in tracker.endpoints.items():
+        samples = list(stats.samples)
+        latencies.extend(samples)
+        endpoints[endpoint] = {'requests': stats.requests, 'p50_ms': round(percentile(samples, 50) * 1000, 1),
+                               'p99_ms': round(percentile(samples, 99) * 1000, 1)}
+
+    requests_total = server.total_requests()
+    return {
+        'elapsed_s': round(elapsed, 2),
+        'songs_saved': saved,
+        'songs_failed': failed,
+        'songs_per_s': round(saved / elapsed, 2) if elapsed else None,
+        'requests': requests_total,
+        'requests_per_song': round(requests_total / saved, 2) if saved else None,
+        'requests_by_endpoint': dict(server.counts),
+        'bytes_received_mb': round(server.bytes_sent / 1024 / 1024, 2),
+        'bytes_saved_mb': round(get_stream_stats().get_status()['bytes_saved'] / 1024 / 1024, 2),
+        'latency_p50_ms': round(percentile(latencies, 50) * 1000, 1) if latencies else None,
+        'latency_p99_ms': round(percentile(latencies, 99) * 1000, 1) if latencies else None,
+        'latency_by_endpoint': endpoints,
+        'hedges': tracker.hedges,
+        'lyrics_sources': {name: {key: stats[key] for key in ('attempts', 'successes', 'incomplete', 'errors')}
+                           for name, stats in get_lyrics_sources().get_status().items() if stats['attempts']},
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+
+def load_previous(label):
+    """同一场景的上一次结果"""
+    if not os.path.exists(RESULTS_FILE):
+        return None
+    previous = None
+    with open(RESULTS_FILE, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if entry.get('label') == label:
+                previous = entry
+    return previous
+
+
+def save_result(entry):
+    os.makedirs(os.path.dirname(RESULTS_FILE), exist_ok=True)
+    with open(RESULTS_FILE, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+
+def print_report(entry, previous):
+    metrics = entry['metrics']
+    print(f"\n场景 {entry['label']} @ {entry['revision'] or '未知版本'}")
+    print(f"  歌曲: 保存 {metrics['songs_saved']}，失败 {metrics['songs_failed']}，耗时 {metrics['elapsed_s']}s")
+    print(f"  吞吐量: {metrics['songs_per_s']} 首/秒")
+    print(f"  请求: {metrics['requests']} 次，每首 {metrics['requests_per_song']} 次 {metrics['requests_by_endpoint']}")
+    print(f"  歌词来源: {metrics.get('lyrics_sources')}")
+    print(f"  延迟: p50 {metrics['latency_p50_ms']}ms，p99 {metrics['latency_p99_ms']}ms，对冲 {metrics['hedges']} 次")
+    print(f"  接收数据: {metrics['bytes_received_mb']} MB（流式下载少下载 {metrics.get('bytes_saved_mb', 0)} MB），"
+          f"峰值内存: {metrics['peak_rss_mb']} MB")
+
+    if previous:
+        print(f"\n与上一次结果对比（{previous['timestamp']} @ {previous.get('revision')}）:")
+        for key in ('songs_per_s', 'requests_per_song', 'latency_p50_ms', 'latency_p99_ms', 'peak_rss_mb'):
+            old, new = previous['metrics'].get(key), metrics.get(key)
+            if old and new is not None:
+                print(f"  {key}: {old} → {new} ({(new - old) / old * 100:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="端到端下载基准测试（本地模拟服务器）")
+    parser.add_argument('--label', default='default', help="场景名称，同名场景的结果互相对比")
+    parser.add_argument('--artists', type=int, default=3)
+    parser.add_argument('--songs', type=int, default=60, help="每个艺人的歌曲数")
+    parser.add_argument('--api-latency', type=int, default=30, help="API响应延迟（毫秒）")
+    parser.add_argument('--page-latency', type=int, default=80, help="歌词页面响应延迟（毫秒）")
+    parser.add_argument('--tail-ratio', type=float, default=0.01, help="使用长尾延迟的请求比例")
+    parser.add_argument('--tail-latency', type=int, default=1000, help="长尾延迟（毫秒）")
+    parser.add_argument('--page-size', type=int, default=200, help="歌词页面中歌词以外的HTML大小（KB）")
+    parser.add_argument('--page-tail', type=int, default=0, help="其中位于歌词之后的HTML大小（KB）")
+    parser.add_argument('--stream', action='store_true', help="流式下载歌词页面（APIConfig.LYRICS_STREAMING）")
+    parser.add_argument('--sources', default='embed,page,search', help="歌词来源顺序（APIConfig.LYRICS_SOURCES）")
+    parser.add_argument('--error-429-rate', type=float, default=0.0, help="返回429的请求比例")
+    parser.add_argument('--rpm', type=int, default=100000, help="全局速率限制器的每分钟请求数")
+    parser.add_argument('--output-format', default='folder', choices=['folder', 'corpus'])
+    parser.add_argument('--parse-workers', type=int, default=0, help="解析进程数（APIConfig.PARSE_WORKERS）")
+    parser.add_argument('--keep-delays', action='store_true', help="保留 APIConfig 中的请求间隔")
+    parser.add_argument('--no-save', action='store_true', help="不记录结果")
+    parser.add_argument('--verbose', action='store_true', help="输出下载日志")
+    args = parser.parse_args()
+
+    config = MockConfig(artists=args.artists, songs_per_artist=args.songs, api_latency_ms=args.api_latency,
+                        page_latency_ms=args.page_latency, tail_ratio=args.tail_ratio,
+                        tail_latency_ms=args.tail_latency, page_padding_kb=args.page_size, page_tail_kb=args.page_tail,
+                        error_429_rate=args.error_429_rate)
+    server = MockGeniusServer(config).start()
+    work_dir = tempfile.mkdtemp(prefix='crawl_benchmark_')
+    cwd = os.getcwd()
+    try:
+        metrics = run_crawl(server, args, work_dir)
+    finally:
+        os.chdir(cwd)
+        server.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    entry = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'label': args.label,
+        'config': dict(config.to_dict(), rpm=args.rpm, output_format=args.output_format,
+                       keep_delays=args.keep_delays, parse_workers=args.parse_workers, stream=args.stream,
+                       sources=args.sources),
+        'metrics': metrics
+    }
+    previous = load_previous(args.label)
+    print_report(entry, previous)
+    if not args.no_save:
+        save_result(entry)
+        print(f"\n结果已追加到 {os.path.relpath(RESULTS_FILE, REPO_DIR)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+歌词页面解析基准测试
+用 benchmarks/lyrics_pages/ 中的页面（覆盖注释、实体、排除元素、多个容器、内嵌状态等情况）检查
+lyricsgenius 的 Genius.lyrics、lyrics_parser.parse_lyrics_html 与 extract_lyrics_fast 的结果完全一致
+（包括 clean_lyrics 之后的结果），并统计三者解析每个页面的耗时。
+页面会补上脚本和导航等歌词以外的HTML，接近真实页面的大小（约300KB）
+
+用法:
+    python benchmarks/lyrics_parser_benchmark.py
+    python benchmarks/lyrics_parser_benchmark.py --padding-kb 0 --repeat 50
+    python benchmarks/lyrics_parser_benchmark.py --raw D:/lyrics   # 同时检查下载时保留的原始页面
+"""
+
+import os
+import sys
+import glob
+import time
+import argparse
+import statistics
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+
+from lyricsgenius import Genius  # noqa: E402
+
+from lyrics_parser import parse_lyrics_html, extract_lyrics_fast, clean_lyrics  # noqa: E402
+from raw_store import RawPageStore, read_raw_record  # noqa: E402
+
+PAGES_DIR = os.path.join(BENCHMARK_DIR, 'lyrics_pages')
+
+
+def pad_page(page, padding_kb):
+    """在页面中加入脚本、样式和导航链接，使大小和标签数量接近真实页面"""
+    if padding_kb <= 0:
+        return page
+    script = "<script>window.__APP_CONFIG__ = {\"x\": \"" + "x" * (padding_kb * 512) + "\"};</script>"
+    links = ''.join(f'<div class="Footer__Link-sc-{n}"><a href="/artists/Artist-{n}" rel="noopener">'
+                    f'<span>Artist {n} &amp; Friends</span></a></div>'
+                    for n in range(padding_kb * 512 // 110))
+    page = page.replace('</head>', script + '</head>', 1) if '</head>' in page else script + page
+    return page.replace('</body>', f'<footer>{links}</footer></body>', 1) if '</body>' in page else page + links
+
+
+def load_pages(args):
+    """[(名称, 页面HTML)]"""
+    pages = []
+    for path in sorted(glob.glob(os.path.join(PAGES_DIR, '*.html'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            pages.append((os.path.basename(path), pad_page(f.read(), args.padding_kb)))
+    if args.raw:
+        for path in list(RawPageStore(args.raw).iter_paths())[:args.raw_limit]:
+            record = read_raw_record(path)
+            pages.append((f"{record['artist_folder']}/{record['song_id']}", record['html']))
+    return pages
+
+
+def make_reference(genius, page):
+    """lyricsgenius 原本的解析（替换网络请求，直接返回页面）"""
+    def lyrics(remove_section_headers=False):
+        genius._make_request = lambda *args, **kwargs: {'html': page}
+        return genius.lyrics(song_url='https://genius.com/benchmark', remove_section_headers=remove_section_headers)
+    return lyrics
+
+
+def check_parity(pages):
+    """返回不一致的 (页面, 说明) 列表"""
+    genius = Genius('benchmark-token')
+    mismatches = []
+    for name, page in pages:
+        reference = make_reference(genius, page)
+        for remove_section_headers in (False, True):
+            expected = reference(remove_section_headers)
+            for label, func in (('bs4', parse_lyrics_html), ('fast', extract_lyrics_fast)):
+                result = func(page, remove_section_headers)
+                if result != expected:
+                    mismatches.append((name, f"{label} remove_section_headers={remove_section_headers}: "
+                                             f"期望 {expected!r}，实际 {result!r}"))
+                elif clean_lyrics(result) != clean_lyrics(expected):
+                    mismatches.append((name, f"{label}: clean_lyrics 结果不同"))
+    return mismatches
+
+
+def time_parser(func, pages, repeat):
+    """每个页面的平均解析耗时（毫秒），取多轮中最快的一轮"""
+    rounds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _, page in pages:
+            func(page)
+        rounds.append((time.perf_counter() - start) / len(pages) * 1000)
+    return min(rounds), statistics.median(rounds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="歌词页面解析一致性检查与基准测试")
+    parser.add_argument('--padding-kb', type=int, default=250, help="每个页面补充的歌词以外HTML大小（KB）")
+    parser.add_argument('--repeat', type=int, default=10, help="计时轮数")
+    parser.add_argument('--raw', help="同时使用该保存目录 _raw 中的原始页面")
+    parser.add_argument('--raw-limit', type=int, default=500, help="最多使用多少个原始页面")
+    args = parser.parse_args()
+
+    pages = load_pages(args)
+    if not pages:
+        print("没有找到页面")
+        return 1
+    average_kb = sum(len(page.encode('utf-8')) for _, page in pages) / len(pages) / 1024
+    print(f"{len(pages)} 个页面，平均 {average_kb:.0f} KB")
+
+    mismatches = check_parity(pages)
+    if mismatches:
+        print(f"\n结果不一致 {len(mismatches)} 处:")
+        for name, detail in mismatches:
+            print(f"  {name}: {detail}")
+    else:
+        print("结果一致: lyricsgenius == parse_lyrics_html == extract_lyrics_fast")
+
+    genius = Genius('benchmark-token')
+    parsers = (
+        ('lyricsgenius', lambda page: make_reference(genius, page)()),
+        ('parse_lyrics_html (bs4)', parse_lyrics_html),
+        ('extract_lyrics_fast', extract_lyrics_fast),
+    )
+    print(f"\n每个页面的解析耗时（{args.repeat} 轮）:")
+    baseline = None
+    for label, func in parsers:
+        best, median = time_parser(func, pages, args.repeat)
+        baseline = baseline or best
+        print(f"  {label:<26} 最快 {best:8.3f} ms，中位数 {median:8.3f} ms，{baseline / best:6.1f}x")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,290 @@
+"""
+本地模拟 Genius 服务器
+同时模拟 api.genius.com（/search、/artists/{id}/songs、/songs/{id}）和 genius.com
+（公开搜索接口 /api/search/multi 与歌词页面），响应延迟、歌词页面大小、429 注入比例和
+X-RateLimit-* 响应头均可配置，供 crawl_benchmark.py 在不访问真实API的情况下测量吞吐量
+
+单独运行: python benchmarks/mock_genius_server.py --port 8765 --artists 5 --songs 100
+"""
+
+import re
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class MockConfig:
+    """模拟服务器参数"""
+
+    def __init__(self, artists=5, songs_per_artist=100, per_page=50, api_latency_ms=30, page_latency_ms=80,
+                 tail_ratio=0.01, tail_latency_ms=1000, lyrics_lines=60, page_padding_kb=200, page_tail_kb=0,
+                 error_429_rate=0.0, retry_after=1, rate_limit=1000, seed=1):
+        self.artists = artists
+        self.songs_per_artist = songs_per_artist
+        self.per_page = per_page
+        self.api_latency_ms = api_latency_ms
+        self.page_latency_ms = page_latency_ms
+        self.tail_ratio = tail_ratio  # 有多少比例的请求使用长尾延迟
+        self.tail_latency_ms = tail_latency_ms
+        self.lyrics_lines = lyrics_lines
+        self.page_padding_kb = page_padding_kb  # 歌词页面中歌词以外的HTML（脚本、样式等）大小
+        self.page_tail_kb = page_tail_kb  # 其中位于歌词之后的部分（推荐、评论等）
+        self.error_429_rate = error_429_rate
+        self.retry_after = retry_after
+        self.rate_limit = rate_limit
+        self.seed = seed
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+
+def artist_name(artist_index):
+    return f"Mock Artist {artist_index}"
+
+
+def build_catalog(config):
+    """生成艺人和歌曲数据: (艺人列表, {歌曲ID: 歌曲}, {歌词页面路径: 歌曲ID})"""
+    artists = []
+    songs = {}
+    pages = {}
+    song_id = 1000
+    for a in range(1, config.artists + 1):
+        artist = {'id': a, 'name': artist_name(a), 'url': f"https://genius.com/artists/Mock-artist-{a}"}
+        artist_songs = []
+        for n in range(1, config.songs_per_artist + 1):
+            song_id += 1
+            slug = f"Mock-artist-{a}-song-{n}-lyrics"
+            song = {
+                'id': song_id,
+                'title': f"Song {n}",
+                'full_title': f"Song {n} by {artist['name']}",
+                'url': f"https://genius.com/{slug}",
+                'path': f"/{slug}",
+                'lyrics_state': 'complete',
+                'instrumental': False,
+                'primary_artist': artist,
+                'album': {'name': f"Album {(n - 1) // 12 + 1}"},
+                'stats': {'pageviews': random.Random(song_id).randint(0, 1000000)}
+            }
+            songs[song_id] = song
+            pages[slug] = song_id
+            artist_songs.append(song_id)
+        artists.append(dict(artist, song_ids=artist_songs))
+    return artists, songs, pages
+
+
+class MockGeniusServer:
+    """在后台线程运行的模拟服务器"""
+
+    def __init__(self, config=None, host='127.0.0.1', port=0):
+        self.config = config or MockConfig()
+        self.artists, self.songs, self.pages = build_catalog(self.config)
+        # lyricsgenius 按 "标题 艺人" 搜索
+        self.search_terms = {f"{song['title']} {song['primary_artist']['name']}".lower(): song
+                             for song in self.songs.values()}
+        self.random = random.Random(self.config.seed)
+        self.lock = threading.Lock()
+        self.counts = {}
+        self.bytes_sent = 0
+        self.remaining = self.config.rate_limit
+
+        handler = type('Handler', (MockRequestHandler,), {'server_state': self})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def count(self, endpoint, size):
+        with self.lock:
+            self.counts[endpoint] = self.counts.get(endpoint, 0) + 1
+            self.bytes_sent += size
+            self.remaining = max(0, self.remaining - 1)
+            if self.remaining == 0:
+                self.remaining = self.config.rate_limit
+            return self.remaining
+
+    def total_requests(self):
+        with self.lock:
+            return sum(self.counts.values())
+
+    def pick_latency(self, base_ms):
+        """基础延迟 ±20%，少数请求使用长尾延迟"""
+        with self.lock:
+            if self.random.random() < self.config.tail_ratio:
+                return self.config.tail_latency_ms / 1000.0
+            return base_ms * self.random.uniform(0.8, 1.2) / 1000.0
+
+    def should_429(self):
+        with self.lock:
+            return self.random.random() < self.config.error_429_rate
+
+    # 各端点的响应
+
+    def search(self, query):
+        query = query.lower()
+        hits = [{'type': 'song', 'index': 'song', 'result': self.public_song(self.songs[artist['song_ids'][0]])}
+                for artist in self.artists if artist['name'].lower() in query]
+        return {'hits': hits}
+
+    def search_multi(self, query):
+        song = self.search_terms.get(query.lower().strip())
+        hits = [{'index': 'song', 'type': 'song', 'result': self.public_song(song)}] if song else []
+        return {'sections': [{'type': 'top_hit', 'hits': hits[:1]}, {'type': 'song', 'hits': hits[:5]}]}
+
+    def artist_songs(self, artist_id, page, per_page, sort):
+        artist = self.artists[artist_id - 1] if 0 < artist_id <= len(self.artists) else None
+        if artist is None:
+            return None
+        ids = artist['song_ids']
+        if sort == 'popularity':
+            ids = sorted(ids, key=lambda song_id: -self.songs[song_id]['stats']['pageviews'])
+        elif sort == 'release_date':
+            ids = list(reversed(ids))
+        per_page = min(per_page or self.config.per_page, 50)
+        start = (page - 1) * per_page
+        chunk = ids[start:start + per_page]
+        next_page = page + 1 if start + per_page < len(ids) else None
+        return {'songs': [self.public_song(self.songs[song_id]) for song_id in chunk], 'next_page': next_page}
+
+    @staticmethod
+    def public_song(song):
+        return {key: value for key, value in song.items() if key != 'song_ids'}
+
+    def lyrics_lines(self, song):
+        return [f"[Verse {n // 8 + 1}]" if n % 8 == 0 else f"Line {n} of {song['title']} by "
+                f"{song['primary_artist']['name']}" for n in range(self.config.lyrics_lines)]
+
+    def embed_js(self, song):
+        """歌曲嵌入脚本：document.write 写入包含歌词的HTML"""
+        body = '<br>\n'.join(self.lyrics_lines(song))
+        html = (f"<div class='rg_embed_link'><a href='{song['url']}'>{song['full_title']}</a></div>\n"
+                f"<div class='rg_embed_body'><p>{body}</p></div>\n"
+                f"<div class='rg_embed_footer'>Powered by Genius</div>")
+        literal = json.dumps(html).replace('\\', '\\\\').replace("'", "\\'")
+        return f"(function() {{ var embed = true; }})();\ndocument.write(JSON.parse('{literal}'))\n"
+
+    def lyrics_page(self, song):
+        lines = self.lyrics_lines(song)
+        tail_kb = min(self.config.page_tail_kb, self.config.page_padding_kb)
+        padding = "<script>var x = '" + "x" * ((self.config.page_padding_kb - tail_kb) * 1024) + "';</script>"
+        tail = ''.join(f"<div class=\"SongCard\"><a href=\"/songs/{n}\">Recommended song {n:06d}</a></div>"
+                       for n in range(tail_kb * 1024 // 64))
+        return (f"<html><head><title>{song['full_title']}</title>{padding}</head><body>"
+                f"<div id=\"lyrics-root\"><div class=\"LyricsHeader__Container\">{song['title']} Lyrics</div>"
+                f"<div data-lyrics-container=\"true\">{'<br/>'.join(lines)}</div></div>"
+                f"<div class=\"Recommendations\">{tail}</div></body></html>")
+
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    """把请求分发到 MockGeniusServer"""
+
+    server_state = None
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, endpoint, status, body, content_type='application/json'):
+        data = body.encode('utf-8')
+        remaining = self.server_state.count(endpoint, len(data))
+        self.send_response(status)
+        self.send_header('Content-Type', f"{content_type}; charset=utf-8")
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('X-RateLimit-Limit', str(self.server_state.config.rate_limit))
+        self.send_header('X-RateLimit-Remaining', str(remaining))
+        if status == 429:
+            self.send_header('Retry-After', str(self.server_state.config.retry_after))
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except ConnectionError:
+            # 流式下载的客户端读完歌词后会提前关闭连接
+            pass
+
+    def send_json(self, endpoint, response, status=200):
+        self.send_body(endpoint, status, json.dumps({'meta': {'status': status}, 'response': response}))
+
+    def do_GET(self):
+        state = self.server_state
+        parsed = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        path = parsed.path
+
+        is_page = path.endswith('-lyrics')
+        time.sleep(state.pick_latency(state.config.page_latency_ms if is_page else state.config.api_latency_ms))
+
+        if state.should_429():
+            self.send_json('429', {}, status=429)
+            return
+
+        if path.startswith('/api/'):
+            path = path[4:]
+
+        if path == '/search/multi':
+            self.send_json('search/multi', state.search_multi(params.get('q', '')))
+        elif path == '/search':
+            self.send_json('search', state.search(params.get('q', '')))
+        elif re.fullmatch(r'/artists/\d+/songs', path):
+            result = state.artist_songs(int(path.split('/')[2]), int(params.get('page', 1)),
+                                        int(params.get('per_page', 0) or 0), params.get('sort'))
+            if result is None:
+                self.send_json('artists/songs', {}, status=404)
+            else:
+                self.send_json('artists/songs', result)
+        elif re.fullmatch(r'/songs/\d+/embed\.js', path):
+            song = state.songs.get(int(path.split('/')[2]))
+            if song is None:
+                self.send_body('embed', 404, 'not found', 'text/plain')
+            else:
+                self.send_body('embed', 200, state.embed_js(song), 'application/javascript')
+        elif re.fullmatch(r'/songs/\d+', path):
+            song = state.songs.get(int(path.split('/')[2]))
+            if song is None:
+                self.send_json('songs', {}, status=404)
+            else:
+                self.send_json('songs', {'song': state.public_song(song)})
+        elif is_page and path[1:] in state.pages:
+            self.send_body('lyrics page', 200, state.lyrics_page(state.songs[state.pages[path[1:]]]), 'text/html')
+        else:
+            self.send_body('404', 404, 'not found', 'text/plain')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟 Genius 服务器")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--artists', type=int, default=5)
+    parser.add_argument('--songs', type=int, default=100)
+    parser.add_argument('--api-latency', type=int, default=30, help="API响应延迟（毫秒）")
+    parser.add_argument('--page-latency', type=int, default=80, help="歌词页面响应延迟（毫秒）")
+    parser.add_argument('--error-429-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    config = MockConfig(artists=args.artists, songs_per_artist=args.songs, api_latency_ms=args.api_latency,
+                        page_latency_ms=args.page_latency, error_429_rate=args.error_429_rate)
+    server = MockGeniusServer(config, port=args.port)
+    print(f"模拟服务器运行中: {server.url}（Ctrl+C 退出）")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+大艺人分块进度
+歌曲很多的艺人按固定大小切分为多个块，每个块记录自己的进度和断点（<艺人文件夹>/chunks.json），
+可以由多个工作线程或节点分别处理；歌词文件仍按歌曲在完整列表中的序号命名，结果自然合并到同一文件夹
+"""
+
+import os
+import json
+import time
+import threading
+
+from api_config import APIConfig
+from lyrics_writer import atomic_write_text
+
+
+CHUNKS_FILE_NAME = 'chunks.json'
+
+CHUNK_PENDING = 'pending'
+CHUNK_RUNNING = 'running'
+CHUNK_DONE = 'done'
+
+
+def plan_chunks(total_songs, chunk_size, existing=None):
+    """
+    把 1..total_songs 切分为块，保留已有块的进度；歌曲列表变长（增量更新）时只为新增部分追加块
+
+    Returns:
+        块列表，每块包含 chunk_id、start、end（含头不含尾，序号从1开始）、status、next_index、saved、failed
+    """
+    chunks = list(existing or [])
+    covered = chunks[-1]['end'] if chunks else 1
+    while covered <= total_songs:
+        end = min(covered + chunk_size, total_songs + 1)
+        chunks.append({
+            'chunk_id': len(chunks),
+            'start': covered,
+            'end': end,
+            'status': CHUNK_PENDING,
+            'next_index': covered,
+            'saved': 0,
+            'failed': 0,
+            'worker': None,
+            'updated_at': None
+        })
+        covered = end
+    return chunks
+
+
+class ChunkProgress:
+    """单个艺人文件夹的分块进度，线程安全"""
+
+    def __init__(self, artist_path, total_songs, chunk_size):
+        self.path = os.path.join(artist_path, CHUNKS_FILE_NAME)
+        self.lock = threading.RLock()
+        self.chunk_size = chunk_size
+        self.unsaved = 0  # 上次保存后记录的断点数
+        self.saved_at = 0
+
+        existing = []
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('chunk_size') == chunk_size:
+                    existing = data.get('chunks', [])
+        except Exception as e:
+            print(f"[ChunkProgress] 读取分块进度失败，重新分块: {e}")
+
+        # 上次运行中断时仍在处理的块从断点继续
+        for chunk in existing:
+            if chunk['status'] == CHUNK_RUNNING:
+                chunk['status'] = CHUNK_PENDING
+                chunk['worker'] = None
+
+        self.chunks = plan_chunks(total_songs, chunk_size, existing)
+
+        # 上一轮已全部完成时重新走一遍（已存在的歌曲会被快速跳过），与不分块时的行为一致
+        if self.all_done():
+            for chunk in self.chunks:
+                chunk.update(status=CHUNK_PENDING, next_index=chunk['start'], saved=0, failed=0)
+        self.save()
+
+    def save(self):
+        """保存分块进度"""
+        with self.lock:
+            data = {
+                'chunk_size': self.chunk_size,
+                'chunks': self.chunks,
+                'last_updated': time.strftime("%Y-%m-%d %H:%M:%S")
+            }
+            self.unsaved = 0
+            self.saved_at = time.time()
+            try:
+                atomic_write_text(self.path, json.dumps(data, ensure_ascii=False, indent=2))
+            except Exception as e:
+                print(f"[ChunkProgress] 保存分块进度失败: {e}")
+
+    def claim(self, worker):
+        """领取一个待处理的块，没有时返回None"""
+        with self.lock:
+            for chunk in self.chunks:
+                if chunk['status'] == CHUNK_PENDING:
+                    chunk['status'] = CHUNK_RUNNING
+                    chunk['worker'] = worker
+                    chunk['updated_at'] = time.time()
+                    self.save()
+                    return dict(chunk)
+        return None
+
+    def update(self, chunk_id, next_index, saved, failed):
+        """记录块内断点（下一首待处理歌曲的序号）和累计结果，每 CHUNK_SAVE_EVERY 首或 CHUNK_SAVE_INTERVAL 秒保存一次"""
+        with self.lock:
+            chunk = self.chunks[chunk_id]
+            chunk['next_index'] = next_index
+            chunk['saved'] = saved
+            chunk['failed'] = failed
+            chunk['updated_at'] = time.time()
+            self.unsaved += 1
+            if (self.unsaved >= APIConfig.CHUNK_SAVE_EVERY
+                    or chunk['updated_at'] - self.saved_at >= APIConfig.CHUNK_SAVE_INTERVAL):
+                self.save()
+
+    def finish(self, chunk_id, completed):
+        """块处理结束：完成时标记为done，被停止时放回待处理"""
+        with self.lock:
+            chunk = self.chunks[chunk_id]
+            chunk['status'] = CHUNK_DONE if completed else CHUNK_PENDING
+            chunk['worker'] = None
+            chunk['updated_at'] = time.time()
+            self.save()
+
+    def all_done(self):
+        """所有块是否都已完成"""
+        with self.lock:
+            return all(chunk['status'] == CHUNK_DONE for chunk in self.chunks)
+
+    def totals(self):
+        """合并所有块的结果: (已保存, 失败, 完成块数, 总块数)"""
+        with self.lock:
+            return (sum(chunk['saved'] for chunk in self.chunks),
+                    sum(chunk['failed'] for chunk in self.chunks),
+                    sum(1 for chunk in self.chunks if chunk['status'] == CHUNK_DONE),
+                    len(self.chunks))
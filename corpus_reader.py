@@ -0,0 +1,201 @@
+"""
+合并语料库只读访问
+将段文件内存映射，并把索引压缩为按歌曲ID排序的定长数组，
+按歌曲ID或艺人二分查找；遍历时直接返回映射区域的 memoryview，不复制数据
+"""
+
+import os
+import json
+import mmap
+from array import array
+from bisect import bisect_left
+
+from corpus_store import CORPUS_DIR_NAME, INDEX_FILE_NAME, CODEC_PLAIN, CODEC_ZSTD, decode_record
+
+
+class CorpusReader:
+    """
+    语料库读取器
+
+    索引在内存中的结构（n为歌曲数）:
+        ids / segments / offsets / lengths     按歌曲ID排序的平行数组
+        artist_order                           按 (艺人, 歌曲序号) 排序的位置数组
+        artist_names / artist_starts           艺人名称（排序）及其在 artist_order 中的起点
+    """
+
+    def __init__(self, root_dir):
+        self.root_dir = root_dir
+        self.corpus_dir = os.path.join(root_dir, CORPUS_DIR_NAME)
+        self.segments_dir = os.path.join(self.corpus_dir, 'segments')
+
+        self.segment_names = []  # 段文件编号 → 段文件名
+        self.segment_codecs = []
+        self.maps = {}  # 段文件编号 → mmap
+
+        self.ids = array('q')
+        self.segments = array('I')
+        self.offsets = array('q')
+        self.lengths = array('I')
+
+        self.artist_order = array('I')
+        self.artist_names = []
+        self.artist_starts = array('I')
+
+        self._load_index()
+
+    def _load_index(self):
+        """读取 index.jsonl，构建排序后的紧凑索引"""
+        index_path = os.path.join(self.corpus_dir, INDEX_FILE_NAME)
+        if not os.path.exists(index_path):
+            raise FileNotFoundError(f"找不到语料库索引: {index_path}")
+
+        # 后写的条目覆盖先写的，与 CorpusStore 的加载规则一致
+        latest = {}
+        segment_sizes = {}
+        with open(index_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+
+                segment = entry['segment']
+                if segment not in segment_sizes:
+                    path = os.path.join(self.segments_dir, segment)
+                    segment_sizes[segment] = os.path.getsize(path) if os.path.exists(path) else -1
+                if entry['offset'] + entry['length'] > segment_sizes[segment]:
+                    continue
+
+                latest[int(entry['id'])] = entry
+
+        segment_numbers = {}
+        for segment in sorted({entry['segment'] for entry in latest.values()}):
+            segment_numbers[segment] = len(self.segment_names)
+            self.segment_names.append(segment)
+            self.segment_codecs.append(CODEC_ZSTD if segment.endswith('.zst') else CODEC_PLAIN)
+
+        song_ids = sorted(latest)
+        self.ids = array('q', song_ids)
+        self.segments = array('I', (segment_numbers[latest[i]['segment']] for i in song_ids))
+        self.offsets = array('q', (latest[i]['offset'] for i in song_ids))
+        self.lengths = array('I', (latest[i]['length'] for i in song_ids))
+
+        # 艺人维度：artist_order[artist_starts[k]:artist_starts[k+1]] 为第k个艺人的歌曲位置
+        order = sorted(range(len(song_ids)),
+                       key=lambda pos: (latest[song_ids[pos]]['artist_folder'], latest[song_ids[pos]]['index']))
+        self.artist_order = array('I', order)
+        for position, pos in enumerate(order):
+            artist_folder = latest[song_ids[pos]]['artist_folder']
+            if not self.artist_names or self.artist_names[-1] != artist_folder:
+                self.artist_names.append(artist_folder)
+                self.artist_starts.append(position)
+        self.artist_starts.append(len(order))
+
+    def _map(self, segment_number):
+        """按需映射段文件"""
+        mapped = self.maps.get(segment_number)
+        if mapped is None:
+            path = os.path.join(self.segments_dir, self.segment_names[segment_number])
+            with open(path, 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.maps[segment_number] = mapped
+        return mapped
+
+    def _view(self, pos):
+        """返回第pos条记录在映射区域中的 memoryview（不复制）"""
+        segment_number = self.segments[pos]
+        offset = self.offsets[pos]
+        return memoryview(self._map(segment_number))[offset:offset + self.lengths[pos]]
+
+    def _find(self, song_id):
+        """二分查找歌曲ID的位置，不存在时返回-1"""
+        song_id = int(song_id)
+        pos = bisect_left(self.ids, song_id)
+        if pos < len(self.ids) and self.ids[pos] == song_id:
+            return pos
+        return -1
+
+    def _artist_range(self, artist_folder):
+        """二分查找艺人在 artist_order 中的范围"""
+        k = bisect_left(self.artist_names, artist_folder)
+        if k < len(self.artist_names) and self.artist_names[k] == artist_folder:
+            return self.artist_starts[k], self.artist_starts[k + 1]
+        return 0, 0
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, song_id):
+        return self._find(song_id) >= 0
+
+    def artists(self):
+        """所有艺人文件夹名称（已排序）"""
+        return list(self.artist_names)
+
+    def count_artist(self, artist_folder):
+        """某个艺人的歌曲数"""
+        start, end = self._artist_range(artist_folder)
+        return end - start
+
+    def get_raw(self, song_id):
+        """
+        按歌曲ID返回记录的原始字节（memoryview，未解压），不存在时返回None
+        返回的视图在 close() 之前有效
+        """
+        pos = self._find(song_id)
+        if pos < 0:
+            return None
+        return self._view(pos)
+
+    def get(self, song_id):
+        """按歌曲ID读取并解码记录，不存在时返回None"""
+        pos = self._find(song_id)
+        if pos < 0:
+            return None
+        return self._resolve(decode_record(self._view(pos), self.segment_codecs[self.segments[pos]]))
+
+    def _resolve(self, record):
+        """去重记录从保存了正文的歌曲读取歌词"""
+        if record.get('lyrics_ref_id') and not record.get('lyrics'):
+            owner = self.get(record['lyrics_ref_id'])
+            if owner:
+                record['lyrics'] = owner['lyrics']
+        return record
+
+    def get_artist(self, artist_folder):
+        """读取某个艺人的全部记录（按歌曲序号排序）"""
+        return list(self.iter_records(artist_folder))
+
+    def iter_raw(self, artist_folder=None):
+        """
+        遍历 (歌曲ID, 编码方式, memoryview)，不复制数据（去重记录的原始数据中 lyrics 为空，只有 lyrics_ref_id）
+        指定艺人时按歌曲序号排列；遍历整个语料库时按段文件和偏移排列，顺序读取磁盘
+        """
+        if artist_folder is not None:
+            start, end = self._artist_range(artist_folder)
+            positions = self.artist_order[start:end]
+        else:
+            positions = sorted(range(len(self.ids)), key=lambda pos: (self.segments[pos], self.offsets[pos]))
+
+        for pos in positions:
+            yield self.ids[pos], self.segment_codecs[self.segments[pos]], self._view(pos)
+
+    def iter_records(self, artist_folder=None):
+        """遍历并解码记录"""
+        for _, codec, view in self.iter_raw(artist_folder):
+            yield self._resolve(decode_record(view, codec))
+
+    def close(self):
+        """关闭所有映射（之前返回的 memoryview 需已释放）"""
+        for mapped in self.maps.values():
+            mapped.close()
+        self.maps.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
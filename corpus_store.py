@@ -0,0 +1,446 @@
+"""
+合并语料库存储
+将歌词和歌曲信息追加写入按艺人或哈希分片的段文件（JSONL，可选zstd压缩），
+并维护 歌曲ID → (段文件, 偏移, 长度) 的索引，避免每首歌一个小文件。
+支持与原有"艺人文件夹 + 每首歌一个.txt"结构互相导出/导入
+"""
+
+import os
+import re
+import json
+import time
+import threading
+import zlib
+
+from api_config import APIConfig
+from lyrics_blob_store import lyrics_hash
+
+try:
+    import zstandard
+
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+
+CORPUS_DIR_NAME = '_corpus'
+INDEX_FILE_NAME = 'index.jsonl'
+
+CODEC_PLAIN = 'plain'
+CODEC_ZSTD = 'zstd'
+
+
+# 艺人文件夹后缀：完整歌曲列表、热门模式（前N首，文件编号与完整列表不同）
+ARTIST_FOLDER_SUFFIXES = ('_所有歌曲', '_热门歌曲')
+
+
+def is_artist_folder(name):
+    """是否为下载器创建的艺人文件夹名称"""
+    return name.endswith(ARTIST_FOLDER_SUFFIXES)
+
+
+def artist_folder_name(artist_name):
+    """艺人文件夹名称（与下载器的命名规则一致）"""
+    artist_safe_name = re.sub(r'[<>:"/\\|?*]', '', artist_name)
+    artist_safe_name = artist_safe_name.replace(' ', '_')
+    return f"{artist_safe_name}_所有歌曲"
+
+
+def lyrics_filename(index, title):
+    """歌词文件名（与下载器的命名规则一致）"""
+    safe_filename = re.sub(r'[<>:"/\\|?*]', '', title)
+    safe_filename = safe_filename.replace(' ', '_')
+    if len(safe_filename) > 100:
+        safe_filename = safe_filename[:100]
+    return f"{index:04d}_{safe_filename}.txt"
+
+
+def encode_record(record, codec):
+    """把一条记录编码为段文件中的字节"""
+    data = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+    if codec == CODEC_ZSTD:
+        # 每条记录单独成帧，才能按偏移随机读取
+        return zstandard.ZstdCompressor(level=APIConfig.CORPUS_ZSTD_LEVEL).compress(data)
+    return data
+
+
+def decode_record(data, codec):
+    """把段文件中的字节解码为记录"""
+    if codec == CODEC_ZSTD:
+        data = zstandard.ZstdDecompressor().decompress(bytes(data))
+    return json.loads(bytes(data).decode('utf-8'))
+
+
+class CorpusStore:
+    """
+    单个保存目录下的语料库
+
+    目录结构:
+        _corpus/segments/<分片>-<序号>.jsonl[.zst]   追加写入的段文件
+        _corpus/index.jsonl                           每条记录的位置索引（后写的覆盖先写的）
+    """
+
+    def __init__(self, root_dir, sharding=None, compression=None):
+        self.root_dir = root_dir
+        self.corpus_dir = os.path.join(root_dir, CORPUS_DIR_NAME)
+        self.segments_dir = os.path.join(self.corpus_dir, 'segments')
+        self.index_path = os.path.join(self.corpus_dir, INDEX_FILE_NAME)
+
+        self.sharding = sharding or APIConfig.CORPUS_SHARDING
+        compression = compression or APIConfig.CORPUS_COMPRESSION
+        self.codec = CODEC_ZSTD if compression == 'zstd' and ZSTD_AVAILABLE else CODEC_PLAIN
+
+        self.lock = threading.RLock()
+        self.index = {}  # {歌曲ID(str): 索引条目}
+        self.hash_owners = {}  # {歌词哈希: 保存了正文的歌曲ID}
+        self.open_segments = {}  # {分片: (段文件名, 文件对象)}
+        self.index_file = None
+
+        os.makedirs(self.segments_dir, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        """加载索引，丢弃指向未完整写入数据的条目"""
+        if not os.path.exists(self.index_path):
+            return
+
+        segment_sizes = {}
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # 崩溃时写了一半的索引行
+
+                segment = entry['segment']
+                if segment not in segment_sizes:
+                    path = os.path.join(self.segments_dir, segment)
+                    segment_sizes[segment] = os.path.getsize(path) if os.path.exists(path) else -1
+                if entry['offset'] + entry['length'] > segment_sizes[segment]:
+                    continue
+
+                self.index[str(entry['id'])] = entry
+                # 旧版本的 lyrics_hash 按规范化文本计算，不能作为按原文去重的依据
+                if entry.get('content_hash') and not entry.get('lyrics_ref_id'):
+                    self.hash_owners.setdefault(entry['content_hash'], entry['id'])
+
+    def _shard_for(self, artist_folder, artist_id=None):
+        """计算记录所属的分片"""
+        if self.sharding == 'hash':
+            key = str(artist_id) if artist_id is not None else artist_folder
+            return f"shard-{zlib.crc32(key.encode('utf-8')) % APIConfig.CORPUS_SHARD_COUNT:03d}"
+        return artist_folder
+
+    def _segment_for(self, shard):
+        """获取分片当前可写的段文件，超过大小上限时滚动到新段"""
+        suffix = '.jsonl.zst' if self.codec == CODEC_ZSTD else '.jsonl'
+
+        current = self.open_segments.get(shard)
+        if current:
+            name, f = current
+            if f.tell() < APIConfig.CORPUS_SEGMENT_MAX_BYTES:
+                return name, f
+            f.close()
+            seq = int(name[len(shard) + 1:].split('.')[0]) + 1
+        else:
+            # 续写该分片最后一个段文件
+            pattern = re.compile(re.escape(shard) + r'-(\d{5})' + re.escape(suffix) + '$')
+            seqs = [int(m.group(1)) for m in map(pattern.match, os.listdir(self.segments_dir)) if m]
+            seq = max(seqs) if seqs else 1
+            path = os.path.join(self.segments_dir, f"{shard}-{seq:05d}{suffix}")
+            if os.path.exists(path) and os.path.getsize(path) >= APIConfig.CORPUS_SEGMENT_MAX_BYTES:
+                seq += 1
+
+        name = f"{shard}-{seq:05d}{suffix}"
+        f = open(os.path.join(self.segments_dir, name), 'ab')
+        self.open_segments[shard] = (name, f)
+        return name, f
+
+    def has(self, song_id):
+        """语料库中是否已有这首歌"""
+        with self.lock:
+            return str(song_id) in self.index
+
+    def append(self, record, dedup=False):
+        """
+        追加一条记录
+
+        Args:
+            record: 至少包含 id、artist_folder、index、title、lyrics 的字典
+            dedup: 语料库中已有完全相同的歌词时，只保存对那首歌的引用
+        """
+        with self.lock:
+            saved_bytes = 0
+            digest = None
+            if dedup and record.get('lyrics'):
+                digest = lyrics_hash(record['lyrics'])
+                owner = self.hash_owners.get(digest)
+                if owner is not None and str(owner) != str(record['id']) and str(owner) in self.index:
+                    saved_bytes = len(record['lyrics'].encode('utf-8'))
+                    record = dict(record, lyrics='', lyrics_ref_id=owner)
+
+            shard = self._shard_for(record['artist_folder'], record.get('artist_id'))
+            segment, f = self._segment_for(shard)
+
+            data = encode_record(record, self.codec)
+            offset = f.tell()
+            f.write(data)
+
+            entry = {
+                'id': record['id'],
+                'artist_folder': record['artist_folder'],
+                'artist_name': record.get('artist_name', ''),
+                'index': record.get('index', 0),
+                'segment': segment,
+                'offset': offset,
+                'length': len(data),
+                'codec': self.codec
+            }
+            if digest:
+                entry['content_hash'] = digest
+                if saved_bytes:
+                    entry['lyrics_ref_id'] = record['lyrics_ref_id']
+                    entry['dedup_saved'] = saved_bytes
+                else:
+                    self.hash_owners.setdefault(digest, record['id'])
+            if self.index_file is None:
+                self.index_file = open(self.index_path, 'a', encoding='utf-8')
+            self.index_file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self.index[str(record['id'])] = entry
+            return entry
+
+    def flush(self):
+        """把缓冲区写入磁盘（先段文件后索引，保证索引不会指向不存在的数据）"""
+        with self.lock:
+            for _, f in self.open_segments.values():
+                f.flush()
+            if self.index_file:
+                self.index_file.flush()
+
+    def close(self):
+        """关闭所有打开的文件"""
+        with self.lock:
+            self.flush()
+            for _, f in self.open_segments.values():
+                f.close()
+            self.open_segments.clear()
+            if self.index_file:
+                self.index_file.close()
+                self.index_file = None
+
+    def read_entry(self, entry):
+        """按索引条目读取一条记录"""
+        with self.lock:
+            # 正在写入的段文件可能还有数据留在缓冲区
+            for name, f in self.open_segments.values():
+                if name == entry['segment']:
+                    f.flush()
+        with open(os.path.join(self.segments_dir, entry['segment']), 'rb') as f:
+            f.seek(entry['offset'])
+            data = f.read(entry['length'])
+        record = decode_record(data, entry.get('codec', CODEC_PLAIN))
+
+        # 去重记录从保存了正文的歌曲读取歌词
+        if record.get('lyrics_ref_id') and not record.get('lyrics'):
+            owner = self.get(record['lyrics_ref_id'])
+            if owner:
+                record['lyrics'] = owner['lyrics']
+        return record
+
+    def get(self, song_id):
+        """按歌曲ID读取记录，不存在时返回None"""
+        with self.lock:
+            entry = self.index.get(str(song_id))
+        return self.read_entry(entry) if entry else None
+
+    def entries(self, artist_folder=None):
+        """返回索引条目（可按艺人过滤），按艺人和歌曲序号排序"""
+        with self.lock:
+            entries = [e for e in self.index.values()
+                       if artist_folder is None or e['artist_folder'] == artist_folder]
+        entries.sort(key=lambda e: (e['artist_folder'], e['index']))
+        return entries
+
+    def count_artist(self, artist_folder):
+        """某个艺人已保存的歌曲数"""
+        with self.lock:
+            return sum(1 for e in self.index.values() if e['artist_folder'] == artist_folder)
+
+    def dedup_stats(self):
+        """去重统计: (引用记录数, 节省字节数)"""
+        with self.lock:
+            refs = [e.get('dedup_saved', 0) for e in self.index.values() if e.get('lyrics_ref_id')]
+        return len(refs), sum(refs)
+
+    def iter_records(self, artist_folder=None):
+        """逐条读取记录"""
+        for entry in self.entries(artist_folder):
+            yield self.read_entry(entry)
+
+
+def build_record(song_info, lyrics, artist_folder, index, artist_name='', artist_id=None):
+    """根据歌曲列表中的信息构造语料库记录"""
+    return {
+        'id': song_info['id'],
+        'title': song_info.get('title', ''),
+        'artist': song_info.get('artist', ''),
+        'album': song_info.get('album', ''),
+        'url': song_info.get('url', ''),
+        'artist_name': artist_name,
+        'artist_id': artist_id,
+        'artist_folder': artist_folder,
+        'index': index,
+        'lyrics': lyrics,
+        'saved_at': time.strftime("%Y-%m-%d %H:%M:%S")
+    }
+
+
+def export_to_folders(store, output_dir, log_func=print):
+    """
+    将语料库导出为"艺人文件夹 + 每首歌一个.txt"结构，已存在的文件不覆盖
+
+    Returns:
+        导出的文件数
+    """
+    from lyrics_writer import atomic_write_text
+
+    exported = 0
+    artists = {}
+    for entry in store.entries():
+        artists.setdefault(entry['artist_folder'], []).append(entry)
+
+    for artist_folder, entries in artists.items():
+        artist_path = os.path.join(output_dir, artist_folder)
+        os.makedirs(artist_path, exist_ok=True)
+
+        songs = []
+        for entry in entries:
+            record = store.read_entry(entry)
+            songs.append({k: record.get(k) for k in ('id', 'title', 'url', 'artist', 'album')})
+            file_path = os.path.join(artist_path, lyrics_filename(record['index'], record['title']))
+            if not os.path.exists(file_path):
+                atomic_write_text(file_path, record['lyrics'])
+                exported += 1
+
+        # 文件夹中没有歌曲列表时，根据导出的记录生成（文件编号与列表位置可能不连续）
+        metadata_path = os.path.join(artist_path, 'metadata.json')
+        if not os.path.exists(metadata_path):
+            first = store.read_entry(entries[0])
+            metadata = {
+                'artist_name': first.get('artist_name') or artist_folder,
+                'artist_id': first.get('artist_id'),
+                'songs': songs,
+                'total_songs': len(songs),
+                'last_updated': time.strftime("%Y-%m-%d %H:%M:%S")
+            }
+            atomic_write_text(metadata_path, json.dumps(metadata, ensure_ascii=False, indent=2))
+
+        log_func(f"[Corpus] 导出 {artist_folder}: {len(entries)} 首")
+
+    return exported
+
+
+def import_from_folders(folder_root, store, log_func=print):
+    """
+    将"艺人文件夹 + 每首歌一个.txt"结构导入语料库
+    歌曲ID从文件夹中的 metadata.json 按文件编号查找，找不到ID的文件会被跳过
+
+    Returns:
+        (导入数, 跳过数)
+    """
+    imported = 0
+    skipped = 0
+    filename_pattern = re.compile(r'^(\d{4})_.*\.txt$')
+
+    for artist_folder in sorted(os.listdir(folder_root)):
+        artist_path = os.path.join(folder_root, artist_folder)
+        # 同一首歌同时在完整列表和热门文件夹中时只导入一次（完整列表的文件夹排在前面）
+        if not os.path.isdir(artist_path) or not is_artist_folder(artist_folder):
+            continue
+
+        metadata = {}
+        metadata_path = os.path.join(artist_path, 'metadata.json')
+        if os.path.exists(metadata_path):
+            with open(metadata_path, 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+        songs = metadata.get('songs', [])
+
+        artist_imported = 0
+        for filename in sorted(os.listdir(artist_path)):
+            match = filename_pattern.match(filename)
+            if not match:
+                continue
+
+            index = int(match.group(1))
+            if not (1 <= index <= len(songs)) or lyrics_filename(index, songs[index - 1]['title']) != filename:
+                skipped += 1
+                continue
+
+            song_info = songs[index - 1]
+            if store.has(song_info['id']):
+                continue
+
+            with open(os.path.join(artist_path, filename), 'r', encoding='utf-8') as f:
+                lyrics = f.read()
+
+            store.append(build_record(song_info, lyrics, artist_folder, index,
+                                      metadata.get('artist_name', ''), metadata.get('artist_id')))
+            imported += 1
+            artist_imported += 1
+
+        if artist_imported:
+            log_func(f"[Corpus] 导入 {artist_folder}: {artist_imported} 首")
+
+    store.flush()
+    return imported, skipped
+
+
+# 每个保存目录一个语料库实例
+_corpus_stores = {}
+_corpus_stores_lock = threading.Lock()
+
+
+def get_corpus_store(root_dir):
+    """获取保存目录对应的语料库实例"""
+    key = os.path.normcase(os.path.abspath(root_dir))
+    with _corpus_stores_lock:
+        if key not in _corpus_stores:
+            _corpus_stores[key] = CorpusStore(root_dir)
+        return _corpus_stores[key]
+
+
+def flush_corpus_stores():
+    """刷新所有已打开的语料库"""
+    with _corpus_stores_lock:
+        stores = list(_corpus_stores.values())
+    for store in stores:
+        store.flush()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="语料库与艺人文件夹结构互相转换")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help="语料库 → 艺人文件夹")
+    export_parser.add_argument('save_dir', help="包含 _corpus 的保存目录")
+    export_parser.add_argument('output_dir', help="导出目录")
+
+    import_parser = subparsers.add_parser('import', help="艺人文件夹 → 语料库")
+    import_parser.add_argument('folder_root', help="包含 *_所有歌曲 / *_热门歌曲 文件夹的目录")
+    import_parser.add_argument('save_dir', help="语料库所在的保存目录")
+
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        count = export_to_folders(get_corpus_store(args.save_dir), args.output_dir)
+        print(f"导出完成: {count} 个文件")
+    else:
+        store = get_corpus_store(args.save_dir)
+        imported, skipped = import_from_folders(args.folder_root, store)
+        store.close()
+        print(f"导入完成: {imported} 首，跳过 {skipped} 个无法匹配歌曲ID的文件")
@@ -0,0 +1,127 @@
+"""
+艺人抓取历史
+记录每个艺人最近一次抓取的时间和歌曲数量，供增量更新判断哪些艺人已过期
+"""
+
+import os
+import json
+import time
+import threading
+
+from artist_resolver import normalize_artist_name
+
+
+class CrawlHistory:
+    """
+    艺人抓取历史（单例模式）
+    以规范化艺人名称为键，所有任务共享
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        """单例模式实现"""
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+                cls._instance._init_history()
+            return cls._instance
+
+    def _init_history(self):
+        """初始化抓取历史"""
+        self.artists = {}
+        self.lock = threading.RLock()
+
+        self.history_file = "crawl_history.json"
+        self.load()
+
+    def load(self):
+        """加载历史文件"""
+        try:
+            if os.path.exists(self.history_file):
+                with open(self.history_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                with self.lock:
+                    self.artists = data.get('artists', {})
+        except Exception as e:
+            print(f"[CrawlHistory] 加载抓取历史失败: {e}")
+
+    def save(self):
+        """保存历史文件"""
+        try:
+            with self.lock:
+                data = {
+                    'artists': self.artists,
+                    'last_updated': time.strftime("%Y-%m-%d %H:%M:%S")
+                }
+                tmp_path = self.history_file + '.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_path, self.history_file)
+        except Exception as e:
+            print(f"[CrawlHistory] 保存抓取历史失败: {e}")
+
+    def record(self, artist_name, artist_id, total_songs, new_songs, mode='full', full_scan=None):
+        """
+        记录一次抓取
+
+        Args:
+            full_scan: 本次是否获取了完整的歌曲列表，默认 mode 为 full 时视为完整获取
+        """
+        now = time.time()
+        if full_scan is None:
+            full_scan = mode == 'full'
+        key = normalize_artist_name(artist_name)
+        with self.lock:
+            previous = self.artists.get(key) or {}
+            self.artists[key] = {
+                'artist_name': artist_name,
+                'artist_id': artist_id,
+                'last_crawled': now,
+                'last_crawled_at': time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now)),
+                'total_songs': total_songs,
+                'new_songs': new_songs,
+                'mode': mode,
+                'last_full_scan': now if full_scan else previous.get('last_full_scan', 0)
+            }
+        self.save()
+
+    def get(self, artist_name):
+        """获取艺人的抓取记录"""
+        with self.lock:
+            return self.artists.get(normalize_artist_name(artist_name))
+
+    def is_stale(self, artist_name, max_age_days):
+        """判断艺人是否需要刷新（从未抓取过也视为过期）"""
+        entry = self.get(artist_name)
+        if not entry:
+            return True
+        return time.time() - entry.get('last_crawled', 0) >= max_age_days * 86400
+
+    def needs_full_scan(self, artist_name, max_age_days):
+        """距离上次获取完整歌曲列表是否已超过指定天数（旧记录没有该字段，视为需要）"""
+        entry = self.get(artist_name)
+        if not entry:
+            return True
+        return time.time() - entry.get('last_full_scan', 0) >= max_age_days * 86400
+
+    def stale_artists(self, max_age_days):
+        """返回超过指定天数未刷新的艺人名称，最久未刷新的排在前面"""
+        cutoff = time.time() - max_age_days * 86400
+        with self.lock:
+            stale = [entry for entry in self.artists.values() if entry.get('last_crawled', 0) < cutoff]
+        stale.sort(key=lambda entry: entry.get('last_crawled', 0))
+        return [entry['artist_name'] for entry in stale]
+
+
+# 全局实例
+_global_crawl_history = None
+
+
+def get_crawl_history():
+    """获取全局抓取历史实例"""
+    global _global_crawl_history
+    if _global_crawl_history is None:
+        _global_crawl_history = CrawlHistory()
+    return _global_crawl_history
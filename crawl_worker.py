@@ -0,0 +1,241 @@
+"""
+命令行工作节点
+从共享的协调器（work_coordinator.py）领取艺人或分块任务，用无界面引擎下载，
+处理期间定期心跳续约，完成后汇报结果。每台机器可以使用自己的API密钥和网络出口。
+歌词保存在领取任务的节点的 --save-dir 中，同一艺人的分块可能由不同节点处理，
+所以所有节点的 --save-dir 必须指向同一个共享目录（网络共享盘），否则歌曲会分散在各节点本地
+
+用法:
+    python crawl_worker.py add queue.sqlite artists.txt           # 把艺人加入队列（每行一个）
+    python crawl_worker.py run queue.sqlite --token XXX --save-dir D:/lyrics --worker-id node-1
+    python crawl_worker.py status queue.sqlite
+"""
+
+import os
+import json
+import time
+import socket
+import argparse
+import threading
+
+from api_config import APIConfig
+from song_filters import SongFilter
+from headless_engine import HeadlessLyricsEngine
+from work_coordinator import WorkCoordinator, JOB_ARTIST, DEFAULT_LEASE_SECONDS
+
+
+class DistributedEngine(HeadlessLyricsEngine):
+    """大艺人不在本机分块，而是把分块作为任务交给协调器，由所有节点共同处理"""
+
+    def __init__(self, coordinator, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.coordinator = coordinator
+        self.chunks_dispatched = 0
+
+    def process_artist_chunks(self, songs, artist_context):
+        """把歌曲列表拆成分块任务加入协调器"""
+        self.chunks_dispatched = self.coordinator.add_chunks(
+            artist_context['artist_name'], artist_context['artist_id'], songs, APIConfig.CHUNK_SIZE,
+            os.path.basename(artist_context['artist_path']))
+        self.log_message(f"🧩 歌曲较多，已拆分为 {self.chunks_dispatched} 个分块任务交给所有节点处理")
+        return 0, 0
+
+
+class CrawlWorker:
+    """工作节点主循环"""
+
+    def __init__(self, coordinator, engine, worker_id, exit_when_idle=True, poll_interval=30):
+        self.coordinator = coordinator
+        self.engine = engine
+        self.worker_id = worker_id
+        self.exit_when_idle = exit_when_idle
+        self.poll_interval = poll_interval
+
+        self.progress = None  # 当前任务最新进度，随心跳汇报
+        self.lease_lost = False
+
+    def _heartbeat_loop(self, job, stop_event):
+        """后台续约，租约被其他节点接管时停止当前任务"""
+        interval = max(5, self.coordinator.lease_seconds / 3)
+        while not stop_event.wait(interval):
+            try:
+                if not self.coordinator.heartbeat(job['job_id'], self.worker_id, self.progress):
+                    self.lease_lost = True
+                    self.engine.stop_requested = True
+                    self.engine.log_message(f"租约已失效，停止任务 {job['job_id']}", warning=True)
+                    return
+            except Exception as e:
+                self.engine.log_message(f"心跳失败: {e}", warning=True)
+
+    def run_artist(self, job):
+        """处理一个艺人任务"""
+        artist_name = job['artist_name']
+        self.engine.artists_queue = [{'name': artist_name, 'status': '处理中'}]
+        self.engine.chunks_dispatched = 0
+
+        success, songs_found, songs_saved, songs_failed = self.engine.process_artist(artist_name, 0)
+        if not success:
+            raise RuntimeError(f"处理艺人失败: {artist_name}")
+        return {
+            'songs_found': songs_found,
+            'songs_saved': songs_saved,
+            'songs_failed': songs_failed,
+            'chunks_dispatched': self.engine.chunks_dispatched
+        }
+
+    def run_chunk(self, job):
+        """处理一个分块任务，从上次汇报的断点继续"""
+        payload = job['payload']
+        start = (job['progress'] or {}).get('next_index', payload['start'])
+        end = payload['end']
+
+        artist_path = os.path.join(self.engine.save_directory.get(), payload['artist_folder'])
+        os.makedirs(artist_path, exist_ok=True)
+        existing_files = {f for f in os.listdir(artist_path)
+                          if f.endswith('.txt') and os.path.getsize(os.path.join(artist_path, f)) > 0}
+        corpus_store = None
+        if self.engine.output_format.get() == 'corpus':
+            from corpus_store import get_corpus_store
+            corpus_store = get_corpus_store(self.engine.save_directory.get())
+
+        artist_context = {
+            'artist_name': job['artist_name'],
+            'artist_id': payload['artist_id'],
+            'artist_path': artist_path,
+            'artist_index': None,
+            'existing_files': existing_files,
+            'corpus_store': corpus_store
+        }
+        base = job['progress'] or {'saved': 0, 'failed': 0}
+        self.progress = {'next_index': start, 'saved': base.get('saved', 0), 'failed': base.get('failed', 0)}
+
+        def on_progress(next_index, saved, failed):
+            self.progress = {'next_index': next_index, 'saved': base.get('saved', 0) + saved,
+                             'failed': base.get('failed', 0) + failed}
+
+        self.engine.log_message(f"🧩 {job['artist_name']}: 歌曲 {start}-{end - 1} / {payload['total_songs']}")
+        _, _, next_index = self.engine.process_song_range(
+            payload['songs'], start, end, artist_context, on_progress,
+            first_index=payload['start'], total_songs=payload['total_songs'])
+        return dict(self.progress, completed=next_index >= end)
+
+    def run(self):
+        """领取并处理任务，直到队列为空（或被停止）"""
+        processed = 0
+        self.engine.song_filter = SongFilter(enabled=self.engine.song_filter_enabled.get(),
+                                             primary_artist_only=self.engine.primary_artist_only.get())
+        self.engine.apply_archive_mode()
+        while True:
+            job = self.coordinator.claim(self.worker_id)
+            if not job:
+                if self.exit_when_idle:
+                    break
+                time.sleep(self.poll_interval)
+                continue
+
+            self.engine.log_message(f"📥 领取任务 {job['job_id']} (第 {job['attempts']} 次尝试)")
+            self.progress = job['progress']
+            self.lease_lost = False
+            self.engine.stop_requested = False
+
+            stop_event = threading.Event()
+            heartbeat = threading.Thread(target=self._heartbeat_loop, args=(job, stop_event), daemon=True)
+            heartbeat.start()
+            try:
+                if job['kind'] == JOB_ARTIST:
+                    result = self.run_artist(job)
+                    completed = not self.engine.stop_requested
+                else:
+                    result = self.run_chunk(job)
+                    completed = result['completed']
+
+                self.engine.flush_writes()
+                if self.lease_lost:
+                    continue
+                if completed:
+                    self.coordinator.complete(job['job_id'], self.worker_id, result)
+                    processed += 1
+                    self.engine.log_message(f"✅ 任务完成 {job['job_id']}")
+                else:
+                    self.coordinator.release(job['job_id'], self.worker_id, self.progress)
+                    self.engine.log_message(f"🛑 任务已放回队列 {job['job_id']}")
+                    break
+            except KeyboardInterrupt:
+                self.engine.stop_requested = True
+                self.engine.flush_writes()
+                self.coordinator.release(job['job_id'], self.worker_id, self.progress)
+                self.engine.log_message(f"🛑 已中断，任务放回队列 {job['job_id']}")
+                break
+            except Exception as e:
+                status = self.coordinator.fail(job['job_id'], self.worker_id, e)
+                self.engine.log_message(f"任务出错 {job['job_id']} ({status}): {e}", error=True)
+            finally:
+                stop_event.set()
+
+        if self.engine.deferred_retry.get() and not self.engine.stop_requested:
+            self.engine.retry_dead_letters()
+            self.engine.flush_writes()
+        self.engine.log_filter_stats()
+        return processed
+
+
+def load_artist_names(path):
+    """从文本文件读取艺人名称（每行一个，忽略空行和#开头的行）"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多节点歌词下载工作节点")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    add_parser = subparsers.add_parser('add', help="把艺人加入共享队列")
+    add_parser.add_argument('coordinator', help="协调器 SQLite 文件")
+    add_parser.add_argument('artists_file', help="艺人列表文件，每行一个")
+
+    status_parser = subparsers.add_parser('status', help="查看队列状态")
+    status_parser.add_argument('coordinator', help="协调器 SQLite 文件")
+
+    run_parser = subparsers.add_parser('run', help="领取并处理任务")
+    run_parser.add_argument('coordinator', help="协调器 SQLite 文件")
+    run_parser.add_argument('--token', help="Genius API密钥（默认读取 --settings 中的密钥）")
+    run_parser.add_argument('--save-dir', help="保存目录，所有节点必须使用同一个共享目录（默认读取 --settings 中的目录）")
+    run_parser.add_argument('--settings', help="下载器设置文件（如 lyrics_downloader_task_xxx.json），读取其中的下载选项")
+    run_parser.add_argument('--worker-id', default=f"{socket.gethostname()}-{os.getpid()}", help="节点名称")
+    run_parser.add_argument('--lease', type=int, default=DEFAULT_LEASE_SECONDS, help="租约秒数")
+    run_parser.add_argument('--wait', action='store_true', help="队列为空时继续等待新任务，而不是退出")
+
+    args = parser.parse_args()
+
+    if args.command == 'add':
+        coordinator = WorkCoordinator(args.coordinator)
+        names = load_artist_names(args.artists_file)
+        added = coordinator.add_artists(names)
+        print(f"已加入 {added} 个艺人（{len(names) - added} 个已在队列中）")
+    elif args.command == 'status':
+        print(json.dumps(WorkCoordinator(args.coordinator).get_status(), ensure_ascii=False, indent=2))
+    else:
+        settings = {}
+        if args.settings:
+            with open(args.settings, 'r', encoding='utf-8') as f:
+                settings = json.load(f)
+        token = args.token or settings.get('access_token')
+        save_dir = args.save_dir or settings.get('save_directory')
+        if not token or not save_dir:
+            parser.error("需要提供 --token 和 --save-dir，或包含它们的 --settings 文件")
+        os.makedirs(save_dir, exist_ok=True)
+
+        coordinator = WorkCoordinator(args.coordinator, lease_seconds=args.lease)
+        engine = DistributedEngine(coordinator, token, save_dir, options=settings,
+                                   log_func=lambda message: print(f"[{args.worker_id}] {message}"))
+        success, message = engine.connect()
+        if not success:
+            raise SystemExit(f"API连接失败: {message}")
+
+        worker = CrawlWorker(coordinator, engine, args.worker_id, exit_when_idle=not args.wait)
+        processed = worker.run()
+        print(f"共完成 {processed} 个任务")
+
+
+if __name__ == "__main__":
+    main()
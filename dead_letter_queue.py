@@ -0,0 +1,178 @@
+"""
+失败歌曲死信队列
+获取失败的歌曲不再在艺人循环内反复重试，而是记录到持久化队列，
+由队列结束后的延迟重试或"只重试失败歌曲"入口统一处理
+"""
+
+import os
+import json
+import time
+import threading
+
+from api_config import APIConfig
+
+
+class DeadLetterQueue:
+    """
+    失败歌曲队列（单例模式）
+    以歌曲ID为键，记录保存位置、错误类型和重试次数
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        """单例模式实现"""
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+                cls._instance._init_queue()
+            return cls._instance
+
+    def _init_queue(self):
+        """初始化队列"""
+        self.entries = {}
+        self.lock = threading.RLock()
+
+        # 重试退避：首次失败可在本轮延迟重试中立即重试，第n次失败后等待 (n-1) * retry_backoff 秒
+        self.retry_backoff = APIConfig.DEAD_LETTER_RETRY_BACKOFF
+        self.max_attempts = APIConfig.DEAD_LETTER_MAX_ATTEMPTS
+
+        self.queue_file = "dead_letter_queue.json"
+        self.load()
+
+    def load(self):
+        """加载队列文件"""
+        try:
+            if os.path.exists(self.queue_file):
+                with open(self.queue_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                with self.lock:
+                    self.entries = data.get('entries', {})
+                if self.entries:
+                    print(f"[DeadLetter] 加载了 {len(self.entries)} 首待重试的失败歌曲")
+        except Exception as e:
+            print(f"[DeadLetter] 加载失败队列失败: {e}")
+
+    def save(self):
+        """保存队列文件"""
+        try:
+            with self.lock:
+                data = {
+                    'entries': self.entries,
+                    'last_updated': time.strftime("%Y-%m-%d %H:%M:%S")
+                }
+                tmp_path = self.queue_file + '.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_path, self.queue_file)
+        except Exception as e:
+            print(f"[DeadLetter] 保存失败队列失败: {e}")
+
+    @staticmethod
+    def classify_error(error):
+        """返回错误类型名称，速率限制单独归类"""
+        if "429" in str(error):
+            return 'RateLimited'
+        return type(error).__name__
+
+    def push(self, song_info, artist_name, artist_path, index, total, error):
+        """加入一首失败歌曲，已存在时累加失败次数"""
+        song_key = str(song_info['id'])
+        now = time.time()
+
+        with self.lock:
+            entry = self.entries.get(song_key)
+            if entry is None:
+                entry = {
+                    'song_id': song_info['id'],
+                    'title': song_info['title'],
+                    'artist': song_info['artist'],
+                    'artist_name': artist_name,
+                    'artist_path': artist_path,
+                    'index': index,
+                    'total': total,
+                    'attempts': 0,
+                    'first_failed_at': now
+                }
+                self.entries[song_key] = entry
+
+            entry['attempts'] += 1
+            entry['error_class'] = self.classify_error(error)
+            entry['error'] = str(error)[:500]
+            entry['last_failed_at'] = now
+            entry['next_retry_at'] = now + (entry['attempts'] - 1) * self.retry_backoff
+
+        self.save()
+        return entry
+
+    def mark_failed(self, song_id, error):
+        """重试再次失败"""
+        with self.lock:
+            entry = self.entries.get(str(song_id))
+            if entry is None:
+                return None
+            now = time.time()
+            entry['attempts'] += 1
+            entry['error_class'] = self.classify_error(error)
+            entry['error'] = str(error)[:500]
+            entry['last_failed_at'] = now
+            entry['next_retry_at'] = now + (entry['attempts'] - 1) * self.retry_backoff
+        self.save()
+        return entry
+
+    def remove(self, song_id):
+        """重试成功或已确认无需重试时移除"""
+        with self.lock:
+            removed = self.entries.pop(str(song_id), None)
+        if removed is not None:
+            self.save()
+        return removed
+
+    def due_entries(self, path_prefix=None, force=False):
+        """
+        返回可以重试的歌曲
+
+        Args:
+            path_prefix: 只返回保存路径在此目录下的歌曲（每个任务只处理自己的失败歌曲）
+            force: 忽略退避时间和最大重试次数
+        """
+        now = time.time()
+        # 末尾加上分隔符，避免 /x/lyrics 匹配到 /x/lyrics2 下的歌曲
+        prefix = os.path.join(os.path.normcase(os.path.abspath(path_prefix)), '') if path_prefix else None
+
+        with self.lock:
+            due = []
+            for entry in self.entries.values():
+                if prefix and not os.path.join(os.path.normcase(os.path.abspath(entry['artist_path'])), '').startswith(prefix):
+                    continue
+                if not force:
+                    if entry['attempts'] >= self.max_attempts or entry.get('next_retry_at', 0) > now:
+                        continue
+                due.append(dict(entry))
+
+        due.sort(key=lambda e: (e['artist_path'], e['index']))
+        return due
+
+    def get_status(self):
+        """获取队列状态"""
+        with self.lock:
+            by_class = {}
+            for entry in self.entries.values():
+                by_class[entry.get('error_class', '')] = by_class.get(entry.get('error_class', ''), 0) + 1
+            return {
+                'entries': len(self.entries),
+                'by_error_class': by_class
+            }
+
+
+# 全局实例
+_global_dead_letter_queue = None
+
+
+def get_dead_letter_queue():
+    """获取全局失败歌曲队列实例"""
+    global _global_dead_letter_queue
+    if _global_dead_letter_queue is None:
+        _global_dead_letter_queue = DeadLetterQueue()
+    return _global_dead_letter_queue
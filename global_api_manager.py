@@ -7,7 +7,13 @@ import os
 import sys
 import time
 import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+
+import requests
+
+from api_config import APIConfig
 from rate_limiter import get_rate_limiter, make_api_request
+from single_flight import get_single_flight
 
 
 class GlobalAPIManager:
@@ -33,6 +39,8 @@ class GlobalAPIManager:
             'last_request_time': 0
         }
         self.stats_lock = threading.Lock()
+        # 批量请求共用的线程池，实际请求频率仍由速率限制器控制
+        self.executor = ThreadPoolExecutor(max_workers=APIConfig.BULK_WORKERS, thread_name_prefix='bulk')
 
         print("[APIManager] 全局API管理器初始化完成")
 
@@ -40,16 +48,25 @@ class GlobalAPIManager:
         """添加API密钥到全局池"""
         return self.rate_limiter.add_api_key(api_key)
 
-    def search_artist(self, artist_name, api_key=None):
-        """搜索艺术家（通过Genius API）"""
+    def _get(self, path, params=None, api_key=None):
+        """
+        发送一个 GET 请求：选择密钥、计时、更新统计，密钥相关的失败时标记密钥
+
+        Args:
+            path: API路径，如 /songs/123
+            params: 查询参数
+            api_key: 指定的API密钥，None 时从全局池轮换选择
+
+        Returns:
+            响应的JSON
+        """
         if not api_key:
             api_key = self.rate_limiter.get_next_api_key()
             if not api_key:
                 raise Exception("没有可用的API密钥")
 
-        url = "https://api.genius.com/search"
+        url = f"{APIConfig.API_BASE_URL}{path}"
         headers = {"Authorization": f"Bearer {api_key}"}
-        params = {"q": artist_name}
 
         try:
             start_time = time.time()
@@ -69,80 +86,102 @@ class GlobalAPIManager:
             with self.stats_lock:
                 self.stats['failed_requests'] += 1
 
-            # 如果提供了特定密钥，标记失败
-            if api_key:
+            # 404 等客户端错误与密钥无关（如ID不存在），只有 401/403/429、服务器错误和网络错误才标记密钥
+            status_code = getattr(getattr(e, 'response', None), 'status_code', None)
+            if status_code is None or not 400 <= status_code < 500 or status_code in (401, 403, 429):
                 self.rate_limiter.mark_key_failure(api_key)
-
             raise
 
+    def search_artist(self, artist_name, api_key=None):
+        """搜索艺术家（通过Genius API）"""
+        return self._get("/search", {"q": artist_name}, api_key)
+
     def get_artist_songs(self, artist_id, api_key=None, page=1, per_page=50):
         """获取艺术家的歌曲列表"""
-        if not api_key:
-            api_key = self.rate_limiter.get_next_api_key()
-            if not api_key:
-                raise Exception("没有可用的API密钥")
-
-        url = f"https://api.genius.com/artists/{artist_id}/songs"
-        headers = {"Authorization": f"Bearer {api_key}"}
         params = {
             "per_page": per_page,
             "page": page,
             "sort": "title"
         }
-
-        try:
-            start_time = time.time()
-            response = make_api_request(
-                requests.get, url, headers=headers, params=params, timeout=15
-            )
-            elapsed = time.time() - start_time
-
-            with self.stats_lock:
-                self.stats['successful_requests'] += 1
-                self.stats['total_wait_time'] += elapsed
-
-            return response.json()
-
-        except Exception as e:
-            with self.stats_lock:
-                self.stats['failed_requests'] += 1
-
-            if api_key:
-                self.rate_limiter.mark_key_failure(api_key)
-
-            raise
+        return self._get(f"/artists/{artist_id}/songs", params, api_key)
 
     def get_song_details(self, song_id, api_key=None):
         """获取歌曲详情"""
-        if not api_key:
-            api_key = self.rate_limiter.get_next_api_key()
-            if not api_key:
-                raise Exception("没有可用的API密钥")
-
-        url = f"https://api.genius.com/songs/{song_id}"
-        headers = {"Authorization": f"Bearer {api_key}"}
-
-        try:
-            start_time = time.time()
-            response = make_api_request(
-                requests.get, url, headers=headers, timeout=15
-            )
-            elapsed = time.time() - start_time
-
-            with self.stats_lock:
-                self.stats['successful_requests'] += 1
-                self.stats['total_wait_time'] += elapsed
-
-            return response.json()
-
-        except Exception as e:
-            with self.stats_lock:
-                self.stats['failed_requests'] += 1
-
-            if api_key:
-                self.rate_limiter.mark_key_failure(api_key)
-
-            raise
+        return self._get(f"/songs/{song_id}", api_key=api_key)
+
+    def _submit_all(self, func, items):
+        """为每一项提交一个请求，返回按完成顺序产出 (项, 结果, 异常) 的迭代器"""
+        futures = {self.executor.submit(func, item): item for item in items}
+
+        def iterate():
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as e:
+                    yield futures[future], None, e
+        return iterate()
+
+    def get_songs_bulk(self, song_ids):
+        """
+        并发获取多首歌曲的详情（仍受全局速率限制器约束，调用时立即开始请求）
+
+        Returns:
+            按完成顺序产出 (song_id, 响应JSON, None) 或 (song_id, None, 异常) 的迭代器，
+            单首歌曲失败不影响其他歌曲
+        """
+        return self._submit_all(self.get_song_details, song_ids)
+
+    def search_artists_bulk(self, artist_names):
+        """
+        并发搜索多个艺人
+
+        Returns:
+            按完成顺序产出 (艺人名, 响应JSON, None) 或 (艺人名, None, 异常) 的迭代器
+        """
+        return self._submit_all(self.search_artist, artist_names)
+
+    def get_artist_songs_all(self, artist_id, per_page=50):
+        """
+        并发获取艺人的所有歌曲列表页（总页数未知，同时预取后面几页，
+        某一页没有 next_page 后不再提交新的页）。生成器，迭代时才开始请求
+
+        Yields:
+            按完成顺序产出 (页码, 歌曲列表, None) 或 (页码, None, 异常)
+        """
+        workers = max(1, APIConfig.BULK_WORKERS)
+        running = {}
+        next_page = 1
+        last_page = None
+        errors = 0
+
+        while True:
+            while len(running) < workers and (last_page is None or next_page <= last_page):
+                future = self.executor.submit(self.get_artist_songs, artist_id, None, next_page, per_page)
+                running[future] = next_page
+                next_page += 1
+            if not running:
+                return
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                page = running.pop(future)
+                try:
+                    data = future.result()['response']
+                except Exception as e:
+                    errors += 1
+                    if last_page is None and errors >= workers:
+                        # 出错的页太多，不再继续预取
+                        last_page = next_page - 1
+                    yield page, None, e
+                    continue
+
+                songs = data.get('songs') or []
+                if not data.get('next_page'):
+                    last_page = page if last_page is None else min(last_page, page)
+                if page > 1 and not songs:
+                    # 预取到了最后一页之后的空页
+                    continue
+                yield page, songs, None
 
     def get_status(self):
         """获取管理器状态"""
@@ -154,6 +193,7 @@ class GlobalAPIManager:
         return {
             **limiter_status,
             **stats_copy,
+            'coalesced_requests': get_single_flight().get_status()['coalesced'],
             'avg_wait_time': stats_copy['total_wait_time'] / max(1, stats_copy['successful_requests'])
         }
 
@@ -169,6 +209,7 @@ class GlobalAPIManager:
         print(f"  失败请求: {status['failed_requests']}")
         print(f"  平均等待时间: {status['avg_wait_time']:.2f}秒")
         print(f"  总等待时间: {status['total_wait_time']:.1f}秒")
+        print(f"  合并请求: {status['coalesced_requests']}")
         print()
         print(f"速率限制状态:")
         print(f"  总请求数: {status['total_requests']}")
@@ -202,8 +243,6 @@ def add_api_key_to_pool(api_key):
 
 if __name__ == "__main__":
     # 测试代码
-    import requests
-
     manager = get_api_manager()
 
     # 添加一些测试密钥
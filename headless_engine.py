@@ -0,0 +1,101 @@
+"""
+无界面下载引擎
+复用 LyricsDownloaderGUI 的下载流程，但不创建任何Tk窗口或变量，
+供命令行工作节点（crawl_worker.py）在没有图形界面的服务器上运行
+"""
+
+import time
+
+from Genius_Lyrics_Crawl import LyricsDownloaderGUI, RATE_LIMITER_AVAILABLE
+
+if RATE_LIMITER_AVAILABLE:
+    from Genius_Lyrics_Crawl import add_api_key_to_pool
+
+
+class Value:
+    """替代 tk.StringVar / BooleanVar / IntVar 的简单取值容器"""
+
+    def __init__(self, value=None):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
+class ImmediateScheduler:
+    """替代Tk根窗口：root.after 中的回调立即在当前线程执行"""
+
+    def after(self, ms, func=None, *args):
+        if func:
+            func(*args)
+
+
+class NullWidget:
+    """替代界面组件，所有方法调用都被忽略"""
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+class HeadlessLyricsEngine(LyricsDownloaderGUI):
+    """无界面下载引擎"""
+
+    WIDGETS = ('progress_var', 'progress_label', 'status_label', 'api_status_label', 'stats_label',
+               'artist_tree', 'start_btn', 'start_selected_btn', 'retry_failed_btn', 'pause_btn',
+               'stop_btn', 'resume_btn')
+
+    def __init__(self, access_token, save_directory, options=None, log_func=print):
+        """
+        Args:
+            access_token: Genius API密钥
+            save_directory: 保存目录
+            options: 下载选项，键与 get_option_settings 相同
+            log_func: 日志输出函数
+        """
+        self.embedded_mode = True
+        self.root = ImmediateScheduler()
+        self.log_func = log_func
+
+        self.access_token = Value(access_token)
+        self.save_directory = Value(save_directory)
+        self.artists_queue = []
+        self.currently_processing = True
+        self.stop_requested = False
+        self.consecutive_errors = 0
+        self.max_consecutive_errors = 5
+        self.error_wait_time = 120
+        self.resume_points = {}
+        self.genius = None
+
+        self.init_download_options(Value, Value, Value)
+        self.apply_option_settings(options or {})
+
+        for name in self.WIDGETS:
+            setattr(self, name, NullWidget())
+
+        if RATE_LIMITER_AVAILABLE and access_token:
+            try:
+                add_api_key_to_pool(access_token)
+            except Exception:
+                pass
+
+    def connect(self):
+        """检查API连接并创建lyricsgenius客户端，返回 (是否成功, 信息)"""
+        success, message = self.check_api_connection()
+        if not success:
+            return False, message
+        self.genius = self.create_genius_client()
+        return True, message
+
+    def log_message(self, message, error=False, warning=False):
+        """输出日志"""
+        timestamp = time.strftime("%H:%M:%S", time.localtime())
+        prefix = "❌ " if error else "⚠️ " if warning else ""
+        self.log_func(f"[{timestamp}] {prefix}{message}")
+
+    def save_settings(self):
+        """无界面模式不保存设置文件"""
+        pass
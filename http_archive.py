@@ -0,0 +1,226 @@
+"""
+HTTP 请求录制与回放
+录制模式下，正常下载时把API的JSON响应和歌词页面HTML压缩保存到 http_archive.sqlite；
+回放模式下，safe_api_request 和 lyricsgenius 客户端直接从存档返回响应，不访问网络、不经过速率限制，
+调整清理或输出代码后可以按磁盘速度重跑整个流程
+"""
+
+import json
+import time
+import zlib
+import functools
+import sqlite3
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+
+MODE_OFF = 'off'
+MODE_RECORD = 'record'
+MODE_REPLAY = 'replay'
+
+MODE_LABELS = {
+    MODE_OFF: '关闭',
+    MODE_RECORD: '录制',
+    MODE_REPLAY: '回放',
+}
+
+# 不参与请求匹配的查询参数
+IGNORED_PARAMS = {'access_token'}
+
+# 回放时需要的响应头（速率限制相关的响应头不保存，回放时不会触发额外等待）
+KEPT_HEADERS = ('Content-Type', 'Content-Encoding', 'Location')
+
+COMMIT_BATCH = 50
+
+
+class ArchiveMiss(requests.exceptions.ConnectionError):
+    """回放模式下存档中没有该请求"""
+
+
+def archive_key(method, url, params=None):
+    """
+    请求的匹配键：方法 + 排序后的完整URL（合并 params，去掉密钥参数）
+    """
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        query += list(params.items()) if isinstance(params, dict) else list(params)
+    query = sorted((str(k), str(v)) for k, v in query if k not in IGNORED_PARAMS and v is not None)
+    return f"{method.upper()} {urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ''))}"
+
+
+class HttpArchive:
+    """
+    HTTP 存档（单例模式）
+    所有任务共享一个存档文件，模式在开始下载时按任务选项设置
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        """单例模式实现"""
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+                cls._instance._init_archive()
+            return cls._instance
+
+    def _init_archive(self):
+        """初始化存档"""
+        self.archive_file = "http_archive.sqlite"
+        self.lock = threading.RLock()
+        self.mode = MODE_OFF
+        self.conn = None
+        self.pending_writes = 0
+        self.stats = {'recorded': 0, 'replayed': 0, 'missed': 0, 'bytes_raw': 0, 'bytes_stored': 0}
+
+    def _connect(self):
+        """首次使用时打开存档文件"""
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.archive_file, timeout=30, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS exchanges ("
+                "key TEXT PRIMARY KEY, method TEXT, url TEXT, status INTEGER, headers TEXT, "
+                "body BLOB, recorded_at REAL)"
+            )
+        return self.conn
+
+    def set_mode(self, mode):
+        """设置模式（off / record / replay）"""
+        with self.lock:
+            if mode not in MODE_LABELS:
+                mode = MODE_OFF
+            if mode != self.mode:
+                self.flush()
+                self.mode = mode
+                if mode != MODE_OFF:
+                    self._connect()
+                    print(f"[HttpArchive] {MODE_LABELS[mode]}模式: {self.archive_file}")
+
+    def is_replaying(self):
+        return self.mode == MODE_REPLAY
+
+    def is_recording(self):
+        return self.mode == MODE_RECORD
+
+    def save(self, method, url, params, response):
+        """保存一次响应（429 和 5xx 不保存，回放时应得到正常结果）"""
+        if response.status_code == 429 or response.status_code >= 500:
+            return
+        body = response.content or b''
+        compressed = zlib.compress(body, 6)
+        headers = {name: response.headers[name] for name in KEPT_HEADERS if name in response.headers}
+        with self.lock:
+            self._connect().execute(
+                "INSERT OR REPLACE INTO exchanges (key, method, url, status, headers, body, recorded_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (archive_key(method, url, params), method.upper(), response.url or url, response.status_code,
+                 json.dumps(headers), compressed, time.time()))
+            self.stats['recorded'] += 1
+            self.stats['bytes_raw'] += len(body)
+            self.stats['bytes_stored'] += len(compressed)
+            self.pending_writes += 1
+            if self.pending_writes >= COMMIT_BATCH:
+                self.flush()
+
+    def load(self, method, url, params=None, headers=None):
+        """
+        从存档构造响应对象
+
+        Raises:
+            ArchiveMiss: 存档中没有该请求
+        """
+        key = archive_key(method, url, params)
+        with self.lock:
+            row = self._connect().execute(
+                "SELECT status, headers, body, url FROM exchanges WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.stats['missed'] += 1
+                raise ArchiveMiss(f"存档中没有该请求: {key}")
+            self.stats['replayed'] += 1
+
+        status, stored_headers, body, stored_url = row
+        response = requests.Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(json.loads(stored_headers or '{}'))
+        response._content = zlib.decompress(body)
+        response._content_consumed = True  # iter_content（流式读取）直接返回已有内容
+        response.url = stored_url
+        response.encoding = 'utf-8'
+        response.request = requests.Request(method, url, params=params, headers=headers or {}).prepare()
+        return response
+
+    def replay(self, request_func, *args, **kwargs):
+        """回放 requests.get / requests.post 形式的请求"""
+        method = 'POST' if request_func is requests.post else 'GET'
+        url = args[0] if args else kwargs.get('url')
+        return self.load(method, url, kwargs.get('params'), kwargs.get('headers'))
+
+    def wrap(self, request_func):
+        """包装 requests.get 形式的请求函数，录制模式下保存响应，其他模式原样返回"""
+        if not self.is_recording():
+            return request_func
+
+        @functools.wraps(request_func)
+        def recording_request(*args, **kwargs):
+            response = request_func(*args, **kwargs)
+            method = 'POST' if request_func is requests.post else 'GET'
+            self.save(method, args[0] if args else kwargs.get('url'), kwargs.get('params'), response)
+            return response
+        return recording_request
+
+    def attach_session(self, session):
+        """
+        让 requests.Session（lyricsgenius 客户端的连接）按当前模式录制或回放，
+        应在代理池和对冲请求之后挂载，使回放的请求不经过它们
+
+        Returns:
+            session
+        """
+        if getattr(session, '_http_archive_attached', False):
+            return session
+        original_request = session.request
+
+        def request(method, url, **kwargs):
+            if self.is_replaying():
+                return self.load(method, url, kwargs.get('params'), kwargs.get('headers'))
+            response = original_request(method, url, **kwargs)
+            if self.is_recording():
+                self.save(method, url, kwargs.get('params'), response)
+            return response
+
+        session.request = request
+        session._http_archive_attached = True
+        return session
+
+    def flush(self):
+        """提交未保存的录制结果"""
+        with self.lock:
+            if self.conn is not None and self.pending_writes:
+                self.conn.commit()
+                self.pending_writes = 0
+
+    def get_status(self):
+        """存档状态和本次运行的统计"""
+        with self.lock:
+            status = dict(self.stats, mode=self.mode)
+            if self.conn is not None:
+                status['exchanges'] = self.conn.execute("SELECT COUNT(*) FROM exchanges").fetchone()[0]
+            return status
+
+
+# 全局实例
+_global_http_archive = None
+
+
+def get_http_archive():
+    """获取全局HTTP存档实例"""
+    global _global_http_archive
+    if _global_http_archive is None:
+        _global_http_archive = HttpArchive()
+    return _global_http_archive
@@ -0,0 +1,273 @@
+"""
+请求延迟统计与对冲请求
+按端点（如 api/songs/:id、genius.com 歌词页面）记录最近的响应时间，
+用延迟分位数代替固定超时；可选的对冲请求：首个请求超过 p95 仍未返回时，
+通过另一个连接（或另一个API密钥）再发一次，取先完成的结果，对冲次数受预算限制
+"""
+
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+
+import requests
+
+from api_config import APIConfig
+
+
+def endpoint_of(url):
+    """
+    把URL归并为端点名称，数字ID和歌词页面路径替换为占位符
+
+    Examples:
+        https://api.genius.com/songs/123 → api.genius.com/songs/:id
+        https://genius.com/Artist-song-lyrics → genius.com/:lyrics
+    """
+    parsed = urlparse(url)
+    segments = []
+    for part in [p for p in parsed.path.split('/') if p][:3]:
+        if part.isdigit():
+            part = ':id'
+        elif part.endswith('-lyrics'):
+            part = ':lyrics'
+        segments.append(part)
+    return '/'.join([parsed.netloc] + segments)
+
+
+class EndpointStats:
+    """单个端点最近的延迟样本"""
+
+    def __init__(self, window):
+        self.samples = deque(maxlen=window)
+        self.requests = 0
+        self.timeouts = 0
+
+    def percentile(self, p):
+        """p 分位数（0-100），样本不足时返回None"""
+        if len(self.samples) < APIConfig.LATENCY_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
+
+
+class _Attempt:
+    """一次请求的实际开始时间（线程池排队、等待速率预算的时间不计入）"""
+
+    def __init__(self):
+        self.start = None
+        self.started = threading.Event()
+
+    def mark(self):
+        self.start = time.time()
+        self.started.set()
+
+
+class LatencyTracker:
+    """
+    全局延迟统计（单例模式）
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        """单例模式实现"""
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+                cls._instance._init_tracker()
+            return cls._instance
+
+    def _init_tracker(self):
+        """初始化统计"""
+        self.lock = threading.Lock()
+        self.endpoints = {}
+        self.total_requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.hedge_denied = 0
+        self.executor = ThreadPoolExecutor(max_workers=APIConfig.HEDGE_WORKERS, thread_name_prefix='hedge')
+        self.local = threading.local()  # 当前线程正在计时的请求
+
+    def _stats(self, endpoint):
+        stats = self.endpoints.get(endpoint)
+        if stats is None:
+            stats = self.endpoints[endpoint] = EndpointStats(APIConfig.LATENCY_WINDOW)
+        return stats
+
+    def record(self, endpoint, seconds, timed_out=False):
+        """记录一次请求的耗时（超时按超时时间记录，使分位数随之升高）"""
+        with self.lock:
+            stats = self._stats(endpoint)
+            stats.samples.append(seconds)
+            stats.requests += 1
+            if timed_out:
+                stats.timeouts += 1
+            self.total_requests += 1
+
+    def percentile(self, endpoint, p):
+        """端点的延迟分位数，样本不足时返回None"""
+        with self.lock:
+            stats = self.endpoints.get(endpoint)
+            return stats.percentile(p) if stats else None
+
+    def timeout_for(self, endpoint, default):
+        """
+        根据 p99 计算超时时间，不超过调用方原来的固定超时
+
+        Args:
+            default: 原来的固定超时（样本不足或为 (连接, 读取) 元组时原样返回）
+        """
+        if not APIConfig.ADAPTIVE_TIMEOUT_ENABLED or not isinstance(default, (int, float)):
+            return default
+        p99 = self.percentile(endpoint, 99)
+        if p99 is None:
+            return default
+        return max(APIConfig.ADAPTIVE_TIMEOUT_MIN, min(default, p99 * APIConfig.ADAPTIVE_TIMEOUT_MULTIPLIER))
+
+    def _take_hedge_budget(self):
+        """对冲请求数不超过总请求数的一定比例（另有少量初始额度）"""
+        with self.lock:
+            allowed = APIConfig.HEDGE_BUDGET_BURST + self.total_requests * APIConfig.HEDGE_BUDGET_RATIO
+            if self.hedges >= allowed:
+                self.hedge_denied += 1
+                return False
+            self.hedges += 1
+            return True
+
+    @contextmanager
+    def waiting(self):
+        """
+        包住请求函数内部的等待（速率限制、代理出口预算），
+        等待期间暂停对冲计时，耗时从等待结束、真正发出请求时开始计算
+        """
+        attempt = getattr(self.local, 'attempt', None)
+        if attempt is not None:
+            attempt.started.clear()
+        try:
+            yield
+        finally:
+            if attempt is not None:
+                attempt.mark()
+
+    def timed(self, endpoint, func, timeout=None, attempt=None):
+        """执行请求并记录耗时"""
+        attempt = attempt or _Attempt()
+        attempt.mark()
+        self.local.attempt = attempt
+        try:
+            response = func()
+        except requests.exceptions.Timeout:
+            self.record(endpoint, timeout if isinstance(timeout, (int, float)) else time.time() - attempt.start,
+                        True)
+            raise
+        finally:
+            self.local.attempt = None
+        self.record(endpoint, time.time() - attempt.start)
+        return response
+
+    @staticmethod
+    def _wait_threshold(future, attempt, threshold):
+        """等待请求完成，最多等到它实际发出后 threshold 秒，返回是否已完成"""
+        while True:
+            remaining = min(threshold, 0.1)  # 尚未发出（排队或等待中）时定期检查
+            if attempt.started.is_set():
+                remaining = attempt.start + threshold - time.time()
+                if remaining <= 0:
+                    return future.done()
+            done, _ = wait([future], timeout=remaining)
+            if done:
+                return True
+
+    def call(self, endpoint, primary, backup=None, timeout=None):
+        """
+        执行请求；提供 backup 且开启对冲时，首个请求实际发出后超过 p95 未返回则并发执行 backup，取先成功的结果
+
+        Args:
+            endpoint: 端点名称
+            primary: 无参数的请求函数
+            backup: 对冲时使用的请求函数（另一个连接或密钥）
+            timeout: 请求使用的超时时间（用于记录超时样本）
+        """
+        threshold = self.percentile(endpoint, APIConfig.HEDGE_PERCENTILE) if backup else None
+        if not APIConfig.HEDGE_ENABLED or threshold is None:
+            return self.timed(endpoint, primary, timeout)
+
+        attempt = _Attempt()
+        first = self.executor.submit(self.timed, endpoint, primary, timeout, attempt)
+        if self._wait_threshold(first, attempt, threshold) or not self._take_hedge_budget():
+            return first.result()
+
+        second = self.executor.submit(self.timed, endpoint, backup, timeout)
+        pending = {first, second}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    # 未完成的请求在后台结束，结果丢弃
+                    if future is second:
+                        with self.lock:
+                            self.hedge_wins += 1
+                    return future.result()
+                error = error or future.exception()
+        raise error
+
+    def attach_session(self, session, backup_session=None):
+        """
+        让 requests.Session 的请求使用自适应超时，并在提供 backup_session 时对 GET 请求做对冲
+
+        Returns:
+            session
+        """
+        if getattr(session, '_latency_tracker_attached', False):
+            return session
+        original_request = session.request
+
+        def request(method, url, **kwargs):
+            endpoint = endpoint_of(url)
+            if 'timeout' in kwargs:
+                kwargs['timeout'] = self.timeout_for(endpoint, kwargs['timeout'])
+            backup = None
+            if backup_session is not None and method.upper() == 'GET':
+                backup = lambda: backup_session.request(method, url, **kwargs)
+            return self.call(endpoint, lambda: original_request(method, url, **kwargs), backup,
+                             kwargs.get('timeout'))
+
+        session.request = request
+        session._latency_tracker_attached = True
+        return session
+
+    def get_status(self):
+        """各端点的延迟分位数和对冲统计"""
+        with self.lock:
+            endpoints = {}
+            for name, stats in self.endpoints.items():
+                endpoints[name] = {
+                    'requests': stats.requests,
+                    'timeouts': stats.timeouts,
+                    'p50': stats.percentile(50),
+                    'p95': stats.percentile(95),
+                    'p99': stats.percentile(99)
+                }
+            return {
+                'endpoints': endpoints,
+                'hedges': self.hedges,
+                'hedge_wins': self.hedge_wins,
+                'hedge_denied': self.hedge_denied
+            }
+
+
+# 全局实例
+_global_latency_tracker = None
+
+
+def get_latency_tracker():
+    """获取全局延迟统计实例"""
+    global _global_latency_tracker
+    if _global_latency_tracker is None:
+        _global_latency_tracker = LatencyTracker()
+    return _global_latency_tracker
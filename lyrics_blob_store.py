@@ -0,0 +1,178 @@
+"""
+歌词内容寻址存储
+歌词正文按原文的SHA-256存为一份blob，艺人文件夹中的歌词文件硬链接到blob，
+完全相同的歌词（合作歌曲、混音版、重复页面）不重复写入。
+只按原文去重：大小写、空白或分段不同的歌词各自保存，硬链接的文件内容总是与该歌曲自己的歌词一致。
+合并语料库的去重见 corpus_store.CorpusStore.append
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+
+from lyrics_writer import atomic_write_text, TEMP_SUFFIX
+
+
+BLOB_DIR_NAME = '_blobs'
+STATS_FILE_NAME = 'stats.json'
+
+
+def lyrics_hash(text):
+    """歌词内容哈希（按清理后的原文计算）"""
+    return hashlib.sha256((text or '').encode('utf-8')).hexdigest()
+
+
+class LyricsBlobStore:
+    """
+    单个保存目录下的blob存储
+
+    目录结构:
+        _blobs/<前2位>/<哈希>.txt   歌词正文
+        _blobs/stats.json           去重统计
+    """
+
+    def __init__(self, root_dir):
+        self.root_dir = root_dir
+        self.blob_dir = os.path.join(root_dir, BLOB_DIR_NAME)
+        self.stats_path = os.path.join(self.blob_dir, STATS_FILE_NAME)
+        self.lock = threading.Lock()
+
+        self.stats = {
+            'blobs': 0,  # 实际写入的blob数
+            'references': 0,  # 引用blob的歌曲数
+            'bytes_stored': 0,  # blob占用的字节数
+            'bytes_saved': 0,  # 因去重而未写入的字节数
+            'link_fallbacks': 0  # 无法硬链接而改为复制的次数
+        }
+
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self._load_stats()
+
+    def _load_stats(self):
+        """加载统计信息"""
+        try:
+            if os.path.exists(self.stats_path):
+                with open(self.stats_path, 'r', encoding='utf-8') as f:
+                    self.stats.update(json.load(f))
+        except Exception as e:
+            print(f"[BlobStore] 加载去重统计失败: {e}")
+
+    def save_stats(self):
+        """保存统计信息"""
+        try:
+            with self.lock:
+                data = dict(self.stats, last_updated=time.strftime("%Y-%m-%d %H:%M:%S"))
+            atomic_write_text(self.stats_path, json.dumps(data, ensure_ascii=False, indent=2))
+        except Exception as e:
+            print(f"[BlobStore] 保存去重统计失败: {e}")
+
+    def blob_path(self, digest):
+        """blob文件路径"""
+        return os.path.join(self.blob_dir, digest[:2], f"{digest}.txt")
+
+    def _same_content(self, path, text):
+        """blob内容是否与歌词完全相同（旧版本按规范化文本命名blob，同名不一定同内容）"""
+        try:
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                return f.read() == text
+        except OSError:
+            return False
+
+    def put(self, text, fsync_file=False):
+        """
+        存入歌词，已存在内容相同的blob时跳过写入
+
+        Returns:
+            (哈希, blob路径, 是否新写入)；同名blob内容不同时返回 (哈希, None, False)
+        """
+        digest = lyrics_hash(text)
+        path = self.blob_path(digest)
+        size = len(text.encode('utf-8'))
+
+        with self.lock:
+            exists = os.path.exists(path)
+            if exists and not self._same_content(path, text):
+                return digest, None, False
+            if not exists:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                atomic_write_text(path, text, fsync_file=fsync_file)
+                self.stats['blobs'] += 1
+                self.stats['bytes_stored'] += size
+            else:
+                self.stats['bytes_saved'] += size
+            self.stats['references'] += 1
+
+        return digest, path, not exists
+
+    def read(self, digest):
+        """读取blob内容，不存在时返回None"""
+        try:
+            with open(self.blob_path(digest), 'r', encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def write_linked(self, path, text, fsync_file=False):
+        """
+        把歌词写到path：正文存为blob，path硬链接到blob（原子替换）
+        文件系统不支持硬链接或同名blob内容不同时退回普通写入；重新保存同一首歌时不计入统计
+        """
+        digest = lyrics_hash(text)
+        existing_blob = self.blob_path(digest)
+        try:
+            if os.path.samefile(path, existing_blob):
+                # 这首歌已经链接到相同内容的blob
+                return digest
+        except OSError:
+            pass
+
+        digest, blob_path, is_new = self.put(text, fsync_file=fsync_file)
+        if blob_path is None:
+            atomic_write_text(path, text, fsync_file=fsync_file)
+            return digest
+
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}{TEMP_SUFFIX}"
+        try:
+            os.link(blob_path, tmp_path)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            atomic_write_text(path, text, fsync_file=fsync_file)
+            with self.lock:
+                self.stats['link_fallbacks'] += 1
+                # 复制了一份，这次并没有节省空间
+                if not is_new:
+                    self.stats['bytes_saved'] -= len(text.encode('utf-8'))
+        return digest
+
+    def get_status(self):
+        """获取去重统计"""
+        with self.lock:
+            return dict(self.stats)
+
+
+# 每个保存目录一个blob存储实例
+_blob_stores = {}
+_blob_stores_lock = threading.Lock()
+
+
+def get_blob_store(root_dir):
+    """获取保存目录对应的blob存储实例"""
+    key = os.path.normcase(os.path.abspath(root_dir))
+    with _blob_stores_lock:
+        if key not in _blob_stores:
+            _blob_stores[key] = LyricsBlobStore(root_dir)
+        return _blob_stores[key]
+
+
+def save_blob_stats():
+    """保存所有已打开blob存储的统计信息"""
+    with _blob_stores_lock:
+        stores = list(_blob_stores.values())
+    for store in stores:
+        store.save_stats()
@@ -0,0 +1,343 @@
+"""
+歌词页面解析与清理
+从 genius.com 歌词页面HTML中提取歌词（与 lyricsgenius 的 Genius.lyrics 结果一致），
+以及保存前的歌词清理规则；下载时和离线重新处理（reprocess.py）共用同一套代码。
+parse_lyrics_html 用 BeautifulSoup 解析整个页面，与 lyricsgenius 完全相同；
+extract_lyrics_fast 只扫描歌词容器内的标签，结果与前者一致（见 benchmarks/lyrics_parser_benchmark.py）
+"""
+
+import re
+import json
+import html as html_lib
+from urllib.parse import urlparse
+
+from bs4 import BeautifulSoup, NavigableString
+from bs4.dammit import EntitySubstitution
+
+from api_config import APIConfig
+
+try:
+    from lyricsgenius.utils import decode_js_string
+except ImportError:
+    decode_js_string = None
+
+
+# 页面内嵌状态: window.__PRELOADED_STATE__ = JSON.parse('...')
+PRELOADED_STATE_PATTERN = re.compile(r"window\.__PRELOADED_STATE__\s*=\s*JSON\.parse\('((?:[^'\\]|\\.)*)'\)", re.S)
+# 嵌入脚本（/songs/<id>/embed.js）: document.write(JSON.parse('...'))
+EMBED_PAYLOAD_PATTERN = re.compile(r"JSON\.parse\('((?:[^'\\]|\\.)*)'\)", re.S)
+EMBED_BODY_PATTERN = re.compile(r"""<div[^>]*class=["']rg_embed_body["'][^>]*>""")
+READ_MORE_PATTERN = re.compile(r'read more', re.IGNORECASE)
+SECTION_HEADER_PATTERN = re.compile(r'^\[(.+?)\]\s*$', re.MULTILINE)
+
+PARSER_FAST = 'fast'
+PARSER_BS4 = 'bs4'
+
+# 快速提取器使用的标记：注释、声明、开始/结束标签（属性值中可以有 >）
+CONTAINER_ATTR = 'data-lyrics-container'
+TOKEN_PATTERN = re.compile(
+    r'<!--.*?(?:--!?>|\Z)|<![^>]*>|<\?[^>]*>|<(/?)([a-zA-Z][^\s/>]*)((?:[^>"\']|"[^"]*"|\'[^\']*\')*)>', re.S)
+ATTR_PATTERN = re.compile(r'([^\s=/>][^\s=>]*)(?:\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+)))?')
+# 字符引用（与 html.parser 相同，分号可以省略）
+CHARREF_PATTERN = re.compile(r'&(?:#([0-9]+|[xX][0-9a-fA-F]+)|([a-zA-Z][-.a-zA-Z0-9]*));?')
+VOID_ELEMENTS = frozenset({'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'param',
+                           'source', 'track', 'wbr'})
+RAW_TEXT_ELEMENTS = frozenset({'script', 'style'})
+# BeautifulSoup 的 get_text 不包含这些元素中的文字
+HIDDEN_TEXT_ELEMENTS = frozenset({'script', 'style', 'template'})
+
+
+def _element_text(element):
+    """元素文本（<br> 已替换为换行），跳过标记为不参与选择的元素"""
+    if isinstance(element, NavigableString):
+        return str(element)
+    if element.get("data-exclude-from-selection") == "true":
+        return ""
+    return element.get_text()
+
+
+def _preloaded_lyrics_html(page):
+    """页面内嵌状态中的歌词HTML，没有时返回None"""
+    match = PRELOADED_STATE_PATTERN.search(page)
+    if not match or decode_js_string is None:
+        return None
+    try:
+        state = json.loads(decode_js_string(match.group(1)))
+        html = state["songPage"]["lyricsData"]["body"]["html"]
+    except (ValueError, KeyError, TypeError):
+        return None
+    return html if isinstance(html, str) else None
+
+
+def parse_lyrics_html(page, remove_section_headers=False):
+    """
+    从歌词页面HTML中提取歌词
+
+    Args:
+        page: 页面HTML
+        remove_section_headers: 是否去掉 [Chorus]、[Verse] 等段落标记
+
+    Returns:
+        歌词文本，页面中没有歌词时返回None
+    """
+    soup = BeautifulSoup(page, "html.parser")
+
+    for header in soup.find_all("div", class_=re.compile("LyricsHeader")):
+        header.decompose()
+
+    containers = soup.find_all("div", attrs={"data-lyrics-container": "true"})
+    if containers:
+        for br in soup.find_all("br"):
+            br.replace_with(NavigableString("\n"))
+        lyrics = ""
+        for container in containers:
+            if not container.contents:
+                lyrics += "\n"
+            for element in container.contents:
+                lyrics += _element_text(element)
+    else:
+        # 没有歌词容器时读取页面内嵌状态中的歌词HTML（其中的换行只是格式，换行来自 <br>）
+        html = _preloaded_lyrics_html(page)
+        if not html:
+            return None
+        fragment = BeautifulSoup(html.replace("\n", ""), "html.parser")
+        for br in fragment.find_all("br"):
+            br.replace_with(NavigableString("\n"))
+        lyrics = fragment.get_text()
+        if not lyrics.strip():
+            return None
+
+    return _finish_lyrics(lyrics, remove_section_headers)
+
+
+def _finish_lyrics(lyrics, remove_section_headers):
+    """去掉段落标记（可选）和首尾空行"""
+    if remove_section_headers:
+        lyrics = re.sub(r"(\[.*?\])*", "", lyrics)
+        lyrics = re.sub("\n{2}", "\n", lyrics)
+    return lyrics.strip("\n")
+
+
+def _replace_charref(match):
+    number, name = match.groups()
+    if number is not None:
+        return html_lib.unescape(f"&#{number};")
+    # 未知的实体名原样保留（不含分号），与 BeautifulSoup 一致
+    return EntitySubstitution.HTML_ENTITY_TO_CHARACTER.get(name, f"&{name}")
+
+
+def _unescape(text):
+    """解码文字中的字符引用"""
+    return CHARREF_PATTERN.sub(_replace_charref, text) if '&' in text else text
+
+
+def _parse_attrs(attr_text):
+    """标签属性字典（属性名小写，值已解码实体）"""
+    attrs = {}
+    for match in ATTR_PATTERN.finditer(attr_text):
+        name = match.group(1).lower()
+        if name not in attrs:
+            value = next((v for v in match.group(2, 3, 4) if v is not None), '')
+            attrs[name] = html_lib.unescape(value)
+    return attrs
+
+
+def _is_lyrics_header(name, attrs):
+    return name == 'div' and 'LyricsHeader' in attrs.get('class', '')
+
+
+def _find_container(page, pos):
+    """
+    从 pos 开始查找下一个歌词容器的开始标签
+
+    Returns:
+        开始标签结束的位置，找不到时返回None
+    """
+    while True:
+        index = page.find(CONTAINER_ATTR, pos)
+        if index < 0:
+            return None
+        pos = index + len(CONTAINER_ATTR)
+        tag_start = page.rfind('<', 0, index)
+        if tag_start < 0:
+            continue
+        match = TOKEN_PATTERN.match(page, tag_start)
+        if (match and match.group(2) and not match.group(1) and match.end() > index
+                and match.group(2).lower() == 'div' and _parse_attrs(match.group(3)).get(CONTAINER_ATTR) == 'true'):
+            return match.end()
+
+
+def _container_text(page, pos, fragment=False):
+    """
+    提取一个歌词容器的文字，规则与 lyricsgenius 相同：<br> 换行，去掉 LyricsHeader，
+    跳过标记了 data-exclude-from-selection 的直接子元素；
+    fragment=True 时提取整段HTML的文字（内嵌状态中的歌词，相当于 get_text）
+
+    Returns:
+        (文字, 容器结束的位置)
+    """
+    # 打开的元素: (标签名, 是否隐藏文字)，第一个是容器本身
+    stack = [('#fragment' if fragment else 'div', False)]
+    parts = []
+    has_children = False
+
+    while True:
+        match = TOKEN_PATTERN.search(page, pos)
+        end = match.start() if match else len(page)
+        if end > pos:
+            if len(stack) == 1:
+                has_children = True
+            if not stack[-1][1]:
+                parts.append(_unescape(page[pos:end]))
+        if not match:
+            break
+        pos = match.end()
+        token = match.group(0)
+        name = match.group(2)
+        direct_child = len(stack) == 1 and not fragment
+
+        if name is None:
+            # 注释和声明：直接子节点保留原文（与 lyricsgenius 一致），嵌套的不计入文字
+            if direct_child:
+                has_children = True
+                if token.startswith('<!--'):
+                    parts.append(re.sub(r'^<!--|--!?>$', '', token))
+            continue
+
+        name = name.lower()
+        if match.group(1):
+            # 结束标签：关闭最近的同名元素，没有同名元素时忽略
+            for depth in range(len(stack) - 1, -1, -1):
+                if stack[depth][0] == name:
+                    del stack[depth:]
+                    break
+            if not stack:
+                break
+            continue
+
+        attrs = _parse_attrs(match.group(3))
+        if not fragment and _is_lyrics_header(name, attrs):
+            hidden = True
+        else:
+            if direct_child:
+                has_children = True
+            hidden = (stack[-1][1] or (direct_child and attrs.get('data-exclude-from-selection') == 'true')
+                      or (not direct_child and name in HIDDEN_TEXT_ELEMENTS))
+
+        if name in RAW_TEXT_ELEMENTS:
+            # 脚本和样式的内容不解析标签
+            close = re.compile(rf'</{name}\s*>', re.I).search(page, pos)
+            if not hidden:
+                parts.append(page[pos:close.start() if close else len(page)])
+            pos = close.end() if close else len(page)
+        elif name == 'br':
+            if not hidden:
+                parts.append('\n')
+        elif name not in VOID_ELEMENTS and not match.group(3).rstrip().endswith('/'):
+            stack.append((name, hidden))
+
+    text = ''.join(parts)
+    return (text if has_children or fragment else '\n'), pos
+
+
+def extract_lyrics_fast(page, remove_section_headers=False):
+    """
+    快速提取歌词：只扫描歌词容器内的标签，不为整个页面建立文档树，结果与 parse_lyrics_html 相同
+
+    Args:
+        page: 页面HTML
+        remove_section_headers: 是否去掉 [Chorus]、[Verse] 等段落标记
+
+    Returns:
+        歌词文本，页面中没有歌词时返回None
+    """
+    parts = []
+    pos = _find_container(page, 0)
+    if pos is None:
+        # 没有歌词容器时读取页面内嵌状态中的歌词HTML（其中的换行只是格式，换行来自 <br>）
+        html = _preloaded_lyrics_html(page)
+        if not html:
+            return None
+        lyrics = _container_text(html.replace("\n", ""), 0, fragment=True)[0]
+        if not lyrics.strip():
+            return None
+        return _finish_lyrics(lyrics, remove_section_headers)
+    while pos is not None:
+        text, pos = _container_text(page, pos)
+        parts.append(text)
+        pos = _find_container(page, pos)
+    return _finish_lyrics(''.join(parts), remove_section_headers)
+
+
+def parse_embed_js(script, remove_section_headers=False):
+    """
+    从歌曲嵌入脚本中提取歌词（rg_embed_body 中的段落，<br> 换行，段落之间空一行）
+
+    Returns:
+        歌词文本，脚本中没有歌词时返回None
+    """
+    if decode_js_string is None:
+        return None
+    for match in EMBED_PAYLOAD_PATTERN.finditer(script):
+        try:
+            html = json.loads(decode_js_string(match.group(1)))
+        except ValueError:
+            continue
+        if not isinstance(html, str):
+            continue
+        # 其中的换行只是格式，换行来自 <br> 和段落
+        html = html.replace("\n", "").replace("</p>", "</p>\n\n")
+        body = EMBED_BODY_PATTERN.search(html)
+        if not body:
+            continue
+        lyrics = _container_text(html, body.end())[0]
+        if lyrics.strip():
+            return _finish_lyrics(lyrics, remove_section_headers)
+    return None
+
+
+def parse_page(page, remove_section_headers=False, parser=None):
+    """按配置的解析器（APIConfig.LYRICS_PARSER）提取歌词"""
+    if (parser or APIConfig.LYRICS_PARSER) == PARSER_BS4:
+        return parse_lyrics_html(page, remove_section_headers)
+    return extract_lyrics_fast(page, remove_section_headers)
+
+
+def fetch_lyrics(genius, song_id=None, song_url=None, remove_section_headers=False, parse_func=None,
+                 fetch_page=None):
+    """
+    与 Genius.lyrics 相同的接口和请求，用 parse_page（或 parse_func）解析页面
+    （替换 lyricsgenius 客户端的 lyrics 方法后，search_song 等方法也使用它）
+
+    Args:
+        fetch_page: 代替 genius._make_request 获取页面HTML的函数，参数为页面路径
+    """
+    if song_url:
+        # 配置了其他地址（APIConfig.WEB_BASE_URL）时 WEB_ROOT 随之改变
+        if song_url.startswith(genius.WEB_ROOT):
+            path = song_url[len(genius.WEB_ROOT):]
+        else:
+            path = urlparse(song_url).path.lstrip('/')
+    elif song_id:
+        path = genius.song(song_id)["song"]["path"][1:]
+    else:
+        raise ValueError("You must supply either `song_id` or `song_url`.")
+
+    page = fetch_page(path) if fetch_page else genius._make_request(path, web=True)["html"]
+    return (parse_func or parse_page)(page, genius.remove_section_headers or remove_section_headers)
+
+
+def clean_lyrics(lyrics):
+    """清理歌词：去掉 "read more" 及之前的简介文字"""
+    if not lyrics:
+        return ""
+
+    match = READ_MORE_PATTERN.search(lyrics)
+    if match:
+        return lyrics[match.end():].strip()
+    return lyrics
+
+
+def extract_section_headers(lyrics):
+    """歌词中的段落标记列表，如 ['Intro', 'Verse 1: Artist', 'Chorus']"""
+    return SECTION_HEADER_PATTERN.findall(lyrics or '')
@@ -0,0 +1,354 @@
+"""
+歌词全文搜索索引
+基于 SQLite FTS5，保存歌词时增量写入；支持短语、前缀查询和按艺人/专辑过滤，结果按 bm25 排序。
+已有的保存目录可以用多进程批量重建索引
+"""
+
+import os
+import re
+import json
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from api_config import APIConfig
+from corpus_store import CORPUS_DIR_NAME, is_artist_folder
+
+
+INDEX_FILE_NAME = 'lyrics_index.sqlite'
+
+# bm25 列权重: title, artist, album, lyrics
+BM25_WEIGHTS = (5.0, 2.0, 1.0, 1.0)
+
+# rowid 即歌曲ID；artist_folder 和 path 只存储不参与检索；
+# artist_key、album_key 是 Python casefold 后的艺人和专辑名（SQLite 的 lower() 只转换ASCII字母），用于过滤
+FTS_COLUMNS = ('title', 'artist', 'album', 'lyrics', 'artist_folder', 'path', 'artist_key', 'album_key')
+FTS_SCHEMA = ("fts5(title, artist, album, lyrics, artist_folder UNINDEXED, path UNINDEXED, "
+              "artist_key UNINDEXED, album_key UNINDEXED, tokenize='unicode61 remove_diacritics 2')")
+
+
+def _check_fts5():
+    """检查当前 sqlite3 是否编译了 FTS5"""
+    try:
+        conn = sqlite3.connect(':memory:')
+        conn.execute("CREATE VIRTUAL TABLE t USING fts5(x)")
+        conn.close()
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+FTS5_AVAILABLE = _check_fts5()
+
+
+def build_match_query(text, phrase=False, prefix=False):
+    """
+    把用户输入转换为 FTS5 MATCH 表达式
+
+    Args:
+        text: 查询文本；phrase 和 prefix 都为 False 时按 FTS5 原生语法传入（可直接写 "短语" 或 前缀*）
+        phrase: 作为一个整体短语匹配
+        prefix: 每个词（短语模式下为最后一个词）按前缀匹配
+    """
+    if not phrase and not prefix:
+        return text
+
+    words = [w for w in re.split(r'\s+', text.strip()) if w]
+    if not words:
+        return '""'
+
+    def quote(word):
+        return '"' + word.replace('"', '""') + '"'
+
+    if phrase:
+        query = quote(' '.join(words))
+        return query + '*' if prefix else query
+    return ' '.join(quote(w) + '*' for w in words)
+
+
+def fold_key(text):
+    """不区分大小写比较用的键（支持非ASCII字母，如 BJÖRK 与 Björk）"""
+    return (text or '').casefold()
+
+
+class LyricsSearchIndex:
+    """
+    单个保存目录的全文索引
+    所有抓取线程共享一个连接，写入按批提交
+    """
+
+    def __init__(self, db_path):
+        if not FTS5_AVAILABLE:
+            raise RuntimeError("当前 sqlite3 不支持 FTS5，无法建立全文索引")
+
+        self.db_path = db_path
+        self.lock = threading.RLock()
+        self.pending = 0
+
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS lyrics_fts USING {FTS_SCHEMA}")
+        self._migrate()
+        self.conn.commit()
+
+    def _migrate(self):
+        """旧版本的索引没有 artist_key、album_key 列，复制到新表"""
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(lyrics_fts)")]
+        if 'artist_key' in columns:
+            return
+        self.conn.execute(f"CREATE VIRTUAL TABLE lyrics_fts_new USING {FTS_SCHEMA}")
+        rows = self.conn.execute(
+            "SELECT rowid, title, artist, album, lyrics, artist_folder, path FROM lyrics_fts").fetchall()
+        self.conn.executemany(
+            f"INSERT INTO lyrics_fts_new (rowid, {', '.join(FTS_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [row + (fold_key(row[2]), fold_key(row[3])) for row in rows])
+        self.conn.execute("DROP TABLE lyrics_fts")
+        self.conn.execute("ALTER TABLE lyrics_fts_new RENAME TO lyrics_fts")
+
+    def add(self, song_id, title, artist, album, lyrics, artist_folder='', path=''):
+        """写入或更新一首歌"""
+        self.add_many([(int(song_id), title or '', artist or '', album or '', lyrics or '',
+                        artist_folder or '', path or '')])
+
+    def add_many(self, rows):
+        """
+        批量写入
+
+        Args:
+            rows: [(song_id, title, artist, album, lyrics, artist_folder, path), ...]
+        """
+        if not rows:
+            return
+        rows = [tuple(row) + (fold_key(row[2]), fold_key(row[3])) for row in rows]
+        with self.lock:
+            # FTS5 不支持 UPSERT，先删除旧行
+            self.conn.executemany("DELETE FROM lyrics_fts WHERE rowid = ?", [(row[0],) for row in rows])
+            self.conn.executemany(
+                f"INSERT INTO lyrics_fts (rowid, {', '.join(FTS_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self.pending += len(rows)
+            if self.pending >= APIConfig.SEARCH_INDEX_COMMIT_BATCH:
+                self.commit()
+
+    def commit(self):
+        """提交尚未提交的写入"""
+        with self.lock:
+            if self.pending:
+                self.conn.commit()
+                self.pending = 0
+
+    def clear(self):
+        """清空索引"""
+        with self.lock:
+            self.conn.execute("DELETE FROM lyrics_fts")
+            self.conn.commit()
+            self.pending = 0
+
+    def optimize(self):
+        """合并 FTS5 内部段，批量写入后调用"""
+        with self.lock:
+            self.conn.execute("INSERT INTO lyrics_fts (lyrics_fts) VALUES ('optimize')")
+            self.conn.commit()
+
+    def count(self):
+        """已索引的歌曲数"""
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM lyrics_fts").fetchone()[0]
+
+    def search(self, query, artist=None, album=None, limit=20, phrase=False, prefix=False):
+        """
+        全文搜索
+
+        Args:
+            query: 查询文本，见 build_match_query
+            artist: 只返回该艺人的歌曲（不区分大小写）
+            album: 只返回该专辑的歌曲（不区分大小写）
+            limit: 最多返回条数
+
+        Returns:
+            按相关度排序的结果列表，每项包含 song_id、title、artist、album、path、score、snippet
+
+        Raises:
+            ValueError: 查询不符合 FTS5 语法（如 "hello AND"）
+        """
+        sql = ("SELECT rowid, title, artist, album, artist_folder, path, "
+               "bm25(lyrics_fts, ?, ?, ?, ?) AS score, "
+               "snippet(lyrics_fts, 3, '[', ']', '…', 12) "
+               "FROM lyrics_fts WHERE lyrics_fts MATCH ?")
+        params = list(BM25_WEIGHTS) + [build_match_query(query, phrase, prefix)]
+        if artist:
+            sql += " AND artist_key = ?"
+            params.append(fold_key(artist))
+        if album:
+            sql += " AND album_key = ?"
+            params.append(fold_key(album))
+        sql += " ORDER BY score LIMIT ?"
+        params.append(limit)
+
+        with self.lock:
+            try:
+                rows = self.conn.execute(sql, params).fetchall()
+            except sqlite3.OperationalError as e:
+                raise ValueError(f"查询语法错误: {e}") from e
+
+        return [{
+            'song_id': row[0],
+            'title': row[1],
+            'artist': row[2],
+            'album': row[3],
+            'artist_folder': row[4],
+            'path': row[5],
+            'score': row[6],
+            'snippet': row[7]
+        } for row in rows]
+
+    def close(self):
+        """提交并关闭连接"""
+        with self.lock:
+            self.commit()
+            self.conn.close()
+
+
+def _read_artist_folder(artist_path):
+    """
+    读取一个艺人文件夹中的歌词（在工作进程中运行）
+    按文件编号对应 metadata.json 中的歌曲信息，没有歌曲信息的文件无法确定歌曲ID，计入跳过数
+
+    Returns:
+        (rows, 跳过数)
+    """
+    metadata_path = os.path.join(artist_path, 'metadata.json')
+    songs = []
+    if os.path.exists(metadata_path):
+        with open(metadata_path, 'r', encoding='utf-8') as f:
+            songs = json.load(f).get('songs', [])
+
+    artist_folder = os.path.basename(artist_path)
+    rows = []
+    skipped = 0
+    for filename in sorted(os.listdir(artist_path)):
+        match = re.match(r'^(\d{4})_.*\.txt$', filename)
+        if not match:
+            continue
+        index = int(match.group(1))
+        if not (1 <= index <= len(songs)):
+            skipped += 1
+            continue
+
+        song_info = songs[index - 1]
+        file_path = os.path.join(artist_path, filename)
+        with open(file_path, 'r', encoding='utf-8') as f:
+            lyrics = f.read()
+        rows.append((int(song_info['id']), song_info.get('title') or '', song_info.get('artist') or '',
+                     song_info.get('album') or '', lyrics, artist_folder, file_path))
+    return rows, skipped
+
+
+def reindex_directory(save_dir, workers=None, log_func=print):
+    """
+    重建保存目录的全文索引：艺人文件夹由多个进程并行读取，合并语料库直接顺序读取
+
+    Returns:
+        (索引数, 跳过数)
+    """
+    workers = workers or APIConfig.SEARCH_REINDEX_WORKERS
+    index = get_search_index(save_dir)
+    index.clear()
+
+    indexed = 0
+    skipped = 0
+    artist_paths = [os.path.join(save_dir, name) for name in sorted(os.listdir(save_dir))
+                    if is_artist_folder(name) and os.path.isdir(os.path.join(save_dir, name))]
+
+    if artist_paths:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(_read_artist_folder, path): path for path in artist_paths}
+            for future in as_completed(futures):
+                try:
+                    rows, folder_skipped = future.result()
+                except Exception as e:
+                    log_func(f"[SearchIndex] 读取 {os.path.basename(futures[future])} 失败: {e}")
+                    continue
+                index.add_many(rows)
+                indexed += len(rows)
+                skipped += folder_skipped
+
+    if os.path.exists(os.path.join(save_dir, CORPUS_DIR_NAME, 'index.jsonl')):
+        from corpus_reader import CorpusReader
+
+        with CorpusReader(save_dir) as reader:
+            batch = []
+            for record in reader.iter_records():
+                batch.append((int(record['id']), record.get('title') or '', record.get('artist') or '',
+                              record.get('album') or '', record.get('lyrics') or '',
+                              record.get('artist_folder') or '', ''))
+                if len(batch) >= 500:
+                    index.add_many(batch)
+                    indexed += len(batch)
+                    batch = []
+            index.add_many(batch)
+            indexed += len(batch)
+
+    index.commit()
+    index.optimize()
+    log_func(f"[SearchIndex] 索引完成: {indexed} 首，跳过 {skipped} 个无法确定歌曲ID的文件")
+    return indexed, skipped
+
+
+# 每个保存目录一个索引实例
+_search_indexes = {}
+_search_indexes_lock = threading.Lock()
+
+
+def get_search_index(save_dir):
+    """获取保存目录对应的全文索引实例"""
+    key = os.path.normcase(os.path.abspath(save_dir))
+    with _search_indexes_lock:
+        if key not in _search_indexes:
+            _search_indexes[key] = LyricsSearchIndex(os.path.join(save_dir, INDEX_FILE_NAME))
+        return _search_indexes[key]
+
+
+def flush_search_indexes():
+    """提交所有已打开索引的写入"""
+    with _search_indexes_lock:
+        indexes = list(_search_indexes.values())
+    for index in indexes:
+        index.commit()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="歌词全文搜索")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    search_parser = subparsers.add_parser('search', help="搜索歌词")
+    search_parser.add_argument('save_dir', help="保存目录")
+    search_parser.add_argument('query', help="查询文本")
+    search_parser.add_argument('--artist', help="按艺人过滤")
+    search_parser.add_argument('--album', help="按专辑过滤")
+    search_parser.add_argument('--phrase', action='store_true', help="整体作为短语匹配")
+    search_parser.add_argument('--prefix', action='store_true', help="按前缀匹配")
+    search_parser.add_argument('--limit', type=int, default=20)
+
+    reindex_parser = subparsers.add_parser('reindex', help="重建保存目录的索引")
+    reindex_parser.add_argument('save_dir', help="保存目录")
+    reindex_parser.add_argument('--workers', type=int, default=None, help="读取文件的进程数")
+
+    args = parser.parse_args()
+
+    if args.command == 'reindex':
+        reindex_directory(args.save_dir, args.workers)
+    else:
+        try:
+            results = get_search_index(args.save_dir).search(args.query, artist=args.artist, album=args.album,
+                                                             limit=args.limit, phrase=args.phrase,
+                                                             prefix=args.prefix)
+        except ValueError as e:
+            print(f"{e}（可加 --phrase 或 --prefix 按普通文本搜索）")
+            raise SystemExit(1)
+        for result in results:
+            print(f"{result['score']:8.3f}  {result['artist']} - {result['title']} [{result['song_id']}]")
+            print(f"          {result['snippet']}")
+        print(f"共 {len(results)} 条结果")
@@ -0,0 +1,236 @@
+"""
+歌词来源
+get_song_lyrics 按 APIConfig.LYRICS_SOURCES 的顺序尝试各个来源，先用最轻量的来源，
+结果为空或看起来不完整时换下一个来源；歌曲列表已标明纯音乐或歌词未发布、
+或来源返回的是这类占位文字时不再尝试其他来源，直接记录到负缓存：
+    embed   歌曲嵌入脚本 /songs/<id>/embed.js（只含歌词，几KB，只需要歌曲ID；保留原始页面时跳过）
+    page    完整歌词页面（需要歌曲列表中的URL，经过流式下载和解析进程池）
+    search  lyricsgenius 按标题和艺人搜索后读取页面（原有逻辑，会记录负缓存）
+每个来源分别统计成功率、下载字节数和耗时
+"""
+
+import time
+import threading
+
+from api_config import APIConfig
+from lyrics_parser import parse_embed_js
+from parse_pool import PendingLyrics
+from song_outcome_cache import get_outcome_cache, OUTCOME_NO_LYRICS, OUTCOME_NOT_FOUND
+
+
+SOURCE_EMBED = 'embed'
+SOURCE_PAGE = 'page'
+SOURCE_SEARCH = 'search'
+
+SOURCE_LABELS = {
+    SOURCE_EMBED: '嵌入脚本',
+    SOURCE_PAGE: '歌词页面',
+    SOURCE_SEARCH: '搜索',
+}
+
+
+class SourcedSong:
+    """来源获取到的歌词，提供 save_song_lyrics 用到的 Song 属性"""
+
+    def __init__(self, song_id, title, url, lyrics, source):
+        self.id = song_id
+        self.title = title
+        self.url = url
+        self.lyrics = lyrics
+        self.source = source
+
+
+def placeholder_marker(lyrics):
+    """歌词是占位文字（纯音乐、尚未发布）时返回匹配到的标记，否则返回None"""
+    if not lyrics or isinstance(lyrics, PendingLyrics):
+        return None
+    lowered = lyrics.strip().lower()
+    for marker in APIConfig.LYRICS_INCOMPLETE_MARKERS:
+        if marker in lowered:
+            return marker
+    return None
+
+
+def looks_complete(lyrics):
+    """歌词看起来是否完整（太短或是占位文字时换下一个来源）"""
+    if not lyrics:
+        return False
+    if isinstance(lyrics, PendingLyrics):
+        # 解析进程池的结果稍后返回
+        return True
+    if len(lyrics.strip()) < APIConfig.LYRICS_SOURCE_MIN_CHARS:
+        return False
+    return placeholder_marker(lyrics) is None
+
+
+def known_no_lyrics(song_info):
+    """歌曲列表中的信息已表明没有歌词时返回原因（incomplete 的歌曲仍有部分歌词）"""
+    if not song_info:
+        return None
+    if song_info.get('instrumental'):
+        return "instrumental"
+    if song_info.get('lyrics_state') == 'unreleased':
+        return "lyrics_state=unreleased"
+    return None
+
+
+class EmbedSource:
+    """
+    歌曲嵌入脚本
+    各来源的 fetch 返回 (歌曲对象或None, 下载字节数)，来源不适用时返回None
+    """
+
+    name = SOURCE_EMBED
+
+    def fetch(self, engine, song_id, song_title, artist_name, song_url):
+        if engine.keep_raw_pages.get():
+            # 嵌入脚本不是歌词页面，保留原始页面时改用页面来源
+            return None
+        genius = engine.genius
+        response = genius._session.get(f"{APIConfig.WEB_BASE_URL}/songs/{song_id}/embed.js", timeout=genius.timeout)
+        size = len(response.content or b'')
+        if response.status_code == 429:
+            raise Exception(f"429 Too Many Requests: embed.js ({song_id})")
+        if response.status_code != 200:
+            return None, size
+        lyrics = parse_embed_js(response.text, genius.remove_section_headers)
+        return SourcedSong(song_id, song_title, song_url, lyrics, self.name), size
+
+
+class PageSource:
+    """完整歌词页面（lyricsgenius 客户端的 lyrics 方法，已替换为自带的解析器）"""
+
+    name = SOURCE_PAGE
+
+    def fetch(self, engine, song_id, song_title, artist_name, song_url):
+        if not song_url:
+            # 失败队列中的条目没有URL
+            return None
+        lyrics = engine.genius.lyrics(song_url=song_url)
+        return SourcedSong(song_id, song_title, song_url, lyrics, self.name), engine.last_page_size()
+
+
+class SearchSource:
+    """按标题和艺人搜索（原有逻辑）"""
+
+    name = SOURCE_SEARCH
+
+    def fetch(self, engine, song_id, song_title, artist_name, song_url):
+        song = engine.search_song_lyrics(song_id, song_title, artist_name)
+        return song, engine.last_page_size() if song else 0
+
+
+SOURCE_CLASSES = {
+    SOURCE_EMBED: EmbedSource,
+    SOURCE_PAGE: PageSource,
+    SOURCE_SEARCH: SearchSource,
+}
+
+
+class LyricsSourceChain:
+    """
+    按顺序尝试的歌词来源（单例模式）
+    所有任务共享来源统计
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        """单例模式实现"""
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+                cls._instance._init_chain()
+            return cls._instance
+
+    def _init_chain(self):
+        """按配置创建来源"""
+        names = [name for name in APIConfig.LYRICS_SOURCES if name in SOURCE_CLASSES]
+        if SOURCE_SEARCH not in names:
+            # 搜索是最后的兜底，总是保留
+            names.append(SOURCE_SEARCH)
+        self.sources = [SOURCE_CLASSES[name]() for name in names]
+        self.lock = threading.Lock()
+        self.stats = {name: {'attempts': 0, 'successes': 0, 'incomplete': 0, 'errors': 0, 'bytes': 0, 'seconds': 0.0}
+                      for name in names}
+
+    def _record(self, name, outcome, size, seconds):
+        with self.lock:
+            stats = self.stats[name]
+            stats['attempts'] += 1
+            stats[outcome] += 1
+            stats['bytes'] += size
+            stats['seconds'] += seconds
+
+    def fetch(self, engine, song_id, song_title, artist_name, song_url=None, song_info=None):
+        """
+        依次尝试各个来源，返回第一个完整的结果
+
+        Args:
+            song_info: 歌曲列表中的歌曲信息（含 instrumental、lyrics_state），失败队列重试时为None
+
+        Returns:
+            带 lyrics、title、url 属性的歌曲对象，所有来源都没有歌词时返回None（原因已记录到负缓存）
+
+        Raises:
+            429 错误直接抛出；最后一个来源的其他异常也会抛出
+        """
+        reason = known_no_lyrics(song_info)
+        if reason:
+            get_outcome_cache().record(song_id, OUTCOME_NO_LYRICS, reason, song_title, artist_name)
+            return None
+
+        for position, source in enumerate(self.sources):
+            is_last = position == len(self.sources) - 1
+            start = time.time()
+            try:
+                result = source.fetch(engine, song_id, song_title, artist_name, song_url)
+            except Exception as e:
+                self._record(source.name, 'errors', 0, time.time() - start)
+                if is_last or "429" in str(e):
+                    raise
+                continue
+            if result is None:
+                # 该来源不适用于这首歌，不计入统计
+                continue
+
+            song, size = result
+            complete = song is not None and looks_complete(song.lyrics)
+            self._record(source.name, 'successes' if complete else 'incomplete', size, time.time() - start)
+            if complete or is_last:
+                return song
+
+            marker = placeholder_marker(song.lyrics) if song is not None else None
+            if marker:
+                # 纯音乐或歌词未发布的占位文字，其他来源也不会有歌词
+                get_outcome_cache().record(song_id, OUTCOME_NO_LYRICS, f"{source.name}: {marker}", song_title,
+                                           artist_name)
+                return None
+
+        get_outcome_cache().record(song_id, OUTCOME_NOT_FOUND, "所有歌词来源均不适用", song_title, artist_name)
+        return None
+
+    def get_status(self):
+        """每个来源的成功率、平均字节数和平均耗时"""
+        with self.lock:
+            status = {}
+            for name, stats in self.stats.items():
+                attempts = stats['attempts']
+                status[name] = dict(stats,
+                                    success_rate=stats['successes'] / attempts if attempts else 0,
+                                    avg_bytes=stats['bytes'] / attempts if attempts else 0,
+                                    avg_ms=stats['seconds'] * 1000 / attempts if attempts else 0)
+            return status
+
+
+# 全局实例
+_global_lyrics_sources = None
+
+
+def get_lyrics_sources():
+    """获取全局歌词来源实例"""
+    global _global_lyrics_sources
+    if _global_lyrics_sources is None:
+        _global_lyrics_sources = LyricsSourceChain()
+    return _global_lyrics_sources
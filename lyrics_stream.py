@@ -0,0 +1,202 @@
+"""
+歌词页面流式下载
+歌词页面中歌词容器之后还有推荐、评论、脚本等大量HTML。开启 APIConfig.LYRICS_STREAMING 后逐块读取页面，
+边读边扫描：第一个歌词容器所在的父元素结束（即最后一个歌词容器之后）就关闭连接，
+只把已读取的部分交给解析器，结果与读取完整页面相同；页面中没有歌词容器时仍读取完整页面（需要内嵌状态）
+"""
+
+import re
+import time
+import codecs
+import threading
+
+from requests.exceptions import Timeout
+
+from api_config import APIConfig
+from lyrics_parser import TOKEN_PATTERN, VOID_ELEMENTS, RAW_TEXT_ELEMENTS, _find_container
+
+
+# 每次重新查找歌词容器时回退的字符数（属性可能跨越两个数据块）
+CONTAINER_LOOKBACK = 4096
+
+
+class LyricsRegionScanner:
+    """逐块接收页面文本，判断所有歌词容器是否都已读取完整"""
+
+    def __init__(self):
+        self.buffer = ''
+        self.search_pos = 0
+        self.scan_pos = None  # 第一个歌词容器开始标签之后已扫描到的位置
+        self.stack = ['div']  # 第一个歌词容器及其中打开的元素
+        self.end_pos = None  # 歌词区域结束的位置
+
+    def feed(self, text):
+        """
+        追加一块页面文本
+
+        Returns:
+            歌词区域是否已经结束
+        """
+        self.buffer += text
+        if self.scan_pos is None:
+            self.scan_pos = _find_container(self.buffer, self.search_pos)
+            if self.scan_pos is None:
+                self.search_pos = max(0, len(self.buffer) - CONTAINER_LOOKBACK)
+                return False
+        return self._scan()
+
+    def _scan(self):
+        """从上次的位置继续扫描标签，遇到关闭歌词容器父元素的 </div> 时结束"""
+        buffer = self.buffer
+        pos = self.scan_pos
+        while True:
+            match = TOKEN_PATTERN.search(buffer, pos)
+            if not match:
+                # 末尾可能是不完整的标签，下次从它开始
+                last_tag = buffer.rfind('<', pos)
+                self.scan_pos = last_tag if last_tag >= 0 else len(buffer)
+                return False
+            token = match.group(0)
+            if token.startswith('<!--') and not token.endswith('>'):
+                self.scan_pos = match.start()
+                return False
+            name = match.group(2)
+            if name is None:
+                pos = match.end()
+                continue
+
+            name = name.lower()
+            if match.group(1):
+                for depth in range(len(self.stack) - 1, -1, -1):
+                    if self.stack[depth] == name:
+                        del self.stack[depth:]
+                        break
+                else:
+                    if name == 'div':
+                        # 关闭的是第一个歌词容器之前打开的元素（歌词容器的父元素）
+                        self.end_pos = match.start()
+                        return True
+                pos = match.end()
+                continue
+
+            if name in RAW_TEXT_ELEMENTS:
+                close = re.compile(rf'</{name}\s*>', re.I).search(buffer, match.end())
+                if not close:
+                    self.scan_pos = match.start()
+                    return False
+                pos = close.end()
+                continue
+            if name not in VOID_ELEMENTS and not match.group(3).rstrip().endswith('/'):
+                self.stack.append(name)
+            pos = match.end()
+
+    def page(self):
+        """读取到的页面（歌词区域结束时截断到结束位置）"""
+        return self.buffer if self.end_pos is None else self.buffer[:self.end_pos]
+
+
+class StreamStats:
+    """
+    流式下载统计（单例模式）
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        """单例模式实现"""
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+                cls._instance._init_stats()
+            return cls._instance
+
+    def _init_stats(self):
+        self.lock = threading.Lock()
+        self.stats = {'pages': 0, 'stopped_early': 0, 'bytes_read': 0, 'bytes_saved': 0, 'size_unknown': 0}
+
+    def record(self, bytes_read, bytes_saved, stopped_early):
+        """记录一个页面；bytes_saved 为None表示响应没有 Content-Length，无法计算"""
+        with self.lock:
+            self.stats['pages'] += 1
+            self.stats['bytes_read'] += bytes_read
+            if stopped_early:
+                self.stats['stopped_early'] += 1
+            if bytes_saved is None:
+                self.stats['size_unknown'] += 1
+            else:
+                self.stats['bytes_saved'] += bytes_saved
+
+    def get_status(self):
+        with self.lock:
+            status = dict(self.stats)
+        status['saved_per_page'] = status['bytes_saved'] / status['pages'] if status['pages'] else 0
+        return status
+
+
+# 全局实例
+_global_stream_stats = None
+
+
+def get_stream_stats():
+    """获取全局流式下载统计实例"""
+    global _global_stream_stats
+    if _global_stream_stats is None:
+        _global_stream_stats = StreamStats()
+    return _global_stream_stats
+
+
+def _bytes_read(response, decoded_bytes):
+    """实际从连接读取的字节数（压缩传输时为压缩后的大小）"""
+    tell = getattr(response.raw, 'tell', None)
+    if tell is not None:
+        try:
+            return tell()
+        except Exception:
+            pass
+    return decoded_bytes
+
+
+def fetch_page_streamed(genius, path):
+    """
+    流式获取歌词页面（请求方式与 Genius._make_request(path, web=True) 相同，包括超时重试和请求间隔）
+
+    Returns:
+        页面HTML，歌词区域之后的部分可能没有读取
+    """
+    uri = genius.WEB_ROOT + path
+    response = None
+    tries = 0
+    while response is None:
+        tries += 1
+        try:
+            response = genius._session.request('GET', uri, timeout=genius.timeout, stream=True)
+        except Timeout as e:
+            if tries > genius.retries:
+                raise Timeout(f"Request timed out:\n{e}") from e
+        time.sleep(genius.sleep_time)
+
+    try:
+        if response.status_code != 200:
+            return response.text
+
+        decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+        scanner = LyricsRegionScanner()
+        decoded_bytes = 0
+        stopped_early = False
+        for chunk in response.iter_content(chunk_size=APIConfig.LYRICS_STREAM_CHUNK):
+            decoded_bytes += len(chunk)
+            if scanner.feed(decoder.decode(chunk)):
+                stopped_early = True
+                break
+        if not stopped_early:
+            scanner.feed(decoder.decode(b'', final=True))
+
+        bytes_read = _bytes_read(response, decoded_bytes)
+        content_length = response.headers.get('Content-Length', '')
+        bytes_saved = max(0, int(content_length) - bytes_read) if content_length.isdigit() else None
+        get_stream_stats().record(bytes_read, bytes_saved, stopped_early)
+        return scanner.page()
+    finally:
+        # 提前结束时连接上还有未读取的数据，关闭后不放回连接池
+        response.close()
@@ -0,0 +1,245 @@
+"""
+后台歌词写入器
+抓取线程只把待写内容放入有界队列，由后台线程写入临时文件后原子重命名，
+崩溃时不会留下被误认为"已存在"的半截歌词文件
+"""
+
+import os
+import time
+import queue
+import threading
+
+from api_config import APIConfig
+
+
+# 持久化策略
+DURABILITY_NONE = 'none'  # 只保证原子重命名，不主动fsync（最快）
+DURABILITY_BATCH = 'batch'  # 每个文件fsync，目录在一批写入后统一fsync
+DURABILITY_FULL = 'full'  # 每个文件及其所在目录都立即fsync（最慢）
+
+TEMP_SUFFIX = '.tmp'
+
+
+def fsync_directory(directory):
+    """fsync目录，使重命名操作持久化（Windows不支持对目录fsync，直接跳过）"""
+    if os.name == 'nt':
+        return
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+
+
+def atomic_write_text(path, text, fsync_file=False):
+    """先写入同目录下的临时文件，再原子重命名为目标文件"""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}{TEMP_SUFFIX}"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+            if fsync_file:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _pid_alive(pid):
+    """进程是否仍在运行（Windows 上 os.kill 会结束进程，无法判断时视为仍在运行）"""
+    if os.name == 'nt':
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+
+def _is_stale_temp(path, name, now):
+    """
+    是否为遗留的临时文件：超过 APIConfig.TEMP_FILE_MAX_AGE 秒未修改，或写入它的进程已经退出。
+    同一文件夹可能有其他任务或分块正在写入，它们的临时文件不能删除
+    """
+    try:
+        if now - os.path.getmtime(path) >= APIConfig.TEMP_FILE_MAX_AGE:
+            return True
+    except OSError:
+        return False
+    # 临时文件名为 <目标文件>.<pid>.<线程ID>.tmp
+    parts = name[:-len(TEMP_SUFFIX)].rsplit('.', 2)
+    if len(parts) == 3 and parts[1].isdigit():
+        pid = int(parts[1])
+        return pid != os.getpid() and not _pid_alive(pid)
+    return False
+
+
+def cleanup_temp_files(directory):
+    """删除上次崩溃遗留的临时文件（正在写入的临时文件保留），返回删除数量"""
+    removed = 0
+    now = time.time()
+    try:
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if name.endswith(TEMP_SUFFIX) and _is_stale_temp(path, name, now):
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    pass
+    except OSError:
+        pass
+    return removed
+
+
+class LyricsWriter:
+    """
+    后台写入线程（单例模式）
+    所有任务共享一个写入队列
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        """单例模式实现"""
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+                cls._instance._init_writer()
+            return cls._instance
+
+    def _init_writer(self):
+        """初始化写入器"""
+        self.durability = APIConfig.WRITE_DURABILITY
+        self.fsync_batch_size = APIConfig.WRITER_FSYNC_BATCH
+
+        self.queue = queue.Queue(maxsize=APIConfig.WRITER_QUEUE_SIZE)
+        self.pending_dirs = set()
+        self.batch_count = 0
+
+        self.stats = {
+            'files_written': 0,
+            'bytes_written': 0,
+            'errors': 0,
+            'dir_fsyncs': 0
+        }
+        self.stats_lock = threading.Lock()
+
+        self.thread = threading.Thread(target=self._run, name="LyricsWriter", daemon=True)
+        self.thread.start()
+
+    def submit(self, path, text, on_error=None, on_done=None, write_func=None):
+        """
+        提交一个写入任务，队列满时阻塞等待（背压）
+
+        Args:
+            path: 目标文件路径
+            text: 文件内容
+            on_error: 写入失败时的回调，参数为 (path, exception)
+            on_done: 写入成功后的回调，参数为 path
+            write_func: 代替默认原子写入的函数，参数为 (path, text, fsync_file)
+        """
+        self.queue.put((path, text, on_error, on_done, write_func))
+
+    def flush(self, timeout=None):
+        """等待队列中的所有写入完成"""
+        if timeout is None:
+            self.queue.join()
+            return True
+
+        # Queue.join 不支持超时，在辅助线程中等待
+        deadline = threading.Event()
+        waiter = threading.Thread(target=lambda: (self.queue.join(), deadline.set()), daemon=True)
+        waiter.start()
+        return deadline.wait(timeout)
+
+    def _run(self):
+        """写入线程主循环"""
+        while True:
+            try:
+                item = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                self._sync_pending_dirs()
+                continue
+
+            path, text, on_error, on_done, write_func = item
+            try:
+                self._write(path, text, write_func)
+                if on_done:
+                    on_done(path)
+            except Exception as e:
+                with self.stats_lock:
+                    self.stats['errors'] += 1
+                if on_error:
+                    try:
+                        on_error(path, e)
+                    except Exception:
+                        pass
+                else:
+                    print(f"[LyricsWriter] 写入失败 {path}: {e}")
+            finally:
+                # 队列已空时立即同步目录，保证 flush 返回前目录项已持久化
+                if self.queue.qsize() == 0 or self.batch_count >= self.fsync_batch_size:
+                    self._sync_pending_dirs()
+                self.queue.task_done()
+
+    def _write(self, path, text, write_func=None):
+        """写入单个文件"""
+        fsync_file = self.durability in (DURABILITY_BATCH, DURABILITY_FULL)
+        (write_func or atomic_write_text)(path, text, fsync_file=fsync_file)
+
+        directory = os.path.dirname(path) or '.'
+        if self.durability == DURABILITY_FULL:
+            fsync_directory(directory)
+            with self.stats_lock:
+                self.stats['dir_fsyncs'] += 1
+        elif self.durability == DURABILITY_BATCH:
+            self.pending_dirs.add(directory)
+            self.batch_count += 1
+
+        with self.stats_lock:
+            self.stats['files_written'] += 1
+            self.stats['bytes_written'] += len(text.encode('utf-8'))
+
+    def _sync_pending_dirs(self):
+        """批量fsync本批写入涉及的目录"""
+        if not self.pending_dirs:
+            return
+        dirs = list(self.pending_dirs)
+        self.pending_dirs.clear()
+        self.batch_count = 0
+        for directory in dirs:
+            fsync_directory(directory)
+        with self.stats_lock:
+            self.stats['dir_fsyncs'] += len(dirs)
+
+    def get_status(self):
+        """获取写入器状态"""
+        with self.stats_lock:
+            return {
+                **self.stats,
+                'pending': self.queue.qsize(),
+                'durability': self.durability
+            }
+
+
+# 全局实例
+_global_lyrics_writer = None
+
+
+def get_lyrics_writer():
+    """获取全局歌词写入器实例"""
+    global _global_lyrics_writer
+    if _global_lyrics_writer is None:
+        _global_lyrics_writer = LyricsWriter()
+    return _global_lyrics_writer
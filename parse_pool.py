@@ -0,0 +1,175 @@
+"""
+歌词解析进程池
+开启后（APIConfig.PARSE_WORKERS > 0），抓取线程拿到歌词页面后只把页面字节交给进程池，
+解析和 clean_lyrics 在工作进程中执行，结果（清理后的歌词）回到主进程后再写入；
+抓取线程不等待解析结果，解析不再受 GIL 限制，可以用满多个CPU核
+"""
+
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from api_config import APIConfig
+from lyrics_parser import parse_page, clean_lyrics
+
+
+def parse_and_clean(page_bytes, remove_section_headers=False, parser=None):
+    """
+    解码、解析并清理一个歌词页面（在工作进程中执行）
+
+    Returns:
+        清理后的歌词，页面中没有歌词时返回None
+    """
+    lyrics = parse_page(page_bytes.decode('utf-8', errors='replace'), remove_section_headers, parser)
+    return clean_lyrics(lyrics) if lyrics else None
+
+
+class PendingLyrics(str):
+    """
+    解析结果返回前 Song.lyrics 的占位值：内容为空但判断为真（lyricsgenius 只检查歌词是否为空），
+    清理后的歌词通过 future 获取
+    """
+
+    def __new__(cls, future):
+        pending = super().__new__(cls, '')
+        pending.future = future
+        return pending
+
+    def __bool__(self):
+        return True
+
+
+class ParsePool:
+    """
+    解析进程池（单例模式）
+    所有任务共享一组工作进程
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        """单例模式实现"""
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+                cls._instance._init_pool()
+            return cls._instance
+
+    def _init_pool(self):
+        """初始化进程池（工作进程在首次提交时启动）"""
+        self.workers = APIConfig.PARSE_WORKERS
+        if self.workers < 0:
+            self.workers = os.cpu_count() or 1
+        self.executor = None
+        # 等待解析的页面数上限，防止解析跟不上时页面堆积在内存中
+        self.slots = threading.BoundedSemaphore(max(1, APIConfig.PARSE_MAX_PENDING))
+        self.pending = {}  # Future -> 结果返回后要执行的回调
+        self.lock = threading.Lock()
+        self.idle = threading.Condition(self.lock)
+        self.stats = {'submitted': 0, 'parsed': 0, 'no_lyrics': 0, 'errors': 0, 'bytes_in': 0, 'bytes_out': 0}
+
+    def is_enabled(self):
+        return self.workers > 0
+
+    def submit(self, page, remove_section_headers=False):
+        """
+        提交一个页面，立即返回 Future（等待解析的页面达到上限时才阻塞）
+
+        Returns:
+            结果为清理后歌词（或None）的 Future
+        """
+        page_bytes = page.encode('utf-8')
+        self.slots.acquire()
+        try:
+            with self.lock:
+                if self.executor is None:
+                    self.executor = ProcessPoolExecutor(max_workers=self.workers)
+                    print(f"[ParsePool] 启动 {self.workers} 个解析进程")
+                future = self.executor.submit(parse_and_clean, page_bytes, remove_section_headers,
+                                              APIConfig.LYRICS_PARSER)
+                self.pending[future] = []
+                self.stats['submitted'] += 1
+                self.stats['bytes_in'] += len(page_bytes)
+        except Exception:
+            self.slots.release()
+            raise
+        future.add_done_callback(self._on_done)
+        return future
+
+    def parse_later(self, page, remove_section_headers=False):
+        """提交页面并返回 PendingLyrics（可直接作为 Genius.lyrics 的返回值）"""
+        return PendingLyrics(self.submit(page, remove_section_headers))
+
+    def _on_done(self, future):
+        """解析完成（在进程池的管理线程中执行）：更新统计并执行回调，回调执行完才算完成"""
+        self.slots.release()
+        with self.lock:
+            if future.cancelled() or future.exception() is not None:
+                self.stats['errors'] += 1
+            elif future.result() is None:
+                self.stats['no_lyrics'] += 1
+            else:
+                self.stats['parsed'] += 1
+                self.stats['bytes_out'] += len(future.result().encode('utf-8'))
+
+        while True:
+            with self.lock:
+                callbacks = self.pending.get(future)
+                if not callbacks:
+                    self.pending.pop(future, None)
+                    if not self.pending:
+                        self.idle.notify_all()
+                    return
+                self.pending[future] = []
+            for callback in callbacks:
+                try:
+                    callback(future)
+                except Exception as e:
+                    print(f"[ParsePool] 回调出错: {e}")
+
+    def then(self, future, callback):
+        """
+        结果返回后调用 callback(future)；已经完成时立即在当前线程调用。
+        drain 会等待回调执行完
+        """
+        with self.lock:
+            callbacks = self.pending.get(future)
+            if callbacks is not None:
+                callbacks.append(callback)
+                return
+        callback(future)
+
+    def drain(self, timeout=None):
+        """等待所有已提交的页面解析完成，返回是否全部完成"""
+        with self.lock:
+            return self.idle.wait_for(lambda: not self.pending, timeout)
+
+    def shutdown(self):
+        """关闭工作进程"""
+        with self.lock:
+            executor, self.executor = self.executor, None
+            futures = list(self.pending)
+        if executor is not None:
+            # 取消尚未开始的解析（cancel_futures 参数需要 Python 3.9）；
+            # 取消会立即执行完成回调，回调需要获取 self.lock，所以在锁外取消
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    def get_status(self):
+        """进程池状态"""
+        with self.lock:
+            return dict(self.stats, workers=self.workers, pending=len(self.pending))
+
+
+# 全局实例
+_global_parse_pool = None
+
+
+def get_parse_pool():
+    """获取全局解析进程池实例"""
+    global _global_parse_pool
+    if _global_parse_pool is None:
+        _global_parse_pool = ParsePool()
+    return _global_parse_pool
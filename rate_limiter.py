@@ -3,12 +3,17 @@
 所有Genius API请求都必须通过这个限制器来管理请求频率
 """
 
+import os
 import threading
 import time
 import requests
 import json
 from datetime import datetime, timedelta
 
+from proxy_pool import get_proxy_pool
+from latency_tracker import get_latency_tracker, endpoint_of
+from single_flight import get_single_flight, request_key
+
 
 class APIRateLimiter:
     """
@@ -143,9 +148,9 @@ class APIRateLimiter:
             cutoff_time = current_time - 120
             self.request_history = [t for t in self.request_history if t > cutoff_time]
 
-            # 如果请求历史为空，不需要等待
+            # 如果请求历史为空，只需考虑已预占的时间槽
             if not self.request_history:
-                return 0
+                return max(0, self.min_interval - (current_time - self.last_request_time))
 
             # 计算平均请求间隔
             if len(self.request_history) >= 2:
@@ -181,7 +186,10 @@ class APIRateLimiter:
 
     def wait_if_needed(self):
         """如果需要等待，则等待"""
-        wait_time = self._calculate_wait_time()
+        with self.lock:
+            wait_time = self._calculate_wait_time()
+            # 预占发送时间槽，避免多个线程在同一时刻同时放行
+            self.last_request_time = max(self.last_request_time, time.time() + wait_time)
 
         if wait_time > 0:
             # 记录等待日志（避免频繁打印）
@@ -239,12 +247,12 @@ class APIRateLimiter:
                                 kwargs['headers'] = headers
                                 print(f"[RateLimiter] 切换API密钥: {current_key[:10]}... -> {new_key[:10]}...")
 
-                # 执行请求
-                response = request_func(*args, **kwargs)
+                # 执行请求（配置了代理时按密钥固定出口，并受该出口的速率预算约束）
+                response = self._send(request_func, args, kwargs)
 
                 # 更新状态
                 with self.lock:
-                    self.last_request_time = current_time
+                    self.last_request_time = max(self.last_request_time, current_time)
                     self.request_history.append(current_time)
                     self.total_requests += 1
                     self.last_headers = dict(response.headers)
@@ -316,6 +324,49 @@ class APIRateLimiter:
 
         raise Exception(f"请求失败，已重试{max_retries}次")
 
+    def _get_hedge_key(self, current_key):
+        """对冲请求使用的密钥：优先选择另一个健康的密钥，没有时沿用当前密钥（换一个连接）"""
+        with self.lock:
+            for key in self.api_keys:
+                if key != current_key and self.key_failures.get(key, 0) < 3:
+                    return key
+        return current_key
+
+    def _send(self, request_func, args, kwargs):
+        """
+        发送一次请求：超时时间按该端点的延迟分位数调整，
+        超过 p95 仍未返回时可用另一个密钥/连接发出对冲请求（见 latency_tracker.py）
+        """
+        tracker = get_latency_tracker()
+        endpoint = endpoint_of(args[0] if args else kwargs.get('url', ''))
+        if 'timeout' in kwargs:
+            kwargs['timeout'] = tracker.timeout_for(endpoint, kwargs['timeout'])
+
+        headers = kwargs.get('headers', {})
+        current_key = headers.get('Authorization', '')[7:] or None
+
+        def send(request_kwargs, sticky_key):
+            return get_proxy_pool().request(request_func, *args, sticky_key=sticky_key, **request_kwargs)
+
+        backup = None
+        if current_key:
+            backup_key = self._get_hedge_key(current_key)
+            backup_kwargs = dict(kwargs, headers=dict(headers, Authorization=f'Bearer {backup_key}'))
+
+            def send_backup():
+                # 对冲请求同样占用速率限制名额并计入请求记录
+                with tracker.waiting():
+                    self.wait_if_needed()
+                with self.lock:
+                    self.request_history.append(time.time())
+                    self.total_requests += 1
+                # 对冲请求不固定出口，配置了代理时会选择当前最空闲的出口
+                return send(backup_kwargs, None)
+
+            backup = send_backup
+
+        return tracker.call(endpoint, lambda: send(kwargs, current_key), backup, kwargs.get('timeout'))
+
     def get_status(self):
         """获取限制器状态"""
         with self.lock:
@@ -359,15 +410,19 @@ def get_rate_limiter():
 
 # 兼容性函数
 def make_api_request(request_func, *args, **kwargs):
-    """兼容性函数，直接调用全局限制器的make_request"""
+    """
+    兼容性函数，调用全局限制器的make_request；
+    使用同一密钥的相同GET请求正在进行时共用它的响应，不再占用速率限制名额（见 single_flight.py）
+    """
     limiter = get_rate_limiter()
-    return limiter.make_request(request_func, *args, **kwargs)
+    method = getattr(request_func, '__name__', '').upper()
+    key = request_key(method, args[0] if args else kwargs.get('url'), kwargs.get('params'), kwargs.get('headers'))
+    return get_single_flight().do(key, lambda: limiter.make_request(request_func, *args, **kwargs))
 
 
 if __name__ == "__main__":
     # 测试代码
     import sys
-    import os
 
     sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
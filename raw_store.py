@@ -0,0 +1,111 @@
+"""
+原始歌词页面存储
+开启"保留原始页面"后，每首歌下载到的歌词页面HTML连同歌曲信息一起 gzip 压缩保存到
+<保存路径>/_raw/<艺人文件夹>/<歌曲ID>.json.gz；改进解析或清理规则后用 reprocess.py 离线重新生成歌词，
+无需重新下载
+"""
+
+import os
+import gzip
+import json
+import time
+import threading
+
+from lyrics_writer import get_lyrics_writer, TEMP_SUFFIX
+
+
+RAW_DIR_NAME = '_raw'
+RAW_SUFFIX = '.json.gz'
+
+
+def write_gzip_text(path, text, fsync_file=False):
+    """gzip 压缩写入临时文件后原子重命名（签名与 atomic_write_text 相同，可作为 write_func）"""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}{TEMP_SUFFIX}"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(gzip.compress(text.encode('utf-8'), compresslevel=6))
+            if fsync_file:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def read_raw_record(path):
+    """读取一条原始记录"""
+    with open(path, 'rb') as f:
+        return json.loads(gzip.decompress(f.read()).decode('utf-8'))
+
+
+class RawPageStore:
+    """单个保存目录下的原始页面存储"""
+
+    def __init__(self, root_dir):
+        self.root_dir = root_dir
+        self.raw_dir = os.path.join(root_dir, RAW_DIR_NAME)
+
+    def path_for(self, artist_folder, song_id):
+        return os.path.join(self.raw_dir, artist_folder, f"{song_id}{RAW_SUFFIX}")
+
+    def has(self, artist_folder, song_id):
+        return os.path.exists(self.path_for(artist_folder, song_id))
+
+    def put(self, song_info, html, artist_folder, index, total, artist_name, on_error=None):
+        """
+        保存一首歌的原始页面（交给后台写入线程）
+
+        Args:
+            song_info: 歌曲列表中的条目
+            html: 歌词页面HTML
+            artist_folder: 艺人文件夹名称
+            index: 歌曲序号（决定重新处理时的文件编号）
+        """
+        record = {
+            'song_id': song_info['id'],
+            'song_info': song_info,
+            'artist_name': artist_name,
+            'artist_folder': artist_folder,
+            'index': index,
+            'total': total,
+            'fetched_at': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'html': html
+        }
+        path = self.path_for(artist_folder, song_info['id'])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        get_lyrics_writer().submit(path, json.dumps(record, ensure_ascii=False), on_error=on_error,
+                                   write_func=write_gzip_text)
+
+    def artist_folders(self):
+        """有原始页面的艺人文件夹"""
+        if not os.path.isdir(self.raw_dir):
+            return []
+        return sorted(name for name in os.listdir(self.raw_dir) if os.path.isdir(os.path.join(self.raw_dir, name)))
+
+    def iter_paths(self, artist_folders=None):
+        """遍历原始记录文件路径"""
+        for folder in artist_folders or self.artist_folders():
+            folder_path = os.path.join(self.raw_dir, folder)
+            if not os.path.isdir(folder_path):
+                continue
+            for name in sorted(os.listdir(folder_path)):
+                if name.endswith(RAW_SUFFIX):
+                    yield os.path.join(folder_path, name)
+
+
+# 每个保存目录一个实例
+_raw_stores = {}
+_raw_stores_lock = threading.Lock()
+
+
+def get_raw_store(root_dir):
+    """获取保存目录对应的原始页面存储实例"""
+    key = os.path.normcase(os.path.abspath(root_dir))
+    with _raw_stores_lock:
+        if key not in _raw_stores:
+            _raw_stores[key] = RawPageStore(root_dir)
+        return _raw_stores[key]
@@ -0,0 +1,165 @@
+"""
+离线重新处理
+用保存目录 _raw/ 中保留的原始歌词页面重新执行 解析 → 清理 → 写入，不发起任何网络请求。
+解析和清理在多个进程中并行执行，写入在主进程中完成
+
+用法:
+    python reprocess.py D:/lyrics                         # 原地覆盖歌词文件
+    python reprocess.py D:/lyrics --output D:/lyrics_v2   # 写入新目录
+    python reprocess.py D:/lyrics --format corpus --output D:/corpus_v2
+    python reprocess.py D:/lyrics --artist Drake_所有歌曲 --remove-section-headers
+"""
+
+import os
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from api_config import APIConfig
+from corpus_store import get_corpus_store, flush_corpus_stores, build_record, lyrics_filename
+from lyrics_parser import parse_page, clean_lyrics
+from lyrics_search_index import get_search_index, flush_search_indexes, FTS5_AVAILABLE
+from lyrics_writer import atomic_write_text
+from raw_store import RawPageStore, read_raw_record
+
+
+def process_raw_file(path, remove_section_headers=False):
+    """
+    解析并清理一条原始记录（在工作进程中执行）
+
+    Returns:
+        (路径, 歌曲信息, 歌词文本或None, 错误信息或None)
+    """
+    try:
+        record = read_raw_record(path)
+        lyrics = parse_page(record['html'], remove_section_headers)
+        meta = {key: record[key] for key in ('song_info', 'artist_name', 'artist_folder', 'index')}
+        return path, meta, clean_lyrics(lyrics) if lyrics else None, None
+    except Exception as e:
+        return path, None, None, f"{type(e).__name__}: {e}"
+
+
+def _process_batch(paths, remove_section_headers):
+    """工作进程一次处理一批，减少进程间通信次数"""
+    return [process_raw_file(path, remove_section_headers) for path in paths]
+
+
+class Reprocessor:
+    """把解析结果写入文件夹或语料库"""
+
+    def __init__(self, output_dir, output_format='folder', update_index=True, log_func=print):
+        self.output_dir = output_dir
+        self.output_format = output_format
+        self.update_index = update_index and APIConfig.SEARCH_INDEX_ENABLED and FTS5_AVAILABLE
+        self.log_func = log_func
+        self.stats = {'written': 0, 'unchanged': 0, 'no_lyrics': 0, 'errors': 0, 'skipped': 0}
+
+    def write(self, meta, lyrics):
+        """写入一首歌"""
+        song_info = meta['song_info']
+        artist_folder = meta['artist_folder']
+
+        if self.output_format == 'corpus':
+            store = get_corpus_store(self.output_dir)
+            if store.has(song_info['id']):
+                # 语料库只追加，已有的歌曲需要写入新目录才能更新
+                self.stats['skipped'] += 1
+                return
+            store.append(build_record(song_info, lyrics, artist_folder, meta['index'], meta['artist_name']))
+            path = ''
+        else:
+            folder_path = os.path.join(self.output_dir, artist_folder)
+            os.makedirs(folder_path, exist_ok=True)
+            path = os.path.join(folder_path, lyrics_filename(meta['index'], song_info['title']))
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    if f.read() == lyrics:
+                        self.stats['unchanged'] += 1
+                        return
+            except OSError:
+                pass
+            atomic_write_text(path, lyrics)
+
+        self.stats['written'] += 1
+        if self.update_index:
+            get_search_index(self.output_dir).add(song_info['id'], song_info.get('title'), song_info.get('artist'),
+                                                  song_info.get('album'), lyrics, artist_folder, path)
+
+    def handle(self, path, meta, lyrics, error):
+        """处理一个工作进程的结果"""
+        if error:
+            self.stats['errors'] += 1
+            self.log_func(f"[Reprocess] 处理失败 {os.path.basename(path)}: {error}")
+        elif not lyrics:
+            self.stats['no_lyrics'] += 1
+        else:
+            self.write(meta, lyrics)
+
+    def finish(self):
+        flush_corpus_stores()
+        flush_search_indexes()
+
+
+def reprocess(save_dir, output_dir=None, output_format='folder', artist_folders=None, workers=None,
+              remove_section_headers=False, update_index=True, log_func=print):
+    """
+    重新处理保存目录中的所有原始页面
+
+    Returns:
+        统计字典
+    """
+    output_dir = output_dir or save_dir
+    paths = list(RawPageStore(save_dir).iter_paths(artist_folders))
+    if not paths:
+        log_func("[Reprocess] 没有找到原始页面（下载时需开启\"保留歌词页面原始HTML\"）")
+        return {}
+
+    workers = workers or os.cpu_count() or 1
+    batch_size = max(1, min(200, len(paths) // (workers * 4) or 1))
+    batches = [paths[i:i + batch_size] for i in range(0, len(paths), batch_size)]
+    log_func(f"[Reprocess] {len(paths)} 首歌曲，{workers} 个进程 → {output_dir} ({output_format})")
+
+    reprocessor = Reprocessor(output_dir, output_format, update_index, log_func)
+    start = time.time()
+    done = 0
+    if workers == 1:
+        results = (_process_batch(batch, remove_section_headers) for batch in batches)
+        for batch_results in results:
+            for result in batch_results:
+                reprocessor.handle(*result)
+            done += len(batch_results)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for batch_results in executor.map(_process_batch, batches, [remove_section_headers] * len(batches)):
+                for result in batch_results:
+                    reprocessor.handle(*result)
+                done += len(batch_results)
+                if done % 5000 < len(batch_results):
+                    log_func(f"[Reprocess] 已处理 {done}/{len(paths)}")
+    reprocessor.finish()
+
+    elapsed = time.time() - start
+    stats = dict(reprocessor.stats, total=len(paths), seconds=round(elapsed, 2))
+    log_func(f"[Reprocess] 完成: 写入 {stats['written']}，未变化 {stats['unchanged']}，无歌词 {stats['no_lyrics']}，"
+             f"已存在跳过 {stats['skipped']}，失败 {stats['errors']}，耗时 {elapsed:.1f} 秒"
+             f"（{len(paths) / elapsed if elapsed else 0:.0f} 首/秒）")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="用保留的原始页面离线重新生成歌词")
+    parser.add_argument('save_dir', help="包含 _raw 的保存目录")
+    parser.add_argument('--output', help="输出目录（默认原地覆盖）")
+    parser.add_argument('--format', default='folder', choices=['folder', 'corpus'], help="输出格式")
+    parser.add_argument('--artist', action='append', help="只处理指定的艺人文件夹（可多次指定）")
+    parser.add_argument('--workers', type=int, default=None, help="进程数（默认CPU核数）")
+    parser.add_argument('--remove-section-headers', action='store_true', help="去掉 [Chorus] 等段落标记")
+    parser.add_argument('--no-index', action='store_true', help="不更新全文搜索索引")
+    args = parser.parse_args()
+
+    reprocess(args.save_dir, args.output, args.format, args.artist, args.workers,
+              args.remove_section_headers, update_index=not args.no_index)
+
+
+if __name__ == "__main__":
+    main()
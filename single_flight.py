@@ -0,0 +1,117 @@
+"""
+相同请求合并（singleflight）
+多任务标签页或并行的艺人/分块任务经常同时请求同一个资源（同一次艺人搜索、同一首歌的 /songs/:id、
+重叠队列中同一页 /artists/:id/songs）。相同的GET请求正在进行时，后来的线程不再发请求，
+等待第一个请求完成后共用它的响应（或异常），只占用一次网络请求和一个速率限制名额。
+只合并使用同一个API密钥的请求（一个密钥的 401/429 不会传给其他密钥的请求），完成后不缓存结果
+"""
+
+import threading
+
+from api_config import APIConfig
+
+
+def request_key(method, url, params=None, headers=None):
+    """
+    请求的合并键：方法、URL、参数和 Authorization
+
+    Returns:
+        合并键，不可合并的请求返回None
+    """
+    if method != 'GET' or not url:
+        return None
+    if isinstance(params, dict):
+        params = tuple(sorted((str(k), str(v)) for k, v in params.items()))
+    elif params is not None:
+        params = str(params)
+    return method, url, params, (headers or {}).get('Authorization')
+
+
+class _Call:
+    """一个正在进行的请求"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    相同请求合并（单例模式）
+    所有任务和线程共享正在进行的请求
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        """单例模式实现"""
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+                cls._instance._init_flight()
+            return cls._instance
+
+    def _init_flight(self):
+        self.lock = threading.Lock()
+        self.calls = {}  # 合并键 -> _Call
+        self.stats = {'requests': 0, 'coalesced': 0}
+
+    def do(self, key, func):
+        """
+        执行 func()，相同 key 的请求正在进行时等待它完成并返回同一个结果
+
+        Args:
+            key: 合并键，None 表示不合并
+            func: 实际发出请求的函数
+
+        Returns:
+            func() 的结果；第一个请求抛出异常时所有等待者都抛出同一个异常
+        """
+        if key is None or not APIConfig.REQUEST_COALESCING:
+            return func()
+
+        with self.lock:
+            call = self.calls.get(key)
+            if call is None:
+                call = self.calls[key] = _Call()
+                leader = True
+                self.stats['requests'] += 1
+            else:
+                leader = False
+                self.stats['coalesced'] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                self.calls.pop(key, None)
+            call.done.set()
+
+    def get_status(self):
+        """合并统计：requests 为实际发出的请求数，coalesced 为共用其他请求结果的次数"""
+        with self.lock:
+            return dict(self.stats, in_flight=len(self.calls))
+
+
+# 全局实例
+_global_single_flight = None
+
+
+def get_single_flight():
+    """获取全局请求合并实例"""
+    global _global_single_flight
+    if _global_single_flight is None:
+        _global_single_flight = SingleFlight()
+    return _global_single_flight
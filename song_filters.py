@@ -0,0 +1,97 @@
+"""
+下载前歌曲过滤
+在获取歌曲列表之后、请求歌词之前，按列表中已有的字段（标题、主唱、歌词状态、纯音乐标记）
+跳过翻译、现场版、混音、片段、短剧等不需要的歌曲，并统计每条规则节省的请求数
+"""
+
+import re
+import threading
+
+from api_config import APIConfig
+
+
+# 规则名称
+RULE_TRANSLATION = 'translation'
+RULE_NOT_PRIMARY = 'not_primary'
+RULE_UNRELEASED = 'unreleased'
+RULE_INSTRUMENTAL = 'instrumental'
+RULE_LIVE = 'live'
+RULE_REMIX = 'remix'
+RULE_SNIPPET = 'snippet'
+RULE_SKIT = 'skit'
+
+RULE_LABELS = {
+    RULE_TRANSLATION: '翻译/罗马音',
+    RULE_NOT_PRIMARY: '客串歌曲',
+    RULE_UNRELEASED: '未发布',
+    RULE_INSTRUMENTAL: '纯音乐',
+    RULE_LIVE: '现场版',
+    RULE_REMIX: '混音版',
+    RULE_SNIPPET: '片段',
+    RULE_SKIT: '短剧',
+}
+
+# 翻译页面挂在 "Genius Romanizations"、"Genius Traducciones al Español" 等官方账号下
+TRANSLATION_ARTIST_PATTERN = re.compile(r'^Genius\b', re.IGNORECASE)
+
+# 获取一首歌的歌词大约需要的请求数（歌曲API + 歌词页面）
+REQUESTS_PER_SONG = 2
+
+
+class SongFilter:
+    """
+    一次下载运行使用的过滤器
+    规则按 SONG_FILTER_RULES 中的顺序判断，一首歌只计入第一条命中的规则
+    """
+
+    def __init__(self, enabled=True, primary_artist_only=False, rules=None):
+        self.rules = list(rules if rules is not None else APIConfig.SONG_FILTER_RULES) if enabled else []
+        if primary_artist_only and RULE_NOT_PRIMARY not in self.rules:
+            self.rules.insert(0, RULE_NOT_PRIMARY)
+
+        self.title_patterns = {rule: re.compile(pattern, re.IGNORECASE)
+                               for rule, pattern in APIConfig.SONG_FILTER_TITLE_PATTERNS.items()
+                               if rule in self.rules}
+        self.skip_lyrics_states = set(APIConfig.SONG_FILTER_SKIP_LYRICS_STATES)
+
+        self.counts = {rule: 0 for rule in self.rules}
+        self.lock = threading.Lock()
+
+    def _matches(self, rule, song_info, artist_id):
+        """判断单条规则是否命中"""
+        title = song_info.get('title') or ''
+
+        if rule == RULE_NOT_PRIMARY:
+            # 旧的歌曲列表没有主唱ID，不做过滤
+            primary_id = song_info.get('primary_artist_id')
+            return bool(artist_id and primary_id and primary_id != artist_id)
+        if rule == RULE_UNRELEASED:
+            return song_info.get('lyrics_state') in self.skip_lyrics_states
+        if rule == RULE_INSTRUMENTAL:
+            return bool(song_info.get('instrumental'))
+        if rule == RULE_TRANSLATION:
+            if TRANSLATION_ARTIST_PATTERN.match(song_info.get('artist') or ''):
+                return True
+
+        pattern = self.title_patterns.get(rule)
+        return bool(pattern and pattern.search(title))
+
+    def check(self, song_info, artist_id=None):
+        """
+        判断歌曲是否应跳过，命中时计数
+
+        Returns:
+            命中的规则名称，未命中返回None
+        """
+        for rule in self.rules:
+            if self._matches(rule, song_info, artist_id):
+                with self.lock:
+                    self.counts[rule] += 1
+                return rule
+        return None
+
+    def get_summary(self):
+        """返回 [(规则, 名称, 跳过歌曲数, 节省请求数)]，只包含有命中的规则"""
+        with self.lock:
+            return [(rule, RULE_LABELS.get(rule, rule), count, count * REQUESTS_PER_SONG)
+                    for rule, count in self.counts.items() if count]
@@ -0,0 +1,157 @@
+"""
+歌曲结果负缓存
+按歌曲ID记录无歌词、未找到和解析失败的结果，重复运行时在复查期限内直接跳过这些歌曲
+"""
+
+import os
+import json
+import time
+import threading
+
+
+# 结果类型
+OUTCOME_NO_LYRICS = 'no_lyrics'  # 纯音乐、未发布或歌词为空
+OUTCOME_NOT_FOUND = 'not_found'  # 无法找到对应的歌词页面
+OUTCOME_PARSE_ERROR = 'parse_error'  # 响应结构异常，无法解析
+
+OUTCOME_LABELS = {
+    OUTCOME_NO_LYRICS: '无歌词',
+    OUTCOME_NOT_FOUND: '未找到',
+    OUTCOME_PARSE_ERROR: '解析失败',
+}
+
+
+class MalformedResponseError(Exception):
+    """API响应结构异常（记录为 parse_error，其他异常不写入负缓存）"""
+
+
+class SongOutcomeCache:
+    """
+    歌曲结果负缓存（单例模式）
+    所有任务共享，以歌曲ID为键
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    # 累计多少条未保存的记录后写一次文件
+    SAVE_BATCH_SIZE = 20
+
+    def __new__(cls):
+        """单例模式实现"""
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+                cls._instance._init_cache()
+            return cls._instance
+
+    def _init_cache(self):
+        """初始化缓存"""
+        self.entries = {}
+        self.lock = threading.RLock()
+        self.dirty_count = 0
+        self.skipped = {outcome: 0 for outcome in OUTCOME_LABELS}
+
+        self.cache_file = "song_outcome_cache.json"
+        self.load()
+
+    def load(self):
+        """加载缓存文件"""
+        try:
+            if os.path.exists(self.cache_file):
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                with self.lock:
+                    self.entries = data.get('entries', {})
+                print(f"[OutcomeCache] 加载了 {len(self.entries)} 条歌曲结果记录")
+        except Exception as e:
+            print(f"[OutcomeCache] 加载缓存失败: {e}")
+
+    def save(self):
+        """保存缓存文件"""
+        try:
+            with self.lock:
+                data = {
+                    'entries': self.entries,
+                    'last_updated': time.strftime("%Y-%m-%d %H:%M:%S")
+                }
+                tmp_path = self.cache_file + '.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False)
+                os.replace(tmp_path, self.cache_file)
+                self.dirty_count = 0
+        except Exception as e:
+            print(f"[OutcomeCache] 保存缓存失败: {e}")
+
+    def flush(self):
+        """保存尚未写入文件的记录"""
+        with self.lock:
+            if self.dirty_count:
+                self.save()
+
+    def record(self, song_id, outcome, reason='', title='', artist=''):
+        """记录一首歌曲的失败结果"""
+        with self.lock:
+            self.entries[str(song_id)] = {
+                'outcome': outcome,
+                'reason': reason,
+                'title': title,
+                'artist': artist,
+                'recorded_at': time.time()
+            }
+            self.dirty_count += 1
+            if self.dirty_count >= self.SAVE_BATCH_SIZE:
+                self.save()
+
+    def clear(self, song_id):
+        """歌曲成功获取后移除记录"""
+        with self.lock:
+            if self.entries.pop(str(song_id), None) is not None:
+                self.dirty_count += 1
+
+    def get_skip_entry(self, song_id, ttl_days):
+        """
+        判断歌曲是否应跳过
+
+        Args:
+            song_id: 歌曲ID
+            ttl_days: {结果类型: 复查天数}，超过期限的记录会重新尝试
+
+        Returns:
+            仍在复查期限内的记录，否则None
+        """
+        with self.lock:
+            entry = self.entries.get(str(song_id))
+            if not entry:
+                return None
+
+            ttl = ttl_days.get(entry['outcome'], 0) * 86400
+            if time.time() - entry.get('recorded_at', 0) >= ttl:
+                return None
+
+            self.skipped[entry['outcome']] = self.skipped.get(entry['outcome'], 0) + 1
+            return entry
+
+    def get_status(self):
+        """获取缓存状态"""
+        with self.lock:
+            counts = {outcome: 0 for outcome in OUTCOME_LABELS}
+            for entry in self.entries.values():
+                counts[entry['outcome']] = counts.get(entry['outcome'], 0) + 1
+            return {
+                'entries': len(self.entries),
+                'by_outcome': counts,
+                'skipped': dict(self.skipped)
+            }
+
+
+# 全局实例
+_global_outcome_cache = None
+
+
+def get_outcome_cache():
+    """获取全局歌曲结果缓存实例"""
+    global _global_outcome_cache
+    if _global_outcome_cache is None:
+        _global_outcome_cache = SongOutcomeCache()
+    return _global_outcome_cache
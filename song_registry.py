@@ -0,0 +1,147 @@
+"""
+全局歌曲登记表
+记录每个已下载歌曲ID的保存位置，所有艺人、任务和运行共享。
+合作歌曲会出现在每位参与艺人的歌曲列表中，第二次遇到时直接链接或复制已保存的歌词，不再请求API
+"""
+
+import os
+import time
+import shutil
+import sqlite3
+import threading
+
+from lyrics_writer import TEMP_SUFFIX
+
+
+# 保存形式
+STORAGE_FOLDER = 'folder'  # path 为歌词文件路径
+STORAGE_CORPUS = 'corpus'  # path 为语料库所在的保存目录
+
+
+def link_or_copy(src, dst):
+    """把 src 硬链接到 dst（原子替换），不支持硬链接时复制，返回是否为硬链接"""
+    tmp_path = f"{dst}.{os.getpid()}.{threading.get_ident()}{TEMP_SUFFIX}"
+    try:
+        os.link(src, tmp_path)
+        os.replace(tmp_path, dst)
+        return True
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+    shutil.copyfile(src, tmp_path)
+    os.replace(tmp_path, dst)
+    return False
+
+
+class SongRegistry:
+    """
+    歌曲登记表（单例模式）
+    使用 SQLite，方便多个任务同时读写且数据量大时无需整体重写文件
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        """单例模式实现"""
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+                cls._instance._init_registry()
+            return cls._instance
+
+    def _init_registry(self):
+        """初始化登记表"""
+        self.registry_file = "song_registry.sqlite"
+        self.lock = threading.RLock()
+        self.stats = {'reused': 0, 'linked': 0, 'copied': 0, 'stale': 0}
+
+        self.conn = sqlite3.connect(self.registry_file, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS songs ("
+            "song_id INTEGER PRIMARY KEY, storage TEXT, path TEXT, artist_folder TEXT, "
+            "title TEXT, registered_at REAL)"
+        )
+        self.conn.commit()
+
+    def register(self, song_id, storage, path, artist_folder='', title=''):
+        """登记一首已保存的歌曲（同一歌曲ID只保留第一次保存的位置）"""
+        try:
+            with self.lock:
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO songs (song_id, storage, path, artist_folder, title, registered_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (int(song_id), storage, os.path.abspath(path), artist_folder, title, time.time()))
+                self.conn.commit()
+        except Exception as e:
+            print(f"[SongRegistry] 登记歌曲失败 {song_id}: {e}")
+
+    def lookup(self, song_id):
+        """
+        查询歌曲的保存位置，保存的文件已不存在时删除该记录
+
+        Returns:
+            {'song_id', 'storage', 'path', 'artist_folder', 'title'} 或 None
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT song_id, storage, path, artist_folder, title FROM songs WHERE song_id = ?",
+                (int(song_id),)).fetchone()
+        if not row:
+            return None
+
+        entry = dict(zip(('song_id', 'storage', 'path', 'artist_folder', 'title'), row))
+        if entry['storage'] == STORAGE_FOLDER:
+            valid = os.path.exists(entry['path']) and os.path.getsize(entry['path']) > 0
+        else:
+            from corpus_store import get_corpus_store
+            valid = os.path.isdir(entry['path']) and get_corpus_store(entry['path']).has(song_id)
+
+        if not valid:
+            self.forget(song_id)
+            with self.lock:
+                self.stats['stale'] += 1
+            return None
+        return entry
+
+    def forget(self, song_id):
+        """删除一首歌曲的登记"""
+        with self.lock:
+            self.conn.execute("DELETE FROM songs WHERE song_id = ?", (int(song_id),))
+            self.conn.commit()
+
+    def read_lyrics(self, entry):
+        """读取已保存的歌词正文"""
+        if entry['storage'] == STORAGE_FOLDER:
+            with open(entry['path'], 'r', encoding='utf-8') as f:
+                return f.read()
+        from corpus_store import get_corpus_store
+        record = get_corpus_store(entry['path']).get(entry['song_id'])
+        return record['lyrics'] if record else None
+
+    def count_reuse(self, linked):
+        """统计一次复用"""
+        with self.lock:
+            self.stats['reused'] += 1
+            self.stats['linked' if linked else 'copied'] += 1
+
+    def get_status(self):
+        """获取登记表状态"""
+        with self.lock:
+            total = self.conn.execute("SELECT COUNT(*) FROM songs").fetchone()[0]
+            return dict(self.stats, songs=total)
+
+
+# 全局实例
+_global_song_registry = None
+
+
+def get_song_registry():
+    """获取全局歌曲登记表实例"""
+    global _global_song_registry
+    if _global_song_registry is None:
+        _global_song_registry = SongRegistry()
+    return _global_song_registry
@@ -0,0 +1,42 @@
+"""
+歌词解析一致性测试
+benchmarks/lyrics_pages/ 中的每个页面，extract_lyrics_fast 与 parse_lyrics_html 的结果
+（以及 clean_lyrics 之后的结果）必须完全一致
+
+用法:
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import glob
+import unittest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from lyrics_parser import parse_lyrics_html, extract_lyrics_fast, clean_lyrics  # noqa: E402
+
+PAGES_DIR = os.path.join(ROOT_DIR, 'benchmarks', 'lyrics_pages')
+
+
+class LyricsParserParityTest(unittest.TestCase):
+    """快速解析与 BeautifulSoup 解析的一致性"""
+
+    def test_pages_exist(self):
+        self.assertTrue(glob.glob(os.path.join(PAGES_DIR, '*.html')), "没有找到测试页面")
+
+    def test_fast_parser_matches_bs4(self):
+        for path in sorted(glob.glob(os.path.join(PAGES_DIR, '*.html'))):
+            with open(path, 'r', encoding='utf-8') as f:
+                page = f.read()
+            for remove_section_headers in (False, True):
+                with self.subTest(page=os.path.basename(path), remove_section_headers=remove_section_headers):
+                    expected = parse_lyrics_html(page, remove_section_headers)
+                    result = extract_lyrics_fast(page, remove_section_headers)
+                    self.assertEqual(result, expected)
+                    self.assertEqual(clean_lyrics(result), clean_lyrics(expected))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,270 @@
+"""
+多节点工作协调器
+用一个共享的 SQLite 文件保存整个下载队列，各节点以租约方式领取艺人或分块任务，
+通过心跳续约；节点崩溃后租约过期，任务自动重新分配给其他节点（分块任务从上次汇报的断点继续）
+"""
+
+import json
+import time
+import sqlite3
+import threading
+
+from artist_resolver import normalize_artist_name
+
+
+JOB_ARTIST = 'artist'
+JOB_CHUNK = 'chunk'
+
+STATUS_PENDING = 'pending'
+STATUS_LEASED = 'leased'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+DEFAULT_LEASE_SECONDS = 300
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+class WorkCoordinator:
+    """
+    基于共享 SQLite 文件的任务协调器
+    每次操作都在短事务中完成，多个进程或节点可以同时打开同一个文件
+    （网络共享盘需支持文件锁）
+    """
+
+    def __init__(self, db_path, lease_seconds=DEFAULT_LEASE_SECONDS, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "job_id TEXT PRIMARY KEY, kind TEXT, artist_name TEXT, payload TEXT, "
+            "status TEXT, lease_owner TEXT, lease_expires REAL, attempts INTEGER DEFAULT 0, "
+            "progress TEXT, result TEXT, error TEXT, created_at REAL, updated_at REAL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, kind, created_at)")
+
+    def _transaction(self, func):
+        """在 BEGIN IMMEDIATE 事务中执行，避免多个节点领取同一任务"""
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = func()
+                self.conn.execute("COMMIT")
+                return result
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def _insert(self, job_id, kind, artist_name, payload):
+        """插入任务，已存在时忽略"""
+        now = time.time()
+        cursor = self.conn.execute(
+            "INSERT OR IGNORE INTO jobs (job_id, kind, artist_name, payload, status, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (job_id, kind, artist_name, json.dumps(payload, ensure_ascii=False), STATUS_PENDING, now, now))
+        return cursor.rowcount
+
+    def add_artists(self, artist_names):
+        """把艺人加入队列，返回新增数量"""
+        def run():
+            return sum(self._insert(f"artist:{normalize_artist_name(name)}", JOB_ARTIST, name, {})
+                       for name in artist_names if name.strip())
+        return self._transaction(run)
+
+    def add_chunks(self, artist_name, artist_id, songs, chunk_size, artist_folder):
+        """
+        把大艺人的歌曲列表拆成分块任务，歌曲列表随任务保存，其他节点无需再次请求
+
+        艺人重新处理时歌曲列表可能变长：已存在的最后一个不满的分块会被扩展，
+        已完成的从原来的结尾继续
+
+        Returns:
+            新增或扩展的分块任务数
+        """
+        def run():
+            added = 0
+            for start in range(1, len(songs) + 1, chunk_size):
+                end = min(start + chunk_size, len(songs) + 1)
+                payload = {
+                    'artist_id': artist_id,
+                    'artist_folder': artist_folder,
+                    'start': start,
+                    'end': end,
+                    'total_songs': len(songs),
+                    'songs': songs[start - 1:end - 1]
+                }
+                job_id = f"chunk:{normalize_artist_name(artist_name)}:{start}"
+                if self._insert(job_id, JOB_CHUNK, artist_name, payload):
+                    added += 1
+                elif self._extend_chunk(job_id, payload):
+                    added += 1
+            return added
+        return self._transaction(run)
+
+    def _extend_chunk(self, job_id, payload):
+        """已存在的分块比新的分块短时扩展它，返回是否扩展"""
+        row = self.conn.execute("SELECT payload, status, result FROM jobs WHERE job_id = ?",
+                                (job_id,)).fetchone()
+        old_end = json.loads(row[0] or '{}').get('end', payload['end'])
+        if old_end >= payload['end']:
+            return False
+
+        now = time.time()
+        payload_json = json.dumps(payload, ensure_ascii=False)
+        if row[1] == STATUS_DONE:
+            # 已完成的部分不再重复处理，从原来的结尾继续
+            result = json.loads(row[2] or '{}')
+            progress = {'next_index': old_end, 'saved': result.get('saved', 0), 'failed': result.get('failed', 0)}
+            self.conn.execute(
+                "UPDATE jobs SET payload = ?, status = ?, progress = ?, attempts = 0, error = NULL, "
+                "updated_at = ? WHERE job_id = ?",
+                (payload_json, STATUS_PENDING, json.dumps(progress, ensure_ascii=False), now, job_id))
+        else:
+            # 正在处理的节点仍按旧的结尾完成，complete() 发现没有处理到新的结尾时会放回队列
+            self.conn.execute("UPDATE jobs SET payload = ?, updated_at = ? WHERE job_id = ?",
+                              (payload_json, now, job_id))
+        return True
+
+    def _reclaim_expired(self, now):
+        """把租约已过期的任务放回队列（已达最大尝试次数的标记为失败），返回放回队列的数量"""
+        failed = self.conn.execute(
+            "UPDATE jobs SET status = ?, lease_owner = NULL, error = ?, updated_at = ? "
+            "WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+            (STATUS_FAILED, "租约多次过期", now, STATUS_LEASED, now, self.max_attempts)).rowcount
+        if failed:
+            print(f"[Coordinator] {failed} 个任务的租约过期且已达到最大尝试次数，标记为失败")
+        cursor = self.conn.execute(
+            "UPDATE jobs SET status = ?, lease_owner = NULL, updated_at = ? "
+            "WHERE status = ? AND lease_expires < ?",
+            (STATUS_PENDING, now, STATUS_LEASED, now))
+        return cursor.rowcount
+
+    def claim(self, worker_id):
+        """
+        领取一个任务（分块任务优先，尽快完成已开始的艺人）
+
+        Returns:
+            任务字典（payload、progress 已解析），队列中没有可领取的任务时返回None
+        """
+        def run():
+            now = time.time()
+            reclaimed = self._reclaim_expired(now)
+            if reclaimed:
+                print(f"[Coordinator] {reclaimed} 个任务的租约已过期，重新分配")
+
+            row = self.conn.execute(
+                "SELECT job_id FROM jobs WHERE status = ? "
+                "ORDER BY CASE kind WHEN ? THEN 0 ELSE 1 END, created_at, job_id LIMIT 1",
+                (STATUS_PENDING, JOB_CHUNK)).fetchone()
+            if not row:
+                return None
+
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, lease_owner = ?, lease_expires = ?, attempts = attempts + 1, "
+                "updated_at = ? WHERE job_id = ?",
+                (STATUS_LEASED, worker_id, now + self.lease_seconds, now, row[0]))
+            return self._get(row[0])
+        return self._transaction(run)
+
+    def _get(self, job_id):
+        """读取任务"""
+        row = self.conn.execute(
+            "SELECT job_id, kind, artist_name, payload, status, lease_owner, attempts, progress "
+            "FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if not row:
+            return None
+        job = dict(zip(('job_id', 'kind', 'artist_name', 'payload', 'status', 'lease_owner', 'attempts',
+                        'progress'), row))
+        job['payload'] = json.loads(job['payload'] or '{}')
+        job['progress'] = json.loads(job['progress']) if job['progress'] else None
+        return job
+
+    def heartbeat(self, job_id, worker_id, progress=None):
+        """
+        续约，可同时汇报进度（如分块任务的下一首序号）
+
+        Returns:
+            租约仍属于该节点时返回True；已过期并被其他节点领取时返回False，调用方应停止处理
+        """
+        def run():
+            now = time.time()
+            params = [now + self.lease_seconds, now]
+            sql = "UPDATE jobs SET lease_expires = ?, updated_at = ?"
+            if progress is not None:
+                sql += ", progress = ?"
+                params.append(json.dumps(progress, ensure_ascii=False))
+            sql += " WHERE job_id = ? AND status = ? AND lease_owner = ?"
+            params += [job_id, STATUS_LEASED, worker_id]
+            return self.conn.execute(sql, params).rowcount == 1
+        return self._transaction(run)
+
+    def complete(self, job_id, worker_id, result=None):
+        """任务完成（分块在处理期间被扩展、尚未处理到新的结尾时放回队列继续）"""
+        def run():
+            result_json = json.dumps(result or {}, ensure_ascii=False)
+            row = self.conn.execute("SELECT kind, payload FROM jobs WHERE job_id = ? AND lease_owner = ?",
+                                    (job_id, worker_id)).fetchone()
+            if not row:
+                return False
+            end = json.loads(row[1] or '{}').get('end')
+            next_index = (result or {}).get('next_index')
+            if row[0] == JOB_CHUNK and end is not None and next_index is not None and next_index < end:
+                progress = {key: result[key] for key in ('next_index', 'saved', 'failed') if key in result}
+                return self.conn.execute(
+                    "UPDATE jobs SET status = ?, lease_owner = NULL, progress = ?, "
+                    "attempts = MAX(attempts - 1, 0), updated_at = ? WHERE job_id = ?",
+                    (STATUS_PENDING, json.dumps(progress, ensure_ascii=False), time.time(),
+                     job_id)).rowcount == 1
+            return self.conn.execute(
+                "UPDATE jobs SET status = ?, lease_owner = NULL, result = ?, updated_at = ? "
+                "WHERE job_id = ?",
+                (STATUS_DONE, result_json, time.time(), job_id)).rowcount == 1
+        return self._transaction(run)
+
+    def release(self, job_id, worker_id, progress=None):
+        """节点主动停止时把任务放回队列（保留进度）"""
+        def run():
+            params = [STATUS_PENDING, time.time()]
+            sql = "UPDATE jobs SET status = ?, lease_owner = NULL, attempts = MAX(attempts - 1, 0), updated_at = ?"
+            if progress is not None:
+                sql += ", progress = ?"
+                params.append(json.dumps(progress, ensure_ascii=False))
+            sql += " WHERE job_id = ? AND lease_owner = ?"
+            params += [job_id, worker_id]
+            return self.conn.execute(sql, params).rowcount == 1
+        return self._transaction(run)
+
+    def fail(self, job_id, worker_id, error):
+        """任务出错：未超过最大尝试次数时放回队列，否则标记为失败"""
+        def run():
+            row = self.conn.execute("SELECT attempts FROM jobs WHERE job_id = ? AND lease_owner = ?",
+                                    (job_id, worker_id)).fetchone()
+            if not row:
+                return None
+            status = STATUS_FAILED if row[0] >= self.max_attempts else STATUS_PENDING
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, lease_owner = NULL, error = ?, updated_at = ? WHERE job_id = ?",
+                (status, str(error)[:500], time.time(), job_id))
+            return status
+        return self._transaction(run)
+
+    def get_status(self):
+        """各状态的任务数"""
+        with self.lock:
+            rows = self.conn.execute("SELECT kind, status, COUNT(*) FROM jobs GROUP BY kind, status").fetchall()
+            leases = self.conn.execute(
+                "SELECT lease_owner, COUNT(*) FROM jobs WHERE status = ? GROUP BY lease_owner",
+                (STATUS_LEASED,)).fetchall()
+        status = {}
+        for kind, job_status, count in rows:
+            status.setdefault(kind, {})[job_status] = count
+        return {'jobs': status, 'leases': dict(leases)}
+
+    def close(self):
+        """关闭连接"""
+        with self.lock:
+            self.conn.close()